@@ -0,0 +1,75 @@
+"""Run every benchmark, write JSON results and flag regressions against a baseline.
+
+Usage::
+
+    python -m benchmarks [--quick] [--only NAME ...] [--output results.json]
+                         [--baseline benchmarks/baseline.json] [--threshold 0.25]
+                         [--save-baseline]
+
+Everything runs offline: the LLM benchmarks use an in-process fake of
+litellm.completion and run_container a fake docker CLI. The exit status is 1
+when a benchmark's throughput dropped by more than the threshold compared
+with the baseline, or when a record with a ``target`` (per second) missed it.
+
+Throughput depends on the machine, so no baseline is committed. Record one
+locally from the revision to compare against, then run the change on the
+same machine::
+
+    git stash                                # or check out the base revision
+    python -m benchmarks --quick --save-baseline
+    git stash pop
+    python -m benchmarks --quick
+
+The baseline is written to benchmarks/baseline.json, which git ignores.
+Without a baseline, results are printed and nothing is compared.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+from benchmarks.common import compare, load_results, save_results
+
+BENCHMARKS = ("import", "parse_xml", "envs", "command_policy", "tools", "shell_session", "container", "llm", "streaming")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for CI smoke runs")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative throughput drop flagged")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    records = []
+    for name in args.only or BENCHMARKS:
+        print(f"# {name}")
+        records.extend(importlib.import_module(f"benchmarks.bench_{name}").main(quick=args.quick))
+
+    if args.output:
+        save_results(args.output, records)
+    missed = [record for record in records if record.get("target") and record["per_second"] < record["target"]]
+    for record in missed:
+        print(f"{record['name']:<40} below target of {record['target']:,}/s")
+    if args.save_baseline:
+        save_results(args.baseline, records)
+        return 1 if missed else 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if missed else 0
+
+    regressions = len(missed)
+    print(f"# compared with {args.baseline}")
+    for entry in compare(records, load_results(args.baseline), args.threshold):
+        flag = "REGRESSION" if entry["regression"] else "ok"
+        regressions += entry["regression"]
+        print(f"{entry['name']:<40} {entry['ratio']:6.2f}x {flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
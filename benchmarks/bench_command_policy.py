@@ -0,0 +1,43 @@
+"""Measure command validations per second.
+
+Run with ``python -m benchmarks.bench_command_policy``. Accepted commands
+validated through ShellCodeExecutor target more than 1M validations/sec; the
+runner (``python -m benchmarks``) fails when they miss it. Rejected commands
+are slower because every rejection raises.
+"""
+
+from typing import Any, Dict, List
+
+from src.command_policy import CommandPolicy
+from src.tools import ShellCodeExecutor
+from benchmarks.common import best_of, format_rate
+
+COMMANDS = ["ls -la /tmp", "date", "echo hello world", "rm -rf /", "vim x", "ls; rm x"]
+ROUNDS = 100_000
+TARGET_PER_SECOND = 1_000_000
+
+
+def _loop(validate, command):
+    def run():
+        for _ in range(ROUNDS):
+            try:
+                validate(command)
+            except (ValueError, PermissionError):
+                pass
+    return run
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    policy = CommandPolicy(ShellCodeExecutor.whitelisted_commands, ShellCodeExecutor.blacklisted_commands)
+    executor = ShellCodeExecutor()
+    records = []
+    for command in COMMANDS:
+        seconds = best_of(_loop(policy.validate, command))
+        records.append(format_rate(f"policy.validate {command!r}", ROUNDS, seconds))
+    seconds = best_of(_loop(executor._validate_command, COMMANDS[0]))
+    records.append(format_rate("ShellCodeExecutor._validate_command", ROUNDS, seconds, target=TARGET_PER_SECOND))
+    return records
+
+
+if __name__ == "__main__":
+    main()
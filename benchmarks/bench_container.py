@@ -0,0 +1,36 @@
+"""Measure run_container overhead against a fake docker CLI.
+
+The shim runs the command with sh instead of starting a container, so this
+times the wrapper (argument building, subprocess and output handling) rather
+than docker. Run with ``python -m benchmarks.bench_container``.
+"""
+
+import os
+import stat
+import tempfile
+from typing import Any, Dict, List
+
+from src.isolation import run_container
+from benchmarks.common import best_of, format_rate
+
+# Handles only ``docker run --rm IMAGE sh -c COMMAND``.
+FAKE_DOCKER = """#!/bin/sh
+shift 3
+exec "$@"
+"""
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    rounds = 20 if quick else 100
+    with tempfile.TemporaryDirectory() as directory:
+        docker = os.path.join(directory, "docker")
+        with open(docker, "w", encoding="utf-8") as f:
+            f.write(FAKE_DOCKER)
+        os.chmod(docker, os.stat(docker).st_mode | stat.S_IEXEC)
+        assert run_container("img", "echo hi", docker=docker) == "hi\n"
+        seconds = best_of(lambda: [run_container("img", "echo hi", docker=docker) for _ in range(rounds)])
+    return [format_rate("run_container fake docker", rounds, seconds)]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Compare Env1/Env2 batch scoring against a per-item Python loop.
+
+Run with ``python -m benchmarks.bench_envs``.
+"""
+
+import random
+import string
+from typing import Any, Dict, List
+
+from src.envs import Env1, Env2
+from benchmarks.common import best_of, format_rate
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def _samples(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase
+    return ["".join(rng.choices(alphabet, k=rng.randint(0, 60))) for _ in range(count)]
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    records = []
+    for env in (Env1(), Env2()):
+        for size in SIZES[:1] if quick else SIZES:
+            samples = _samples(size)
+            assert env.score_batch(samples).tolist() == [env(s) for s in samples]
+            loop = best_of(lambda: [env(s) for s in samples])
+            batch = best_of(lambda: env.score_batch(samples))
+            name = type(env).__name__
+            records.append(format_rate(f"{name} python loop n={size}", size, loop))
+            records.append(format_rate(f"{name} score_batch n={size}", size, batch, speedup=f"{loop / batch:.1f}x"))
+    return records
+
+
+if __name__ == "__main__":
+    main()
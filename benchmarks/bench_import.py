@@ -0,0 +1,40 @@
+"""Measure how long ``import src`` takes in a fresh interpreter.
+
+Run with ``python -m benchmarks.bench_import``. The package imports litellm
+lazily, so importing it and the main classes targets less than 0.5s; the
+runner (``python -m benchmarks``) fails when it takes longer.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import format_rate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = 0.5
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import src
+from src import Env1, Env2, ShellCodeExecutor, parse_xml, Agent
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def _import_seconds() -> float:
+    result = subprocess.run([sys.executable, "-c", _PROBE], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    seconds = min(_import_seconds() for _ in range(3 if quick else 5))
+    return [format_rate("import src", 1, seconds, target=1 / IMPORT_BUDGET_SECONDS)]
+
+
+if __name__ == "__main__":
+    main()
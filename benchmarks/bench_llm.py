@@ -0,0 +1,48 @@
+"""Measure the per-call and per-chunk overhead of the LLM wrappers.
+
+litellm.completion is replaced in-process by a fake that answers instantly,
+so the numbers are this package's own cost: validation, cache lookups,
+escaping and response wrapping. Run with ``python -m benchmarks.bench_llm``.
+"""
+
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from src.llm_utils import _litellm, litellm_completion, litellm_streaming  # noqa: E402
+from benchmarks.common import best_of, format_rate  # noqa: E402
+
+MODEL = "openrouter/fake"
+
+
+class _FakeCompletion:
+    def __init__(self, chunks: int):
+        self.response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="a <b> & c"))])
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"tok{i} <x> "))])
+                       for i in range(chunks)]
+
+    def __call__(self, model, messages, max_tokens, temperature, stream=False, **kwargs):
+        return iter(self.chunks) if stream else self.response
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    litellm = _litellm()
+    chunks = 1_000 if quick else 10_000
+    original = litellm.completion
+    litellm.completion = _FakeCompletion(chunks)
+    try:
+        rounds = 2_000 if quick else 20_000
+        seconds = best_of(lambda: [litellm_completion("hi", MODEL) for _ in range(rounds)])
+        records = [format_rate("litellm_completion per call", rounds, seconds)]
+        seconds = best_of(lambda: sum(1 for _ in litellm_streaming("hi", MODEL)))
+        records.append(format_rate("litellm_streaming per chunk", chunks, seconds,
+                                   us_per_chunk=f"{seconds / chunks * 1e6:.2f}"))
+    finally:
+        litellm.completion = original
+    return records
+
+
+if __name__ == "__main__":
+    main()
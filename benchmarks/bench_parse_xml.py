@@ -0,0 +1,34 @@
+"""Measure parse_xml on small and large documents.
+
+Run with ``python -m benchmarks.bench_parse_xml``.
+"""
+
+from typing import Any, Dict, List
+
+from src.main import parse_xml
+from benchmarks.common import best_of, format_rate
+
+SMALL = ('<?xml version="1.0"?><response><thinking>short</thinking><message>hello</message>'
+         '<memory><search></search><replace>note</replace></memory></response>')
+
+
+def _large(items: int) -> str:
+    body = "".join(f"<item{i}><text>{'x' * 80}</text><n>{i}</n></item{i}>" for i in range(items))
+    return f'<?xml version="1.0"?><response>{body}</response>'
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    records = []
+    rounds = 2_000 if quick else 20_000
+    seconds = best_of(lambda: [parse_xml(SMALL) for _ in range(rounds)])
+    records.append(format_rate("parse_xml small", rounds, seconds))
+
+    large = _large(1_000 if quick else 10_000)
+    rounds = 5 if quick else 20
+    seconds = best_of(lambda: [parse_xml(large) for _ in range(rounds)])
+    records.append(format_rate(f"parse_xml large {len(large) // 1024}KiB", rounds, seconds))
+    return records
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Compare IsolatedEnvironment commands/sec with and without a shell session.
+
+Run with ``python -m benchmarks.bench_shell_session``.
+"""
+
+from typing import Any, Dict, List
+
+from src.isolation import IsolatedEnvironment
+from benchmarks.common import best_of, format_rate
+
+COMMANDS = 200
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    results = {}
+    for session in (False, True):
+        env = IsolatedEnvironment(session=session)
+        env.execute("true")  # start the session outside the timed region
+        results[session] = best_of(lambda: [env.execute("echo hi") for _ in range(COMMANDS)])
+        env.close()
+    return [
+        format_rate("IsolatedEnvironment per-call spawn", COMMANDS, results[False]),
+        format_rate("IsolatedEnvironment session", COMMANDS, results[True],
+                    speedup=f"{results[False] / results[True]:.1f}x"),
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare the wrapped and raw streaming paths on a fake high-rate stream.
+
+Run with ``python -m benchmarks.bench_streaming``. The wrapped path is timed
+the way callers consume it, unwrapping every chunk again.
+"""
+
+import os
+from typing import Any, Dict, List
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from src.llm_utils import _litellm, litellm_streaming, litellm_streaming_raw, unwrap_response  # noqa: E402
+from src.stream_metrics import StreamMetrics  # noqa: E402
+from benchmarks.bench_llm import MODEL, _FakeCompletion  # noqa: E402
+from benchmarks.common import best_of, format_rate  # noqa: E402
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    litellm = _litellm()
+    chunks = 5_000 if quick else 50_000
+    original = litellm.completion
+    litellm.completion = _FakeCompletion(chunks)
+    try:
+        wrapped = best_of(lambda: [unwrap_response(c) for c in litellm_streaming("hi", MODEL)])
+        raw = best_of(lambda: list(litellm_streaming_raw("hi", MODEL)))
+        metrics = StreamMetrics()
+        measured = best_of(lambda: list(litellm_streaming_raw("hi", MODEL, metrics=metrics)))
+        coalesced = best_of(lambda: list(litellm_streaming_raw("hi", MODEL, max_chunk_chars=256)))
+    finally:
+        litellm.completion = original
+    return [
+        format_rate("stream wrapped + unwrap", chunks, wrapped),
+        format_rate("stream raw", chunks, raw, speedup=f"{wrapped / raw:.1f}x"),
+        format_rate("stream raw + metrics", chunks, measured, speedup=f"{wrapped / measured:.1f}x"),
+        format_rate("stream raw coalesced 256", chunks, coalesced, speedup=f"{wrapped / coalesced:.1f}x"),
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Measure ShellCodeExecutor.run, which validates and spawns a subprocess per command.
+
+Run with ``python -m benchmarks.bench_tools``.
+"""
+
+from typing import Any, Dict, List
+
+from src.tools import ShellCodeExecutor
+from benchmarks.common import best_of, format_rate
+
+
+def main(quick: bool = False) -> List[Dict[str, Any]]:
+    executor = ShellCodeExecutor()
+    rounds = 20 if quick else 100
+    seconds = best_of(lambda: [executor.run("echo hi") for _ in range(rounds)])
+    return [format_rate("ShellCodeExecutor.run echo", rounds, seconds)]
+
+
+if __name__ == "__main__":
+    main()
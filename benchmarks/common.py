@@ -0,0 +1,56 @@
+"""Small timing helpers shared by the benchmark scripts."""
+
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+__all__ = ["best_of", "format_rate", "load_results", "save_results", "compare"]
+
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Return the fastest wall-clock time of several runs of func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_rate(name: str, count: int, seconds: float, **extra: Any) -> Dict[str, Any]:
+    """Build a result record and print it as one aligned line."""
+    record = {"name": name, "count": count, "seconds": seconds, "per_second": count / seconds if seconds else 0.0}
+    record.update(extra)
+    details = " ".join(f"{k}={v}" for k, v in extra.items())
+    print(f"{name:<40} n={count:<9} {seconds * 1000:10.2f} ms {record['per_second']:14,.0f}/s {details}")
+    return record
+
+
+def save_results(path: str, records: Iterable[Dict[str, Any]]) -> None:
+    """Write result records as JSON, keyed by benchmark name."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({record["name"]: record for record in records}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(records: Iterable[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Compare throughput against a baseline.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per benchmark present in both, with
+        the throughput ratio and whether it dropped by more than threshold
+    """
+    report = []
+    for record in records:
+        base = baseline.get(record["name"])
+        if not base or not base.get("per_second"):
+            continue
+        ratio = record["per_second"] / base["per_second"]
+        report.append({"name": record["name"], "ratio": ratio, "regression": ratio < 1 - threshold})
+    return report
@@ -6,5 +6,6 @@ setup(
     packages=find_packages(),
     install_requires=[
         "litellm>=1.0.0",
+        "numpy>=1.20",
     ],
 )
@@ -1,22 +1,90 @@
-from .reflection import python_reflection_test
-from .config import DEFAULT_MODEL, global_settings
-from .interface import UserInterface, ConsoleInterface
-from .agent import Agent, AgentAssert, ConcreteAgent
-from .main import (
-    parse_xml,
-    litellm_completion,
-    litellm_streaming,
-    IsolatedEnvironment,
-    run_container
-)
-from .interface import UserInterface, ConsoleInterface
-from .tools import Tool, ShellCodeExecutor
-from .envs import Env1, Env2
-from .utils import normalize_model_name
+"""Public API of the package.
+
+Names are resolved lazily on first access so that ``import src`` stays cheap
+and code that only needs, say, ``Env1`` or ``parse_xml`` does not import the
+LLM stack. litellm itself is only imported by the first LLM call.
+"""
+
+import importlib
+from typing import Any, Dict, List
+
+_LAZY_ATTRS: Dict[str, str] = {
+    "python_reflection_test": ".reflection",
+    "DEFAULT_MODEL": ".config",
+    "global_settings": ".config",
+    "UserInterface": ".interface",
+    "ConsoleInterface": ".interface",
+    "Agent": ".agent",
+    "AgentAssert": ".agent",
+    "ConcreteAgent": ".agent",
+    "AgentServer": ".server",
+    "AgentClient": ".server",
+    "MemoryStore": ".memory",
+    "Conversation": ".conversation",
+    "parse_xml": ".main",
+    "litellm_completion": ".llm_utils",
+    "litellm_streaming": ".llm_utils",
+    "litellm_streaming_raw": ".llm_utils",
+    "StreamMetrics": ".stream_metrics",
+    "litellm_acompletion": ".llm_utils",
+    "litellm_batch_completion": ".llm_utils",
+    "litellm_abatch_completion": ".llm_utils",
+    "litellm_chat_completion": ".llm_utils",
+    "set_response_cache": ".llm_utils",
+    "set_rate_limiter": ".llm_utils",
+    "ResponseCache": ".llm_cache",
+    "RateLimiter": ".rate_limit",
+    "SingleFlight": ".single_flight",
+    "Hedger": ".hedging",
+    "ModelRouter": ".router",
+    "set_backend": ".llm_utils",
+    "RecordingBackend": ".llm_backend",
+    "ReplayBackend": ".llm_backend",
+    "register_router": ".router",
+    "StreamingXMLParser": ".xml_stream",
+    "iter_xml_fields": ".xml_stream",
+    "IsolatedEnvironment": ".isolation",
+    "run_container": ".isolation",
+    "ContainerPool": ".container_pool",
+    "ShellSession": ".shell_session",
+    "CapturedOutput": ".capture",
+    "Tool": ".tools",
+    "ShellCodeExecutor": ".tools",
+    "CommandPolicy": ".command_policy",
+    "MemoizedTool": ".tools",
+    "CachePolicy": ".tool_cache",
+    "ToolResultCache": ".tool_cache",
+    "Env1": ".envs",
+    "Env2": ".envs",
+    "EarlyStopReport": ".early_stop",
+    "run_with_early_stopping": ".early_stop",
+    "generate_with_early_stopping": ".early_stop",
+    "normalize_model_name": ".utils",
+}
 
 __all__ = [
-    "parse_xml", "Tool", "ShellCodeExecutor", "python_reflection_test",
-    "litellm_completion", "litellm_streaming", "DEFAULT_MODEL", "global_settings",
-    "IsolatedEnvironment", "run_container", "UserInterface", "ConsoleInterface",
-    "Agent", "AgentAssert", "ConcreteAgent", "Env1", "Env2", "normalize_model_name"
+    "parse_xml", "Tool", "ShellCodeExecutor", "CommandPolicy", "MemoizedTool", "CachePolicy",
+    "ToolResultCache", "python_reflection_test",
+    "litellm_completion", "litellm_streaming", "litellm_streaming_raw", "StreamMetrics", "litellm_acompletion",
+    "litellm_batch_completion", "litellm_abatch_completion", "litellm_chat_completion", "set_response_cache",
+    "set_rate_limiter", "RateLimiter", "SingleFlight", "Hedger", "ModelRouter",
+    "register_router", "set_backend", "RecordingBackend", "ReplayBackend", "ResponseCache",
+    "StreamingXMLParser", "iter_xml_fields", "DEFAULT_MODEL", "global_settings",
+    "IsolatedEnvironment", "run_container", "ContainerPool", "ShellSession", "CapturedOutput", "UserInterface", "ConsoleInterface",
+    "Agent", "AgentAssert", "ConcreteAgent", "AgentServer", "AgentClient", "MemoryStore", "Conversation",
+    "Env1", "Env2", "EarlyStopReport", "run_with_early_stopping", "generate_with_early_stopping",
+    "normalize_model_name"
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,15 +1,23 @@
-from typing import Optional
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from abc import ABC, abstractmethod
+from xml.sax.saxutils import escape
 from .config import DEFAULT_MODEL, global_settings
 from .interface import UserInterface, ConsoleInterface
-from .llm_utils import litellm_completion
+from .conversation import Conversation, estimate_tokens
+from .llm_utils import (DEFAULT_CONCURRENCY, litellm_batch_completion, litellm_chat_completion, litellm_completion,
+                        litellm_streaming, unwrap_response)
+from .memory import MemoryStore
+from .rate_limit import is_transient_error
 from .utils import normalize_model_name
+from .xml_stream import iter_xml_fields
 
 
 class Agent(ABC):
     """Abstract base class for agents."""
     
-    def __init__(self, model: str = DEFAULT_MODEL, max_tokens: int = 100, interface: Optional[UserInterface] = None):
+    def __init__(self, model: str = DEFAULT_MODEL, max_tokens: int = 100, interface: Optional[UserInterface] = None,
+                 memory_store: Optional[MemoryStore] = None, history: Optional[Conversation] = None):
         if not isinstance(model, str) or not model.strip():
             raise ValueError("model must be a non-empty string")
         if not isinstance(max_tokens, int) or max_tokens <= 0:
@@ -18,9 +26,30 @@ class Agent(ABC):
         self.model = normalize_model_name(model)
         self.max_tokens = max_tokens
         self.net_worth = global_settings['initial_net_worth']
-        self.memory = ''
+        self.memory_store = memory_store if memory_store is not None else MemoryStore()
+        self.history = history
         self.interface = interface or ConsoleInterface()
 
+    @property
+    def memory(self) -> str:
+        """Agent memory rendered for prompts; cached until the next update."""
+        return self.memory_store.render()
+
+    @memory.setter
+    def memory(self, value: str) -> None:
+        if not isinstance(value, str):
+            raise ValueError("memory must be a string")
+        self.memory_store.clear()
+        self.memory_store.update('', value)
+
+    def _update_memory(self, search: str, replace: str) -> bool:
+        """Apply a <memory><search/><replace/></memory> update from a response.
+
+        Returns:
+            bool: False if search was not found in memory
+        """
+        return self.memory_store.update(search, replace)
+
     @abstractmethod
     def __call__(self, input_text: str) -> str:
         """Process input and return response."""
@@ -33,13 +62,53 @@ class Agent(ABC):
 
 
 class ConcreteAgent(Agent):
-    """Concrete implementation of Agent using LiteLLM."""
+    """Concrete implementation of Agent using LiteLLM.
+
+    Without a history every call is a single-turn completion. With a
+    Conversation as history, each call appends the user input, sends the
+    trimmed history and appends the reply. A failed call leaves the history
+    as it was, minus anything trimmed into the summary.
+    """
     
     def __call__(self, input_text: str) -> str:
         """Process input using LLM completion."""
         if not isinstance(input_text, str) or not input_text.strip():
             raise ValueError("Input must be a non-empty string")
-        return litellm_completion(input_text, self.model, self.max_tokens)
+        if self.history is None:
+            return litellm_completion(input_text, self.model, self.max_tokens)
+
+        self.history.append("user", input_text)
+        try:
+            response = litellm_chat_completion(self.history.messages(), self.model, self.max_tokens)
+        except BaseException:
+            self.history.pop()
+            raise
+        self.history.append("assistant", unwrap_response(response))
+        return response
+
+    def stream(self, input_text: str) -> Iterator[str]:
+        """Stream the reply as unwrapped text deltas.
+
+        With a history the reply is requested as one chat completion (there
+        is no streaming chat call) and yielded whole.
+        """
+        if not isinstance(input_text, str) or not input_text.strip():
+            raise ValueError("Input must be a non-empty string")
+        if self.history is not None:
+            yield unwrap_response(self(input_text))
+            return
+        for chunk in litellm_streaming(input_text, self.model, self.max_tokens):
+            yield unwrap_response(chunk)
+
+    def stream_fields(self, input_text: str) -> Iterator[Tuple[str, str]]:
+        """Stream a completion and yield response fields as soon as each closes.
+
+        Yields:
+            Tuple[str, str]: Field path (e.g. "message", "memory/replace") and text
+        """
+        if not isinstance(input_text, str) or not input_text.strip():
+            raise ValueError("Input must be a non-empty string")
+        return iter_xml_fields(litellm_streaming(input_text, self.model, self.max_tokens))
         
     def __repr__(self) -> str:
         return f"ConcreteAgent(model={self.model}, max_tokens={self.max_tokens})"
@@ -52,8 +121,107 @@ class ConcreteAgent(Agent):
 
 
 class AgentAssert(Agent):
+    batch_instructions = (
+        "Decide for each numbered statement below whether it is true. Answer with exactly one "
+        '<item index="N"><bool>True</bool></item> or <item index="N"><bool>False</bool></item> '
+        "per statement, using the statement's index, all inside <response></response>."
+    )
+    answer_tokens = 16
+
+    _item_pattern = re.compile(r'<item\s+index="(\d+)"\s*>\s*<bool>\s*(true|false)\s*</bool>\s*</item>',
+                               re.IGNORECASE)
+
     def __repr__(self) -> str:
         return "AgentAssert()"
+
+    def judge_batch(self, statements: Sequence[str], max_prompt_tokens: int = 2000, max_items: int = 50,
+                    max_retries: int = 2, concurrency: int = DEFAULT_CONCURRENCY) -> List[bool]:
+        """Judge many statements with a few LLM requests.
+
+        Statements are packed into requests of at most max_prompt_tokens
+        (estimated) and max_items each, and answered with one indexed
+        ``<item>`` per statement. Only statements whose answer is missing or
+        unreadable, or whose request failed with a transient error (429, 5xx,
+        timeout), are sent again, up to max_retries times. Any other request
+        error is raised at once.
+
+        Args:
+            statements: Statements to judge
+            max_prompt_tokens: Token budget of the statements in one request
+            max_items: Most statements per request
+            max_retries: Rounds of re-asking for unanswered statements
+            concurrency: Requests in flight at once
+
+        Returns:
+            List[bool]: Verdict per statement, in order
+
+        Raises:
+            RuntimeError: If some statements are still unanswered after the
+                retries, chained to the last transient error if there was one
+        """
+        if isinstance(statements, str) or not all(isinstance(s, str) and s.strip() for s in statements):
+            raise ValueError("statements must be a sequence of non-empty strings")
+        if not isinstance(max_items, int) or max_items <= 0:
+            raise ValueError("max_items must be a positive integer")
+
+        verdicts: List[Optional[bool]] = [None] * len(statements)
+        pending = list(range(len(statements)))
+        last_error: Optional[Exception] = None
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            batches = self._pack(statements, pending, max_prompt_tokens, max_items)
+            prompts = [self._batch_prompt(statements, batch) for batch in batches]
+            max_tokens = max(self.max_tokens, self.answer_tokens * max(len(batch) for batch in batches) + 16)
+            # A cached answer that could not be read would come back unchanged on a retry.
+            responses = litellm_batch_completion(prompts, self.model, max_tokens, concurrency,
+                                                 use_cache=attempt == 0)
+            for batch, response in zip(batches, responses):
+                if isinstance(response, Exception):
+                    if not (is_transient_error(response) or is_transient_error(response.__cause__)):
+                        raise response
+                    last_error = response
+                    continue
+                for position, verdict in self._parse_batch(unwrap_response(response), len(batch)).items():
+                    verdicts[batch[position]] = verdict
+            pending = [i for i in pending if verdicts[i] is None]
+
+        if pending:
+            raise RuntimeError(f"No verdict for statements {pending} after {max_retries} retries") from last_error
+        return verdicts  # type: ignore[return-value]
+
+    @staticmethod
+    def _pack(statements: Sequence[str], indices: List[int], max_prompt_tokens: int,
+              max_items: int) -> List[List[int]]:
+        """Group statement indices into batches within the token and item budgets."""
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        tokens = 0
+        for i in indices:
+            cost = estimate_tokens(statements[i]) + 8
+            if batch and (tokens + cost > max_prompt_tokens or len(batch) == max_items):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(i)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _batch_prompt(self, statements: Sequence[str], batch: List[int]) -> str:
+        items = "\n".join(f'<statement index="{position}">{escape(statements[i])}</statement>'
+                          for position, i in enumerate(batch))
+        return f"{self.batch_instructions}\n<statements>\n{items}\n</statements>"
+
+    @classmethod
+    def _parse_batch(cls, response: str, size: int) -> Dict[int, bool]:
+        """Map the index of every well-formed answer in response to its verdict."""
+        verdicts: Dict[int, bool] = {}
+        for index, value in cls._item_pattern.findall(response):
+            position = int(index)
+            if position < size and position not in verdicts:
+                verdicts[position] = value.lower() == "true"
+        return verdicts
     
     def __call__(self, input_text: str) -> str:
         if not isinstance(input_text, str) or not input_text.strip():
@@ -0,0 +1,100 @@
+"""Memory-bounded capture of command output."""
+
+import mmap
+import os
+from typing import BinaryIO, Optional, Union
+
+__all__ = ["CapturedOutput", "read_bounded", "read_tail", "OVERFLOW_MODES"]
+
+OVERFLOW_MODES = ("spill", "truncate")
+
+
+class CapturedOutput:
+    """Command output captured with a limit on how much is held in memory.
+
+    Output up to the limit is held as bytes. Past the limit it is either
+    kept in its temporary file and exposed as a read-only memory map
+    (``spilled``), or reduced to its first and last bytes (``truncated``).
+    ``total_bytes`` is always the full size the command wrote.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], total_bytes: int, truncated: bool = False,
+                 tail: bytes = b"", file: Optional[BinaryIO] = None):
+        self.data = data
+        self.tail = tail
+        self.total_bytes = total_bytes
+        self.truncated = truncated
+        self._file = file
+
+    @property
+    def spilled(self) -> bool:
+        return isinstance(self.data, mmap.mmap)
+
+    @property
+    def omitted_bytes(self) -> int:
+        return self.total_bytes - len(self.data) - len(self.tail) if self.truncated else 0
+
+    def text(self, encoding: str = "utf-8") -> str:
+        """Decode the output. For spilled output this reads the whole file."""
+        head = self.data[:].decode(encoding, errors="replace")
+        if not self.truncated:
+            return head
+        tail = self.tail.decode(encoding, errors="replace")
+        return f"{head}\n... [{self.omitted_bytes} bytes truncated] ...\n{tail}"
+
+    def close(self) -> None:
+        """Release the memory map and temporary file of spilled output."""
+        if self.spilled:
+            self.data.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "CapturedOutput":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def __repr__(self) -> str:
+        return (f"CapturedOutput(total_bytes={self.total_bytes}, spilled={self.spilled}, "
+                f"truncated={self.truncated})")
+
+
+def read_bounded(file: BinaryIO, limit: int, overflow: str = "spill") -> CapturedOutput:
+    """Build a CapturedOutput from a file the output was written to.
+
+    Args:
+        file: Readable binary file holding the complete output
+        limit: Maximum number of bytes to hold in memory
+        overflow: "spill" to memory-map larger output, "truncate" to keep head and tail
+
+    Returns:
+        CapturedOutput: The captured output; owns file when spilled
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size <= limit:
+        file.seek(0)
+        data = file.read()
+        file.close()
+        return CapturedOutput(data, size)
+    if overflow == "spill":
+        return CapturedOutput(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ), size, file=file)
+
+    head_size = limit // 2
+    file.seek(0)
+    head = file.read(head_size)
+    file.seek(size - (limit - head_size))
+    tail = file.read()
+    file.close()
+    return CapturedOutput(head, size, truncated=True, tail=tail)
+
+
+def read_tail(file: BinaryIO, size: int = 4096) -> str:
+    """Return the last size bytes of a file as text, e.g. for error messages."""
+    total = os.fstat(file.fileno()).st_size
+    file.seek(max(0, total - size))
+    return file.read().decode("utf-8", errors="replace")
@@ -0,0 +1,130 @@
+"""Compiled allow/deny policy for shell commands proposed by the model."""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Mapping, Optional, Pattern
+
+__all__ = ["CommandPolicy", "DEFAULT_FORBIDDEN_CHARS"]
+
+DEFAULT_FORBIDDEN_CHARS = "\n\r\0;|&`$()><"
+
+_BLACKLISTED = object()
+
+
+class _ArgumentRule:
+    """Constraints on the arguments of one whitelisted command."""
+
+    __slots__ = ("pattern", "max_args")
+
+    def __init__(self, pattern: Optional[str] = None, max_args: Optional[int] = None):
+        if max_args is not None and (not isinstance(max_args, int) or max_args < 0):
+            raise ValueError("max_args must be a non-negative integer")
+        self.pattern: Optional[Pattern[str]] = re.compile(pattern) if pattern is not None else None
+        self.max_args = max_args
+
+    def check(self, cmd: str, args: str) -> None:
+        parts = args.split()
+        if self.max_args is not None and len(parts) > self.max_args:
+            raise ValueError(f"Command {cmd} accepts at most {self.max_args} arguments")
+        if self.pattern is not None:
+            for arg in parts:
+                if self.pattern.fullmatch(arg) is None:
+                    raise ValueError(f"Invalid argument for {cmd}: {arg}")
+
+
+class CommandPolicy:
+    """Whitelist, blacklist, forbidden characters and argument rules compiled for fast checks.
+
+    The forbidden characters become one regex character class, so a command
+    is scanned once. Every known command name maps to its decision in a
+    single dict, so one lookup both rejects blacklisted names and finds a
+    whitelisted command's argument rule. Argument rules are optional; without
+    them decisions and error messages match the original
+    ShellCodeExecutor checks exactly.
+    """
+
+    def __init__(self, whitelist: Iterable[str], blacklist: Iterable[str] = (),
+                 forbidden_chars: str = DEFAULT_FORBIDDEN_CHARS, max_length: int = 100,
+                 argument_rules: Optional[Mapping[str, Mapping[str, Any]]] = None):
+        if not isinstance(max_length, int) or max_length <= 0:
+            raise ValueError("max_length must be a positive integer")
+        if not isinstance(forbidden_chars, str):
+            raise ValueError("forbidden_chars must be a string")
+
+        self.whitelist = frozenset(whitelist)
+        self.blacklist = frozenset(blacklist)
+        self.forbidden_chars = forbidden_chars
+        self.max_length = max_length
+        self.argument_rules = {cmd: dict(rule) for cmd, rule in (argument_rules or {}).items()}
+        unknown = set(self.argument_rules) - self.whitelist
+        if unknown:
+            raise ValueError(f"argument_rules given for commands that are not whitelisted: {sorted(unknown)}")
+
+        self._forbidden = re.compile(f"[{re.escape(forbidden_chars)}]") if forbidden_chars else None
+        self._decisions: Dict[str, Any] = {cmd: None for cmd in self.whitelist}
+        for cmd, rule in self.argument_rules.items():
+            if set(rule) - {"pattern", "max_args"}:
+                raise ValueError(f"Unknown argument rule keys for {cmd}: {sorted(set(rule) - {'pattern', 'max_args'})}")
+            self._decisions[cmd] = _ArgumentRule(**rule)
+        for cmd in self.blacklist:
+            self._decisions[cmd] = _BLACKLISTED
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "CommandPolicy":
+        """Build a policy from a mapping.
+
+        Recognised keys are ``whitelist``, ``blacklist``, ``forbidden_chars``,
+        ``max_length`` and ``argument_rules``, where the latter maps a command
+        to ``{"pattern": regex, "max_args": int}``.
+        """
+        if not isinstance(config, Mapping) or "whitelist" not in config:
+            raise ValueError("config must be a mapping with a 'whitelist' key")
+        unknown = set(config) - {"whitelist", "blacklist", "forbidden_chars", "max_length", "argument_rules"}
+        if unknown:
+            raise ValueError(f"Unknown policy keys: {sorted(unknown)}")
+        return cls(**config)
+
+    @classmethod
+    def from_json(cls, path: str) -> "CommandPolicy":
+        """Load a policy from a JSON file in the from_config() format."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def validate(self, command: str) -> None:
+        """Validate a command.
+
+        Args:
+            command: The command to validate
+
+        Raises:
+            ValueError: If command is invalid
+            PermissionError: If command is blacklisted
+        """
+        if not isinstance(command, str) or not command or command.isspace():
+            raise ValueError("Command must be a non-empty string")
+        if self._forbidden is not None and self._forbidden.search(command) is not None:
+            raise ValueError(f"Command contains invalid characters: {command}")
+        if len(command) > self.max_length:
+            raise ValueError(f"Command exceeds maximum length of {self.max_length} characters")
+
+        parts = command.split(None, 1)
+        cmd = parts[0]
+        decision = self._decisions.get(cmd, False)
+        if decision is None:
+            return
+        if decision is _BLACKLISTED:
+            raise PermissionError(f"Command {cmd} is blacklisted")
+        if decision is False:
+            raise ValueError(f"Command {cmd} is not whitelisted")
+        decision.check(cmd, parts[1] if len(parts) > 1 else "")
+
+    def is_allowed(self, command: str) -> bool:
+        """Return True if validate() would accept the command."""
+        try:
+            self.validate(command)
+        except (ValueError, PermissionError):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"CommandPolicy(whitelist={sorted(self.whitelist)}, blacklist={sorted(self.blacklist)})"
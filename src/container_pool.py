@@ -0,0 +1,144 @@
+"""Pool of warm containers that run commands through ``docker exec``."""
+
+import threading
+from typing import Dict, List, Sequence
+
+from .isolation import _run_subprocess, _validate_container_args, run_container
+
+__all__ = ["ContainerPool"]
+
+
+class ContainerPool:
+    """Keeps up to ``size`` idle containers per image and reuses them.
+
+    Starting a container costs several hundred milliseconds, far more than
+    the short commands usually run in it. The pool starts containers on
+    demand with a long-running keep-alive command and sends each command
+    with ``docker exec``. A container is recycled after ``max_uses`` commands
+    or as soon as a command run in it fails. When all ``size`` containers of
+    an image are busy, :meth:`run` falls back to a one-off
+    :func:`run_container` call.
+    """
+
+    def __init__(self, size: int = 2, max_uses: int = 100, docker: str = "docker",
+                 keepalive: Sequence[str] = ("sleep", "infinity")):
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError("size must be a positive integer")
+        if not isinstance(max_uses, int) or max_uses <= 0:
+            raise ValueError("max_uses must be a positive integer")
+        if not isinstance(docker, str) or not docker.strip():
+            raise ValueError("docker must be a non-empty string")
+
+        self.size = size
+        self.max_uses = max_uses
+        self.docker = docker
+        self.keepalive = list(keepalive)
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[str]] = {}
+        self._busy: Dict[str, int] = {}
+        self._uses: Dict[str, int] = {}
+        self._closed = False
+        self.stats: Dict[str, int] = {"started": 0, "execs": 0, "recycled": 0, "fallbacks": 0}
+
+    def run(self, image: str, command: str, timeout: int = 10) -> str:
+        """Run a command in a warm container of image.
+
+        Args:
+            image: The container image to use
+            command: The command to run in the container
+            timeout: Maximum execution time in seconds
+
+        Returns:
+            str: The command output
+
+        Raises:
+            ValueError: If inputs are invalid
+            TimeoutError: If the command times out
+            RuntimeError: If execution fails
+        """
+        _validate_container_args(image, command, timeout)
+        if not command.strip():
+            raise ValueError("command must be a non-empty string")
+
+        container = self._acquire(image, timeout)
+        if container is None:
+            with self._lock:
+                self.stats["fallbacks"] += 1
+            return run_container(image, command, timeout, docker=self.docker)
+
+        healthy = False
+        try:
+            output = _run_subprocess([self.docker, "exec", container, "sh", "-c", command], timeout)
+            healthy = True
+            return output
+        finally:
+            self._release(image, container, healthy)
+
+    def close(self) -> None:
+        """Remove every idle container. Busy containers are removed on release."""
+        with self._lock:
+            self._closed = True
+            idle = [c for containers in self._idle.values() for c in containers]
+            self._idle.clear()
+            for container in idle:
+                del self._uses[container]
+        for container in idle:
+            self._remove(container)
+
+    def idle_count(self, image: str) -> int:
+        with self._lock:
+            return len(self._idle.get(image, []))
+
+    def __enter__(self) -> "ContainerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ContainerPool(size={self.size}, max_uses={self.max_uses}, docker={self.docker!r})"
+
+    def _acquire(self, image: str, timeout: int):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ContainerPool is closed")
+            idle = self._idle.get(image)
+            if idle:
+                self._busy[image] = self._busy.get(image, 0) + 1
+                return idle.pop()
+            if self._busy.get(image, 0) >= self.size:
+                return None
+            self._busy[image] = self._busy.get(image, 0) + 1
+
+        try:
+            container = _run_subprocess([self.docker, "run", "-d", "--rm", image] + self.keepalive, timeout).strip()
+        except Exception:
+            with self._lock:
+                self._busy[image] -= 1
+            raise
+        if not container:
+            with self._lock:
+                self._busy[image] -= 1
+            raise RuntimeError(f"Could not start container for image: {image}")
+        with self._lock:
+            self.stats["started"] += 1
+            self._uses[container] = 0
+        return container
+
+    def _release(self, image: str, container: str, healthy: bool) -> None:
+        with self._lock:
+            self._busy[image] -= 1
+            self.stats["execs"] += 1
+            self._uses[container] += 1
+            if healthy and not self._closed and self._uses[container] < self.max_uses:
+                self._idle.setdefault(image, []).append(container)
+                return
+            del self._uses[container]
+            self.stats["recycled"] += 1
+        self._remove(container)
+
+    def _remove(self, container: str) -> None:
+        try:
+            _run_subprocess([self.docker, "rm", "-f", container], 10)
+        except (RuntimeError, TimeoutError):
+            pass
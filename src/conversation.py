@@ -0,0 +1,136 @@
+"""Multi-turn conversation history trimmed to a token budget."""
+
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+__all__ = ["Conversation", "estimate_tokens"]
+
+Message = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate of roughly four characters per token."""
+    return len(text) // 4 + 1
+
+
+class Conversation:
+    """Chat history whose token count is maintained incrementally.
+
+    Each message is counted once, when it is appended. Appending then trims
+    the oldest messages until the history fits ``max_tokens`` again, so the
+    cost of a turn depends on the new messages rather than on the whole
+    history. If a ``summarizer`` is given, dropped messages are folded into a
+    running summary that is sent as the first (system) message instead of
+    being discarded. The summary gets at most ``summary_tokens`` of the
+    budget and is cut to fit if the summarizer returns more.
+
+    Args:
+        max_tokens: Token budget of the history, including the summary
+        token_counter: Function counting tokens of a message's content
+        summarizer: Called as ``summarizer(previous_summary, dropped_messages)``
+            and returns the new summary text
+        summary_tokens: Part of the budget reserved for the summary
+    """
+
+    message_overhead = 4
+    summary_prefix = "Summary of the earlier conversation: "
+
+    def __init__(self, max_tokens: int = 4096, token_counter: Callable[[str], int] = estimate_tokens,
+                 summarizer: Optional[Callable[[str, List[Message]], str]] = None,
+                 summary_tokens: Optional[int] = None):
+        if not isinstance(max_tokens, int) or max_tokens <= 0:
+            raise ValueError("max_tokens must be a positive integer")
+        if summary_tokens is None:
+            summary_tokens = max_tokens // 4 if summarizer is not None else 0
+        if not isinstance(summary_tokens, int) or not 0 <= summary_tokens < max_tokens:
+            raise ValueError("summary_tokens must be a non-negative integer below max_tokens")
+
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.summarizer = summarizer
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self._summary_count = 0
+        self._messages: Deque[Tuple[Message, int]] = deque()
+        self._tokens = 0
+        self.dropped = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of the messages plus the summary."""
+        return self._tokens + self._summary_count
+
+    def append(self, role: str, content: str) -> int:
+        """Append a message and trim the history to the budget.
+
+        Returns:
+            int: Token count of the appended message
+        """
+        if not isinstance(role, str) or not role.strip():
+            raise ValueError("role must be a non-empty string")
+        if not isinstance(content, str):
+            raise ValueError("content must be a string")
+        tokens = self.token_counter(content) + self.message_overhead
+        self._messages.append(({"role": role, "content": content}, tokens))
+        self._tokens += tokens
+        self._trim()
+        return tokens
+
+    def pop(self) -> Message:
+        """Remove and return the newest message, e.g. a turn that got no reply.
+
+        Messages already trimmed into the summary stay there.
+        """
+        if not self._messages:
+            raise IndexError("pop from an empty conversation")
+        message, tokens = self._messages.pop()
+        self._tokens -= tokens
+        return message
+
+    def messages(self) -> List[Message]:
+        """Return the messages to send, with the summary first if there is one."""
+        messages = [message for message, _ in self._messages]
+        if self.summary:
+            messages.insert(0, {"role": "system", "content": self.summary_prefix + self.summary})
+        return messages
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._tokens = 0
+        self.summary = ""
+        self._summary_count = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __repr__(self) -> str:
+        return f"Conversation(messages={len(self._messages)}, tokens={self.total_tokens}, max_tokens={self.max_tokens})"
+
+    def _trim(self) -> None:
+        budget = self.max_tokens - (self.summary_tokens if self.summarizer is not None else 0)
+        dropped: List[Message] = []
+        while self._tokens > budget and len(self._messages) > 1:
+            message, tokens = self._messages.popleft()
+            self._tokens -= tokens
+            dropped.append(message)
+        self.dropped += len(dropped)
+        if dropped and self.summarizer is not None:
+            self.summary = self._fit_summary(self.summarizer(self.summary, dropped))
+            self._summary_count = self._count_summary(self.summary) if self.summary else 0
+
+    def _count_summary(self, summary: str) -> int:
+        return self.token_counter(summary) + self.message_overhead
+
+    def _fit_summary(self, summary: str) -> str:
+        """Return the longest prefix of summary that fits summary_tokens."""
+        if not summary or self._count_summary(summary) <= self.summary_tokens:
+            return summary
+        low, high = 0, len(summary) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._count_summary(summary[:middle]) <= self.summary_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return summary[:low]
@@ -0,0 +1,74 @@
+"""Streaming generation that stops as soon as an incremental reward says so."""
+
+from typing import Any, Iterator, Optional
+
+from .envs import IncrementalReward
+
+__all__ = ["EarlyStopReport", "run_with_early_stopping", "generate_with_early_stopping"]
+
+
+class EarlyStopReport:
+    """Outcome of a generation driven by an incremental reward.
+
+    Tokens are counted as streamed chunks, which is what the provider sends
+    per token for the usual models; ``tokens_saved`` is the part of the
+    ``max_tokens`` budget that was not generated.
+    """
+
+    __slots__ = ("text", "reward", "stopped", "reason", "generated_tokens", "max_tokens")
+
+    def __init__(self, text: str, reward: int, stopped: bool, reason: Optional[str],
+                 generated_tokens: int, max_tokens: int):
+        self.text = text
+        self.reward = reward
+        self.stopped = stopped
+        self.reason = reason
+        self.generated_tokens = generated_tokens
+        self.max_tokens = max_tokens
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.max_tokens - self.generated_tokens) if self.stopped else 0
+
+    def __repr__(self) -> str:
+        return (f"EarlyStopReport(reward={self.reward}, stopped={self.stopped}, reason={self.reason!r}, "
+                f"generated_tokens={self.generated_tokens}, tokens_saved={self.tokens_saved})")
+
+
+def run_with_early_stopping(chunks: Iterator[str], evaluator: IncrementalReward, max_tokens: int) -> EarlyStopReport:
+    """Feed chunks to evaluator until it asks to stop, then close the stream.
+
+    Closing the iterator propagates down to the provider connection, so a
+    stopped generation is not paid for beyond the chunks already received.
+
+    Args:
+        chunks: Text deltas of a generation, e.g. from litellm_streaming_raw
+        evaluator: Incremental reward, e.g. from Env1.incremental()
+        max_tokens: Token budget of the generation, to report what was saved
+    """
+    evaluator.reset()
+    parts = []
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            parts.append(chunk)
+            if evaluator.update(chunk):
+                break
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    return EarlyStopReport("".join(parts), evaluator.reward, evaluator.stopped, evaluator.stop_reason,
+                           evaluator.chunks, max_tokens)
+
+
+def generate_with_early_stopping(prompt: str, model: str, evaluator: IncrementalReward, max_tokens: int = 100,
+                                 **stream_kwargs: Any) -> EarlyStopReport:
+    """Stream a completion of prompt and stop once evaluator says more cannot help.
+
+    Other keyword arguments go to litellm_streaming_raw. A stopped
+    generation is never cached, since only completed streams are.
+    """
+    from .llm_utils import litellm_streaming_raw  # pylint: disable=import-outside-toplevel
+    return run_with_early_stopping(litellm_streaming_raw(prompt, model, max_tokens, **stream_kwargs),
+                                   evaluator, max_tokens)
@@ -1,3 +1,138 @@
+from abc import ABC, abstractmethod
+from itertools import repeat
+from typing import Any, List, Optional, Sequence
+
+
+def _as_strings(strings: Sequence[Any]) -> List[str]:
+    """Replace non-string items by empty strings, which every env scores as 0."""
+    return [s if isinstance(s, str) else "" for s in strings]
+
+
+def _lengths(strings: Sequence[str]):
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    return np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+
+
+def _count_in_batch(strings: Sequence[Any], char: str):
+    """Count occurrences of char in every string of a batch, non-strings counting 0.
+
+    str.count is mapped over the batch from C, so no Python frame runs per
+    item, and NumPy only collects the counts. Joining and encoding the batch
+    for one vectorised comparison was slower, as it copies every string
+    twice and needs a search to map matches back to items.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    if not isinstance(strings, (list, tuple)):
+        strings = list(strings)
+    try:
+        return np.fromiter(map(str.count, strings, repeat(char)), dtype=np.int64, count=len(strings))
+    except TypeError:  # a non-string item; retry with those replaced
+        strings = _as_strings(strings)
+        return np.fromiter(map(str.count, strings, repeat(char)), dtype=np.int64, count=len(strings))
+
+
+class IncrementalReward(ABC):
+    """Reward of a generation kept up to date as its chunks arrive.
+
+    update() costs O(len(chunk)) and returns True once the env's stopping
+    threshold is crossed (see the subclasses) or, with ``patience``, after
+    that many consecutive chunks scoring below the best reward seen so far.
+    Stopping is a heuristic: a later chunk could still raise the reward.
+    """
+
+    def __init__(self, patience: Optional[int] = None):
+        if patience is not None and (not isinstance(patience, int) or patience <= 0):
+            raise ValueError("patience must be a positive integer or None")
+        self.patience = patience
+        self.reset()
+
+    def reset(self) -> None:
+        self.reward = 0
+        self.best_reward = 0
+        self.chunks = 0
+        self.chars = 0
+        self.stop_reason: Optional[str] = None
+        self._worse = 0
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_reason is not None
+
+    def update(self, chunk: str) -> bool:
+        """Account for one chunk and return whether generation should stop."""
+        self.chunks += 1
+        self.chars += len(chunk)
+        self.reward = self._advance(chunk)
+        if self.reward >= self.best_reward:
+            self.best_reward = self.reward
+            self._worse = 0
+        else:
+            self._worse += 1
+        if self.stop_reason is None:
+            self.stop_reason = self._stop_reason()
+        if self.stop_reason is None and self.patience is not None and self._worse >= self.patience:
+            self.stop_reason = f"reward below its best for {self._worse} chunks"
+        return self.stop_reason is not None
+
+    @abstractmethod
+    def _advance(self, chunk: str) -> int:
+        """Account for chunk and return the reward of the text so far."""
+
+    def _stop_reason(self) -> Optional[str]:
+        return None
+
+
+class Env1Reward(IncrementalReward):
+    """Incremental Env1 score: a running count of the target character.
+
+    With ``stop_on_penalty`` generation stops as soon as the count passes
+    ``char_count_penalty_start``, where the reward drops from the start
+    value to 1. More target characters raise it again (it is
+    ``count - start`` from there), so this stops at the drop rather than
+    at the best reachable reward.
+    """
+
+    def __init__(self, env: "Env1", stop_on_penalty: bool = True, patience: Optional[int] = None):
+        self.env = env
+        self.stop_on_penalty = stop_on_penalty
+        self.count = 0
+        super().__init__(patience)
+
+    def reset(self) -> None:
+        super().reset()
+        self.count = 0
+
+    def _advance(self, chunk: str) -> int:
+        self.count += chunk.count(self.env.target_char)
+        start = self.env.char_count_penalty_start
+        return self.count - start if self.count > start else self.count
+
+    def _stop_reason(self) -> Optional[str]:
+        if self.stop_on_penalty and self.count > self.env.char_count_penalty_start:
+            return f"{self.env.target_char!r} count passed {self.env.char_count_penalty_start}"
+        return None
+
+
+class Env2Reward(IncrementalReward):
+    """Incremental Env2 score: a running length.
+
+    The score is final once the length passes ``max_char_count``, so
+    generation stops there.
+    """
+
+    def __init__(self, env: "Env2", patience: Optional[int] = None):
+        self.env = env
+        super().__init__(patience)
+
+    def _advance(self, chunk: str) -> int:
+        return 1 if self.chars > self.env.max_char_count else 0
+
+    def _stop_reason(self) -> Optional[str]:
+        if self.chars > self.env.max_char_count:
+            return f"length passed {self.env.max_char_count}"
+        return None
+
 
 class Env1:
     """Environment that counts target characters with penalty after threshold."""
@@ -23,6 +158,25 @@ class Env1:
             return max(0, penalty)  # Ensure non-negative return
         return count
 
+    def score_batch(self, input_strings: Sequence[Any]):
+        """Score many strings at once.
+
+        Args:
+            input_strings: Strings to evaluate
+
+        Returns:
+            numpy.ndarray: int64 scores, identical to calling the env per item
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        counts = _count_in_batch(input_strings, self.target_char)
+        start = self.char_count_penalty_start
+        return np.where(counts > start, counts - start, counts)
+
+    def incremental(self, stop_on_penalty: bool = True, patience: Optional[int] = None) -> Env1Reward:
+        """Return an evaluator scoring a streamed generation chunk by chunk."""
+        return Env1Reward(self, stop_on_penalty, patience)
+
     def __repr__(self) -> str:
         return f"Env1(target_char={self.target_char!r}, char_count_penalty_start={self.char_count_penalty_start})"
 
@@ -51,4 +205,20 @@ class Env2:
             return 1
         return 0
 
+    def score_batch(self, input_strings: Sequence[Any]):
+        """Score many strings at once.
+
+        Args:
+            input_strings: Strings to evaluate
+
+        Returns:
+            numpy.ndarray: int64 scores, identical to calling the env per item
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        lengths = _lengths(_as_strings(input_strings))
+        return (lengths > self.max_char_count).astype(np.int64)
 
+    def incremental(self, patience: Optional[int] = None) -> Env2Reward:
+        """Return an evaluator scoring a streamed generation chunk by chunk."""
+        return Env2Reward(self, patience)
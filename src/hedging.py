@@ -0,0 +1,227 @@
+"""Hedged LLM requests: race a backup against a slow primary."""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .utils import normalize_model_name
+
+__all__ = ["Hedger", "HedgeOutcome", "attempt_cancelled", "AttemptCancelled"]
+
+T = TypeVar("T")
+
+_EXHAUSTED = object()
+
+_attempt = threading.local()
+
+
+def attempt_cancelled() -> bool:
+    """Whether the calling thread runs a hedged stream attempt that already lost its race.
+
+    Stream sources check it between upstream chunks and raise
+    AttemptCancelled, so a losing attempt that is still waiting for its
+    first chunk stops without yielding one.
+    """
+    cancelled = getattr(_attempt, "cancelled", None)
+    return cancelled is not None and cancelled.is_set()
+
+
+class AttemptCancelled(BaseException):
+    """Raised by a stream source when attempt_cancelled() reports a lost race.
+
+    A losing attempt must not end like a finished stream, or the chunks it
+    got so far would be cached and recorded as the complete response. Like
+    asyncio.CancelledError it is not an Exception, so error translation and
+    router failover let it pass to the Hedger, which discards the attempt.
+    """
+
+
+def _close(iterator: Iterator) -> None:
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
+
+
+class HedgeOutcome:
+    """Which request of a hedged call won, and how long the call took."""
+
+    __slots__ = ("model", "winner", "hedged", "latency")
+
+    def __init__(self, model: str, winner: str, hedged: bool, latency: float):
+        self.model = model
+        self.winner = winner
+        self.hedged = hedged
+        self.latency = latency
+
+    def __repr__(self) -> str:
+        return (f"HedgeOutcome(model={self.model!r}, winner={self.winner!r}, hedged={self.hedged}, "
+                f"latency={self.latency:.3f})")
+
+
+class Hedger:
+    """Fire a backup request when the primary is slower than usual and keep the first to finish.
+
+    The hedge delay is the ``percentile`` of the latencies observed for the
+    primary model (time to the full response for completions, to the first
+    chunk for streams), or ``initial_delay`` until ``min_samples`` have been
+    seen. The backup goes to ``fallback_model`` or, without one, to the same
+    model. A primary that fails before the delay triggers the backup at once.
+
+    The losing stream is closed as soon as the winner's first chunk
+    arrives, even if it has not produced a chunk yet. A generator running
+    in its worker thread cannot be closed from outside; instead the race
+    is signalled to it through attempt_cancelled(), which the litellm
+    backend checks on every upstream chunk, including the empty ones sent
+    before content; it then raises AttemptCancelled and is closed. A losing
+    completion cannot be interrupted mid-request, so it runs to the end in
+    the background and its result is discarded.
+
+    Args:
+        percentile: Percentile of past latencies after which to hedge
+        fallback_model: Model of the backup request
+        initial_delay: Hedge delay before enough latencies are known
+        min_delay: Lower bound of the hedge delay
+        max_delay: Upper bound of the hedge delay
+        min_samples: Latencies needed before the percentile is used
+        window: Number of recent latencies kept per model
+    """
+
+    def __init__(self, percentile: float = 95.0, fallback_model: Optional[str] = None,
+                 initial_delay: float = 1.0, min_delay: float = 0.0, max_delay: Optional[float] = None,
+                 min_samples: int = 20, window: int = 256, max_workers: int = 32,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100]")
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError("window must be a positive integer")
+        self.percentile = percentile
+        self.fallback_model = normalize_model_name(fallback_model) if fallback_model else None
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats: Dict[str, int] = {"requests": 0, "hedged": 0, "primary_wins": 0, "backup_wins": 0}
+
+    @property
+    def last_outcome(self) -> Optional[HedgeOutcome]:
+        """Outcome of the calling thread's last hedged request."""
+        return getattr(self._local, "outcome", None)
+
+    def delay(self, model: str, kind: str = "completion") -> float:
+        """Return how long to wait on a request to model before hedging it."""
+        with self._lock:
+            samples = sorted(self._latencies.get((model, kind), ()))
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = samples[max(0, math.ceil(self.percentile / 100 * len(samples)) - 1)]  # nearest rank
+        delay = max(self.min_delay, delay)
+        return min(self.max_delay, delay) if self.max_delay is not None else delay
+
+    def record(self, model: str, latency: float, kind: str = "completion") -> None:
+        """Add an observed latency of model to the distribution the delay is taken from."""
+        with self._lock:
+            samples = self._latencies.get((model, kind))
+            if samples is None:
+                samples = self._latencies[(model, kind)] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def complete(self, model: str, request: Callable[[str], T]) -> T:
+        """Return request(model), hedged by request(backup model) if it is slow."""
+        def attempt(name: str) -> T:
+            start = self._clock()
+            result = request(name)
+            self.record(name, self._clock() - start, "completion")
+            return result
+
+        return self._race(model, "completion", attempt, lambda result: None)
+
+    def stream(self, model: str, open_stream: Callable[[str], Iterator[T]]) -> Iterator[T]:
+        """Iterate open_stream(model), hedged on the time to its first chunk."""
+        opened: List[Iterator[T]] = []
+        settled = threading.Event()
+        lock = threading.Lock()
+
+        def attempt(name: str) -> Tuple[object, Iterator[T]]:
+            start = self._clock()
+            iterator = iter(open_stream(name))
+            with lock:
+                opened.append(iterator)
+            if settled.is_set():
+                return _EXHAUSTED, iterator
+            _attempt.cancelled = settled
+            try:
+                first = next(iterator, _EXHAUSTED)
+            except AttemptCancelled:
+                return _EXHAUSTED, iterator
+            finally:
+                _attempt.cancelled = None
+            if not settled.is_set():
+                self.record(name, self._clock() - start, "first_chunk")
+            return first, iterator
+
+        first, iterator = self._race(model, "first_chunk", attempt, lambda result: _close(result[1]))
+        settled.set()
+        with lock:
+            losers = [other for other in opened if other is not iterator]
+        for loser in losers:
+            try:
+                _close(loser)
+            except ValueError:  # a generator running in its worker; stops at its next attempt_cancelled() check
+                pass
+        try:
+            if first is not _EXHAUSTED:
+                yield first
+                yield from iterator
+        finally:
+            _close(iterator)
+
+    def close(self) -> None:
+        """Stop the worker threads once running requests are done."""
+        self._executor.shutdown(wait=False)
+
+    def __repr__(self) -> str:
+        return f"Hedger(percentile={self.percentile}, fallback_model={self.fallback_model!r})"
+
+    def _race(self, model: str, kind: str, attempt: Callable[[str], T], discard: Callable[[T], None]) -> T:
+        start = self._clock()
+        primary = self._executor.submit(attempt, model)
+        roles: Dict[Future, str] = {primary: "primary"}
+        done, _ = wait([primary], timeout=self.delay(model, kind))
+        if not done or primary.exception() is not None:
+            roles[self._executor.submit(attempt, self.fallback_model or model)] = "backup"
+
+        errors: List[BaseException] = []
+        pending = set(roles)
+        winner: Optional[Future] = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                errors.append(future.exception())
+        for future in (set(roles) - {winner}):
+            if not future.cancel():
+                future.add_done_callback(lambda f: discard(f.result()) if f.exception() is None else None)
+
+        hedged = len(roles) > 1
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["hedged"] += hedged
+            if winner is not None:
+                self.stats[f"{roles[winner]}_wins"] += 1
+        if winner is None:
+            raise errors[0]
+        self._local.outcome = HedgeOutcome(model if roles[winner] == "primary" else self.fallback_model or model,
+                                           roles[winner], hedged, self._clock() - start)
+        return winner.result()
@@ -1,8 +1,56 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, TextIO
 if TYPE_CHECKING:
     from .agent import Agent
 
+
+class _CoalescingWriter:
+    """Collect text and write it out at most once per interval.
+
+    Text that has waited an interval is written by a timer, so a pause in the
+    stream does not keep what already arrived off screen. The timer runs on
+    real time whatever clock is given.
+    """
+
+    def __init__(self, out: TextIO, interval: float, clock: Callable[[], float]):
+        self.out = out
+        self.interval = interval
+        self.writes = 0
+        self._clock = clock
+        self._buffer: List[str] = []
+        self._last = clock()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self._buffer.append(text)
+            if self._clock() - self._last >= self.interval:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            self.out.write("".join(self._buffer))
+            self.out.flush()
+            self._buffer.clear()
+            self.writes += 1
+        self._last = self._clock()
+
+
 class UserInterface:
     """Concrete implementation of user interface."""
     
@@ -40,11 +88,23 @@ class UserInterface:
         return f"{self.__class__.__name__}()"
 
 class ConsoleInterface(UserInterface):
-    """Concrete implementation of UserInterface for console interaction."""
+    """Concrete implementation of UserInterface for console interaction.
+
+    With streaming=True, replies of agents that can stream are printed as they
+    are generated. Text is buffered and written to the terminal at most once
+    per flush_interval seconds, and each turn ends with its time to first
+    token and tokens per second (counting one streamed chunk as one token).
+    """
     
-    def __init__(self):
+    def __init__(self, streaming: bool = False, flush_interval: float = 0.05, output: Optional[TextIO] = None,
+                 clock: Callable[[], float] = time.monotonic):
         super().__init__()
         self.running = False
+        self.streaming = streaming
+        self.flush_interval = flush_interval
+        self.output = output
+        self.last_stream_stats: Optional[Dict[str, float]] = None
+        self._clock = clock
         
     def display_message(self, message: str) -> None:
         print(f"Agent: {message}")
@@ -63,7 +123,42 @@ class ConsoleInterface(UserInterface):
                 if user_input.lower() in ('exit', 'quit'):
                     self.running = False
                     break
+                if self.streaming and hasattr(agent, "stream"):
+                    self.stream_response(agent, user_input)
+                    continue
                 response = agent(user_input)
                 self.display_message(response)
             except Exception as e:
                 self.display_error(str(e))
+
+    def stream_response(self, agent: 'Agent', user_input: str) -> Dict[str, float]:
+        """Print the agent's streamed reply as it arrives and return the turn's timings."""
+        out = self.output if self.output is not None else sys.stdout
+        writer = _CoalescingWriter(out, self.flush_interval, self._clock)
+        start = self._clock()
+        first = None
+        tokens = 0
+        writer.write("Agent: ")
+        try:
+            for text in agent.stream(user_input):
+                if not text:
+                    continue
+                if first is None:
+                    first = self._clock() - start
+                tokens += 1
+                writer.write(text)
+        finally:
+            writer.write("\n")
+            writer.flush()
+        elapsed = self._clock() - start
+        generating = elapsed - (first or 0.0)
+        stats = {
+            "time_to_first_token": first if first is not None else elapsed,
+            "tokens": tokens,
+            "tokens_per_second": tokens / generating if generating > 0 else 0.0,
+            "writes": writer.writes,
+        }
+        self.last_stream_stats = stats
+        out.write(f"[first token {stats['time_to_first_token'] * 1000:.0f} ms, "
+                  f"{stats['tokens_per_second']:.1f} tokens/s]\n")
+        return stats
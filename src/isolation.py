@@ -1,21 +1,32 @@
 import subprocess
+import tempfile
+from typing import Optional, Union
+from .capture import OVERFLOW_MODES, CapturedOutput, read_bounded, read_tail
+from .shell_session import ShellSession
 
-def _run_subprocess(cmd, timeout: int, shell: bool = False) -> str:
-    """Helper function to run subprocess commands with consistent error handling."""
+def _run_subprocess(cmd, timeout: int, shell: bool = False, max_output_bytes: Optional[int] = None,
+                    overflow: str = "spill") -> Union[str, CapturedOutput]:
     """Helper function to run subprocess commands with consistent error handling.
     
     Args:
         cmd: Command to execute as list of strings
         timeout: Maximum execution time in seconds
         shell: Whether to use shell execution
+        max_output_bytes: If set, capture output through a temporary file and
+            hold at most this many bytes of it in memory
+        overflow: What to do with output past max_output_bytes: "spill" to
+            return it memory-mapped, "truncate" to keep only head and tail
         
     Returns:
-        str: Command output
+        Union[str, CapturedOutput]: Command output, as CapturedOutput when
+        max_output_bytes is set
         
     Raises:
         TimeoutError: If command times out
         RuntimeError: If command fails or other error occurs
     """
+    if max_output_bytes is not None:
+        return _run_bounded(cmd, timeout, shell, max_output_bytes, overflow)
     try:
         result = subprocess.run(
             cmd,
@@ -36,16 +47,53 @@ def _run_subprocess(cmd, timeout: int, shell: bool = False) -> str:
     except Exception as e:
         raise RuntimeError(f"Error executing command: {str(e)}") from e
 
-def run_container(image: str, command: str = '', timeout: int = 10) -> str:
+def _validate_capture_args(max_output_bytes: Optional[int], overflow: str) -> None:
+    if max_output_bytes is not None and (not isinstance(max_output_bytes, int) or max_output_bytes <= 0):
+        raise ValueError("max_output_bytes must be a positive integer or None")
+    if overflow not in OVERFLOW_MODES:
+        raise ValueError(f"overflow must be one of {OVERFLOW_MODES}")
+
+def _run_bounded(cmd, timeout: int, shell: bool, max_output_bytes: int, overflow: str) -> CapturedOutput:
+    """Run a command with stdout and stderr written straight to temporary files.
+
+    The child writes to the files directly, so nothing is buffered in this
+    process however much it prints.
+    """
+    _validate_capture_args(max_output_bytes, overflow)
+    stdout_file = tempfile.TemporaryFile()
+    try:
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                result = subprocess.run(cmd, shell=shell, stdout=stdout_file, stderr=stderr_file, timeout=timeout)
+            except subprocess.TimeoutExpired as e:
+                raise TimeoutError(f"Command timed out after {timeout} seconds") from e
+            except FileNotFoundError as e:
+                raise RuntimeError(f"Command not found: {cmd[0]}") from e
+            except Exception as e:
+                raise RuntimeError(f"Error executing command: {str(e)}") from e
+            if result.returncode != 0:
+                error_msg = read_tail(stderr_file).strip() or "Unknown error"
+                raise RuntimeError(f"Command failed: {error_msg}")
+        return read_bounded(stdout_file, max_output_bytes, overflow)
+    except BaseException:
+        stdout_file.close()
+        raise
+
+def run_container(image: str, command: str = '', timeout: int = 10, docker: str = "docker",
+                  max_output_bytes: Optional[int] = None, overflow: str = "spill") -> Union[str, CapturedOutput]:
     """Run a command in a container and return the output.
     
     Args:
         image: The container image to use
         command: The command to run in the container
         timeout: Maximum execution time in seconds
+        docker: Path or name of the docker binary
+        max_output_bytes: Memory limit for captured output (see _run_subprocess)
+        overflow: "spill" or "truncate" output past max_output_bytes
         
     Returns:
-        str: The command output
+        Union[str, CapturedOutput]: The command output, as CapturedOutput
+        when max_output_bytes is set
         
     Raises:
         ValueError: If inputs are invalid
@@ -56,11 +104,11 @@ def run_container(image: str, command: str = '', timeout: int = 10) -> str:
     except ValueError as e:
         raise ValueError(f"Invalid container arguments: {e}") from e
         
-    docker_cmd = ["docker", "run", "--rm", image]
+    docker_cmd = [docker, "run", "--rm", image]
     if command.strip():  # Only add command if not empty
         docker_cmd += ["sh", "-c", command]
         
-    return _run_subprocess(docker_cmd, timeout)
+    return _run_subprocess(docker_cmd, timeout, max_output_bytes=max_output_bytes, overflow=overflow)
 
 def _validate_container_args(image: str, command: str, timeout: int) -> None:
     """Validate container execution arguments."""
@@ -76,21 +124,36 @@ def _validate_container_args(image: str, command: str, timeout: int) -> None:
 
 
 class IsolatedEnvironment:
-    """Provides an isolated execution environment."""
+    """Provides an isolated execution environment.
+
+    With ``session=True`` commands run in one long-lived shell
+    (:class:`ShellSession`) instead of a fresh ``/bin/sh -c`` per command, so
+    shell state such as the working directory carries over between calls.
+
+    With ``max_output_bytes`` set, output goes to temporary files and
+    execute() returns a :class:`CapturedOutput` that holds at most that many
+    bytes in memory, spilling or truncating the rest.
+    """
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, session: bool = False,
+                 max_output_bytes: Optional[int] = None, overflow: str = "spill"):
         if not isinstance(timeout, int) or timeout <= 0:
             raise ValueError("timeout must be a positive integer")
+        _validate_capture_args(max_output_bytes, overflow)
         self.timeout = timeout
+        self.session = ShellSession() if session else None
+        self.max_output_bytes = max_output_bytes
+        self.overflow = overflow
         
-    def execute(self, command: str) -> str:
+    def execute(self, command: str) -> Union[str, CapturedOutput]:
         """Execute a command in isolation.
         
         Args:
             command: The command to execute
             
         Returns:
-            str: The command output
+            Union[str, CapturedOutput]: The command output, as CapturedOutput
+            when max_output_bytes is set
             
         Raises:
             ValueError: If command is invalid
@@ -98,4 +161,28 @@ class IsolatedEnvironment:
         """
         if not isinstance(command, str) or not command.strip():
             raise ValueError("command must be a non-empty string")
-        return _run_subprocess(["/bin/sh", "-c", command], self.timeout)
+        if self.session is not None and self.max_output_bytes is not None:
+            return self._execute_bounded_in_session(command)
+        if self.session is not None:
+            return self.session.execute(command, self.timeout)
+        return _run_subprocess(["/bin/sh", "-c", command], self.timeout,
+                               max_output_bytes=self.max_output_bytes, overflow=self.overflow)
+
+    def _execute_bounded_in_session(self, command: str) -> CapturedOutput:
+        stdout_file = tempfile.NamedTemporaryFile()
+        try:
+            with tempfile.NamedTemporaryFile() as stderr_file:
+                status, _, _ = self.session.run(command, self.timeout,
+                                                stdout_path=stdout_file.name, stderr_path=stderr_file.name)
+                if status != 0:
+                    error_msg = read_tail(stderr_file).strip() or "Unknown error"
+                    raise RuntimeError(f"Command failed: {error_msg}")
+            return read_bounded(stdout_file, self.max_output_bytes, self.overflow)
+        except BaseException:
+            stdout_file.close()
+            raise
+
+    def close(self) -> None:
+        """Stop the persistent shell, if session mode is enabled."""
+        if self.session is not None:
+            self.session.close()
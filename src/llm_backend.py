@@ -0,0 +1,171 @@
+"""Pluggable transport under the LLM wrappers, with record and replay modes."""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Protocol, runtime_checkable
+
+from .hedging import AttemptCancelled, attempt_cancelled
+from .llm_cache import ResponseCache
+
+__all__ = ["LLMBackend", "LiteLLMBackend", "RecordingBackend", "ReplayBackend"]
+
+Messages = List[Dict[str, str]]
+
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """Where completions come from: the raw content, without any wrapping."""
+
+    def complete(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> str:
+        ...
+
+    def stream(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> Iterator[str]:
+        ...
+
+
+class LiteLLMBackend:
+    """Call the provider through litellm.completion."""
+
+    def complete(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> str:
+        import litellm  # pylint: disable=import-outside-toplevel
+        response = litellm.completion(model=model, messages=messages, max_tokens=max_tokens,
+                                      temperature=temperature)
+        return response.choices[0].message.content
+
+    def stream(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> Iterator[str]:
+        import litellm  # pylint: disable=import-outside-toplevel
+        response = litellm.completion(model=model, messages=messages, max_tokens=max_tokens,
+                                      temperature=temperature, stream=True)
+        try:
+            for chunk in response:
+                if attempt_cancelled():
+                    raise AttemptCancelled()
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        finally:
+            _close_stream(response)
+
+    def __repr__(self) -> str:
+        return "LiteLLMBackend()"
+
+
+def _close_stream(response) -> None:
+    """Release the connection of a stream that is abandoned before its end."""
+    close = getattr(response, "close", None)
+    if close is None:
+        close = getattr(getattr(response, "completion_stream", None), "close", None)
+    if close is not None:
+        close()
+
+
+class RecordingBackend:
+    """Pass requests to another backend and append every answer to a cassette.
+
+    The cassette is a JSON-lines file with one interaction per line: the
+    request key, the content (or the chunks of a stream) and the timings,
+    i.e. the latency of a completion or the delay before each chunk. Only
+    completed requests are recorded.
+    """
+
+    def __init__(self, path: str, backend: Optional[LLMBackend] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.backend = backend if backend is not None else LiteLLMBackend()
+        self.recorded = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def complete(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> str:
+        start = self._clock()
+        content = self.backend.complete(model, messages, max_tokens, temperature)
+        self._write({"key": ResponseCache.make_key(model, messages, max_tokens, temperature),
+                     "model": model, "content": content, "latency": round(self._clock() - start, 6)})
+        return content
+
+    def stream(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> Iterator[str]:
+        chunks: List[str] = []
+        delays: List[float] = []
+        last = self._clock()
+        for chunk in self.backend.stream(model, messages, max_tokens, temperature):
+            now = self._clock()
+            chunks.append(chunk)
+            delays.append(round(now - last, 6))
+            last = now
+            yield chunk
+        self._write({"key": ResponseCache.make_key(model, messages, max_tokens, temperature, True),
+                     "model": model, "chunks": chunks, "delays": delays})
+
+    def __repr__(self) -> str:
+        return f"RecordingBackend(path={self.path!r}, recorded={self.recorded})"
+
+    def _write(self, entry: Dict) -> None:
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+
+class ReplayBackend:
+    """Serve the answers of a cassette written by RecordingBackend.
+
+    Requests are matched on model, messages, max_tokens, temperature and
+    whether they stream. A request recorded several times gets the
+    recordings in turn. With ``speed`` set, recorded latencies and
+    inter-chunk delays are reproduced, divided by speed; without it answers
+    are served as fast as possible.
+
+    Raises:
+        LookupError: For a request that is not in the cassette
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = None, sleep: Callable[[float], None] = time.sleep):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None")
+        self.path = path
+        self.speed = speed
+        self.served = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._next: Dict[str, int] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def complete(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> str:
+        entry = self._lookup(ResponseCache.make_key(model, messages, max_tokens, temperature), model)
+        self._wait(entry.get("latency", 0.0))
+        return entry["content"]
+
+    def stream(self, model: str, messages: Messages, max_tokens: int, temperature: float) -> Iterator[str]:
+        entry = self._lookup(ResponseCache.make_key(model, messages, max_tokens, temperature, True), model)
+        for chunk, delay in zip(entry["chunks"], entry["delays"]):
+            self._wait(delay)
+            if attempt_cancelled():
+                raise AttemptCancelled()
+            yield chunk
+
+    def __repr__(self) -> str:
+        return f"ReplayBackend(path={self.path!r}, entries={len(self)}, speed={self.speed})"
+
+    def _lookup(self, key: str, model: str) -> Dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise LookupError(f"No recorded response for this request to {model} in {self.path}")
+            position = self._next.get(key, 0)
+            self._next[key] = (position + 1) % len(entries)
+            self.served += 1
+            return entries[position]
+
+    def _wait(self, delay: float) -> None:
+        if self.speed is not None and delay > 0:
+            self._sleep(delay / self.speed)
@@ -0,0 +1,174 @@
+"""Two-tier response cache for LLM calls."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = ["ResponseCache"]
+
+
+class ResponseCache:
+    """Bounded in-memory LRU in front of an optional on-disk store.
+
+    Entries are JSON-serialisable values keyed by :meth:`make_key`. Lookups go
+    to the memory tier first and fall back to the disk tier, promoting disk
+    hits into memory. Both tiers honour the same TTL. The memory tier is
+    bounded by entry count and the disk tier by total bytes, evicting the
+    least recently used and the oldest written entries respectively.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_memory_entries: int = 256,
+                 max_disk_bytes: int = 100 * 1024 * 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        if not isinstance(max_memory_entries, int) or max_memory_entries <= 0:
+            raise ValueError("max_memory_entries must be a positive integer")
+        if not isinstance(max_disk_bytes, int) or max_disk_bytes <= 0:
+            raise ValueError("max_disk_bytes must be a positive integer")
+        if ttl is not None and (not isinstance(ttl, (int, float)) or ttl <= 0):
+            raise ValueError("ttl must be a positive number or None")
+
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], max_tokens: int,
+                 temperature: float, stream: bool = False) -> str:
+        """Return a stable key for a request.
+
+        Args:
+            model: Normalized model name
+            messages: Chat messages sent to the model
+            max_tokens: Maximum tokens requested
+            temperature: Sampling temperature
+            stream: Whether the entry holds streamed chunks
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = json.dumps([model, messages, max_tokens, temperature, stream],
+                             sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            now = self._clock()
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._memory[key]
+
+            entry = self._read_disk(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._remember(key, entry)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._remove_disk(key)
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value under key in both tiers."""
+        with self._lock:
+            entry = (self._clock(), value)
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._remove_disk(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(set(self._memory) | set(self._disk_index))
+
+    def __repr__(self) -> str:
+        return f"ResponseCache(directory={self.directory!r}, max_memory_entries={self.max_memory_entries}, ttl={self.ttl})"
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key: str, entry: Tuple[float, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_disk_index(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Any]]:
+        if self.directory is None or key not in self._disk_index:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["created"], data["value"]
+        except (OSError, ValueError, KeyError):
+            self._remove_disk(key)
+            return None
+
+    def _write_disk(self, key: str, entry: Tuple[float, Any]) -> None:
+        if self.directory is None:
+            return
+        data = json.dumps({"created": entry[0], "value": entry[1]}).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        self._disk_index[key] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+            self._remove_disk(next(iter(self._disk_index)))
+            self.stats["evictions"] += 1
+
+    def _remove_disk(self, key: str) -> None:
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
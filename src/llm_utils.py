@@ -1,35 +1,126 @@
-import litellm
-from typing import Generator
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Generator, List, Optional, Sequence, Union
+from .conversation import estimate_tokens
+from .hedging import Hedger
+from .llm_backend import LiteLLMBackend, LLMBackend
+from .llm_cache import ResponseCache
+from .rate_limit import Permit, RateLimiter
+from .router import get_router
+from .single_flight import SingleFlight
+from .stream_metrics import StreamMetrics
 from .utils import normalize_model_name
 
+DEFAULT_CONCURRENCY: int = 8
+DEFAULT_TEMPERATURE: float = 0.7
+
+_response_cache: Optional[ResponseCache] = None
+_rate_limiter: Optional[RateLimiter] = None
+_last_permit = threading.local()
+_single_flight = SingleFlight()
+_backend: LLMBackend = LiteLLMBackend()
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Enable response caching for all LLM calls, or disable it with None."""
+    global _response_cache
+    if cache is not None and not isinstance(cache, ResponseCache):
+        raise TypeError("cache must be a ResponseCache or None")
+    _response_cache = cache
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the response cache in use, if any."""
+    return _response_cache
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """Route all LLM calls through a RateLimiter, or stop with None."""
+    global _rate_limiter
+    if limiter is not None and not isinstance(limiter, RateLimiter):
+        raise TypeError("limiter must be a RateLimiter or None")
+    _rate_limiter = limiter
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the rate limiter in use, if any."""
+    return _rate_limiter
+
+def last_permit() -> Optional[Permit]:
+    """Return the admission of this thread's last rate-limited call.
+
+    Its ``queue_wait`` is the time the call spent waiting for budget and a
+    concurrency slot, and ``retries`` how often it was retried.
+    """
+    return getattr(_last_permit, "value", None)
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Send completions to backend, e.g. a RecordingBackend or ReplayBackend.
+
+    None restores the default, litellm.
+    """
+    global _backend
+    if backend is not None and not isinstance(backend, LLMBackend):
+        raise TypeError("backend must implement complete() and stream()")
+    _backend = backend if backend is not None else LiteLLMBackend()
+
+def get_backend() -> LLMBackend:
+    """Return the backend completions are sent to."""
+    return _backend
+
+def get_single_flight() -> SingleFlight:
+    """Return the registry coalescing identical in-flight requests; its stats count coalesced calls."""
+    return _single_flight
+
+def _litellm():
+    """Import litellm on first use; importing it takes seconds."""
+    import litellm  # pylint: disable=import-outside-toplevel
+    return litellm
+
 def _escape_xml(content: str) -> str:
-    """Escape XML special characters."""
+    """Escape XML special characters.
+
+    Most deltas contain none, and checking for them is cheaper than three
+    replace() calls; the chained replace() is still faster in CPython than a
+    one-pass str.translate() or regex substitution.
+    """
+    if "&" not in content and "<" not in content and ">" not in content:
+        return content
     return content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
-def litellm_streaming(prompt: str, model: str, max_tokens: int = 100) -> Generator[str, None, None]:
-    """Stream completion response using LiteLLM API."""
+def wrap_response(content: str) -> str:
+    """Escape content and wrap it in <response> like the completion functions do."""
+    return f"<response>{_escape_xml(content)}</response>"
+
+def _validate_request(prompt: str, model: str, max_tokens: int) -> None:
+    """Validate the arguments shared by all completion functions."""
     if not isinstance(prompt, str) or not prompt.strip():
         raise ValueError("Prompt must be a non-empty string")
     if not isinstance(model, str) or not model.strip():
         raise ValueError("Model must be a non-empty string")
     if not isinstance(max_tokens, int) or max_tokens <= 0:
         raise ValueError("max_tokens must be a positive integer")
-        
-    model = normalize_model_name(model)
-    
+
+def _validate_concurrency(concurrency: int) -> None:
+    if not isinstance(concurrency, int) or concurrency <= 0:
+        raise ValueError("concurrency must be a positive integer")
+
+def _user_messages(prompt: str) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": prompt}]
+
+def _cache_key(model: str, messages: List[Dict[str, str]], max_tokens: int,
+               use_cache: bool, stream: bool = False) -> Optional[str]:
+    """Return the cache key for a request, or None when caching is off."""
+    if not use_cache or _response_cache is None:
+        return None
+    return ResponseCache.make_key(model, messages, max_tokens, DEFAULT_TEMPERATURE, stream)
+
+@contextmanager
+def _llm_errors(model: str):
+    """Translate LiteLLM exceptions into the errors this package raises."""
+    litellm = _litellm()
     try:
-        response = litellm.completion(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=max_tokens,
-            temperature=0.7,
-            stream=True
-        )
-        
-        for chunk in response:
-            content = chunk.choices[0].delta.content
-            if content:
-                yield f"<response>{_escape_xml(content)}</response>"
+        yield
     except litellm.exceptions.BadRequestError as e:
         if "not a valid model ID" in str(e):
             raise ValueError(f"Invalid model: {model}") from e
@@ -39,34 +130,400 @@ def litellm_streaming(prompt: str, model: str, max_tokens: int = 100) -> Generat
     except Exception as e:
         raise RuntimeError(f"Unexpected error: {e}") from e
 
-def litellm_completion(prompt: str, model: str, max_tokens: int = 100) -> str:
-    """Get single completion using LiteLLM API."""
-    if not isinstance(prompt, str) or not prompt.strip():
-        raise ValueError("Prompt must be a non-empty string")
-    if not isinstance(model, str) or not model.strip():
-        raise ValueError("Model must be a non-empty string")
-    if not isinstance(max_tokens, int) or max_tokens <= 0:
-        raise ValueError("max_tokens must be a positive integer")
-        
+def _check_content(content: Optional[str], model: str) -> None:
+    """Reject a completion without text content, e.g. a refusal or a bare tool call."""
+    if not isinstance(content, str):
+        raise RuntimeError(f"No content in response from {model}")
+
+def _validate_messages(messages: List[Dict[str, str]]) -> None:
+    if not isinstance(messages, list) or not messages:
+        raise ValueError("messages must be a non-empty list")
+    for message in messages:
+        if (not isinstance(message, dict) or not isinstance(message.get("role"), str)
+                or not isinstance(message.get("content"), str)):
+            raise ValueError("each message must be a dict with string 'role' and 'content'")
+
+def _request_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Estimate the tokens a request consumes from a tokens-per-minute budget."""
+    return sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+
+def _stream_content(messages: List[Dict[str, str]], model: str, max_tokens: int, use_cache: bool,
+                    coalesce: bool = False, hedge: Optional[Hedger] = None) -> Generator[str, None, None]:
+    """Yield the raw content deltas of a streamed completion, using the cache if enabled."""
+    key = _cache_key(model, messages, max_tokens, use_cache, stream=True)
+    cached = _response_cache.get(key) if key is not None else None
+    if cached is not None:
+        yield from cached
+        return
+
+    def fetch():
+        if hedge is None:
+            return _fetch_stream(messages, model, max_tokens, key)
+        return hedge.stream(model, lambda name: _fetch_stream(messages, name, max_tokens,
+                                                              key if name == model else None))
+
+    if coalesce:
+        flight_key = ResponseCache.make_key(model, messages, max_tokens, DEFAULT_TEMPERATURE, True)
+        yield from _single_flight.stream(flight_key, fetch)
+    else:
+        yield from fetch()
+
+def _fetch_stream(messages: List[Dict[str, str]], model: str, max_tokens: int,
+                  key: Optional[str]) -> Generator[str, None, None]:
+    """Stream a completion from the API and cache it under key once it is complete."""
+    router = get_router(model)
+    if router is not None:
+        chunks = []
+        for content in router.stream(lambda name: _fetch_stream(messages, name, max_tokens, None)):
+            chunks.append(content)
+            yield content
+        if key is not None:
+            _response_cache.set(key, chunks)
+        return
+
+    def open_stream():
+        return _backend.stream(model, messages, max_tokens, DEFAULT_TEMPERATURE)
+
+    chunks = []
+    with _llm_errors(model):
+        limiter = _rate_limiter
+        if limiter is None:
+            response = open_stream()
+        else:
+            _last_permit.value = Permit(model)
+            response = limiter.stream(model, _request_tokens(messages, max_tokens), open_stream,
+                                      _last_permit.value)
+
+        try:
+            for content in response:
+                chunks.append(content)
+                yield content
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    if key is not None:
+        _response_cache.set(key, chunks)
+
+def _complete_content(messages: List[Dict[str, str]], model: str, max_tokens: int, use_cache: bool,
+                      coalesce: bool = False, hedge: Optional[Hedger] = None) -> str:
+    """Return the raw content of a completion, using the cache if enabled."""
+    key = _cache_key(model, messages, max_tokens, use_cache)
+    content = _response_cache.get(key) if key is not None else None
+    if content is not None:
+        return content
+
+    def fetch():
+        if hedge is None:
+            return _fetch_content(messages, model, max_tokens, key)
+        return hedge.complete(model, lambda name: _fetch_content(messages, name, max_tokens,
+                                                                 key if name == model else None))
+
+    if coalesce:
+        flight_key = ResponseCache.make_key(model, messages, max_tokens, DEFAULT_TEMPERATURE)
+        return _single_flight.do(flight_key, fetch)
+    return fetch()
+
+def _fetch_content(messages: List[Dict[str, str]], model: str, max_tokens: int, key: Optional[str]) -> str:
+    """Request a completion from the API and cache it under key."""
+    router = get_router(model)
+    if router is not None:
+        content = router.call(lambda name: _fetch_content(messages, name, max_tokens, None))
+        if key is not None:
+            _response_cache.set(key, content)
+        return content
+
+    def request():
+        return _backend.complete(model, messages, max_tokens, DEFAULT_TEMPERATURE)
+
+    with _llm_errors(model):
+        limiter = _rate_limiter
+        if limiter is None:
+            content = request()
+        else:
+            _last_permit.value = Permit(model)
+            content = limiter.call(model, _request_tokens(messages, max_tokens), request, _last_permit.value)
+    _check_content(content, model)
+    if key is not None:
+        _response_cache.set(key, content)
+    return content
+
+def litellm_streaming(prompt: str, model: str, max_tokens: int = 100, *, use_cache: bool = True,
+                      coalesce: bool = False, hedge: Optional[Hedger] = None) -> Generator[str, None, None]:
+    """Stream completion response using LiteLLM API.
+
+    When a response cache is configured and use_cache is true, a cached
+    stream is replayed chunk by chunk instead of calling the API, and a
+    stream that runs to completion is stored for later replay.
+
+    With coalesce, an identical stream already in flight in this process is
+    joined instead of opening a new one: the chunks produced so far are
+    yielded first, then the live ones. With a Hedger, a backup stream is
+    opened if the first chunk is late and the stream that starts first wins.
+    """
+    _validate_request(prompt, model, max_tokens)
+    model = normalize_model_name(model)
+    for content in _stream_content(_user_messages(prompt), model, max_tokens, use_cache, coalesce, hedge):
+        yield f"<response>{_escape_xml(content)}</response>"
+
+class _StreamEnd:
+    """Last item _read_ahead queues, carrying the reader thread's rate-limit permit."""
+
+    __slots__ = ("permit",)
+
+    def __init__(self, permit: Optional[Permit]):
+        self.permit = permit
+
+def _read_ahead(deltas: Generator[str, None, None], stop: threading.Event) -> "queue.Queue":
+    """Iterate deltas on a helper thread and queue them, then any error raised and a _StreamEnd.
+
+    Once stop is set the thread closes deltas after the next delta instead
+    of queueing it.
+    """
+    items: queue.Queue = queue.Queue()
+
+    def read() -> None:
+        try:
+            for content in deltas:
+                if stop.is_set():
+                    break
+                items.put(content)
+        except BaseException as e:  # handed to the consumer
+            items.put(e)
+        finally:
+            deltas.close()
+            items.put(_StreamEnd(getattr(_last_permit, "value", None)))
+
+    threading.Thread(target=read, name="stream-reader", daemon=True).start()
+    return items
+
+def litellm_streaming_raw(prompt: str, model: str, max_tokens: int = 100, *, use_cache: bool = True,
+                          coalesce: bool = False, hedge: Optional[Hedger] = None,
+                          max_chunk_chars: Optional[int] = None, flush_after: Optional[float] = None,
+                          metrics: Optional[StreamMetrics] = None) -> Generator[str, None, None]:
+    """Stream the plain text of a completion, without escaping or <response> wrapping.
+
+    Deltas are yielded as they arrive unless max_chunk_chars or flush_after
+    is given. Then they are joined and yielded once the joined text reaches
+    max_chunk_chars characters, or once flush_after seconds have passed
+    since the oldest delta in the buffer, even if the upstream stalls. For
+    that deadline the upstream is read on a helper thread. To get the
+    document litellm_completion would return, escape the whole text once
+    with wrap_response("".join(chunks)).
+
+    Args:
+        prompt: Input prompt
+        model: Model to use
+        max_tokens: Maximum tokens to generate
+        use_cache: Whether the response cache may be used
+        coalesce: Whether to join an identical stream already in flight
+        hedge: Hedger racing a backup stream against a slow one
+        max_chunk_chars: Size at which buffered deltas are yielded
+        flush_after: Longest time in seconds a delta waits in the buffer
+        metrics: StreamMetrics updated with the timing of every upstream delta
+    """
+    _validate_request(prompt, model, max_tokens)
+    if max_chunk_chars is not None and (not isinstance(max_chunk_chars, int) or max_chunk_chars <= 0):
+        raise ValueError("max_chunk_chars must be a positive integer")
+    if flush_after is not None and (not isinstance(flush_after, (int, float)) or flush_after <= 0):
+        raise ValueError("flush_after must be a positive number of seconds")
     model = normalize_model_name(model)
-    
+    deltas = _stream_content(_user_messages(prompt), model, max_tokens, use_cache, coalesce, hedge)
+    stop: Optional[threading.Event] = None
     try:
-        response = litellm.completion(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=max_tokens,
-            temperature=0.7
-        )
-        content = response.choices[0].message.content
-        return f"<response>{_escape_xml(content)}</response>"
-    except litellm.exceptions.BadRequestError as e:
-        if "not a valid model ID" in str(e):
-            raise ValueError(f"Invalid model: {model}") from e
-        raise RuntimeError(f"Bad request: {e}") from e
-    except litellm.APIError as e:
-        raise RuntimeError(f"API Error: {e}") from e
-    except Exception as e:
-        raise RuntimeError(f"Unexpected error: {e}") from e
+        if metrics is not None:
+            metrics.reset()
+        if max_chunk_chars is None and flush_after is None:
+            for content in deltas:
+                if metrics is not None:
+                    metrics.record(content)
+                yield content
+            if metrics is not None:
+                metrics.finish()
+            return
+
+        buffer: List[str] = []
+        size = 0
+        if flush_after is None:
+            for content in deltas:
+                if metrics is not None:
+                    metrics.record(content)
+                buffer.append(content)
+                size += len(content)
+                if size >= max_chunk_chars:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+        else:
+            stop = threading.Event()
+            items = _read_ahead(deltas, stop)
+            deadline = 0.0
+            while True:
+                try:
+                    item = items.get(timeout=max(0.0, deadline - time.monotonic()) if buffer else None)
+                except queue.Empty:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+                    continue
+                if isinstance(item, _StreamEnd):
+                    if item.permit is not None:
+                        _last_permit.value = item.permit
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                if metrics is not None:
+                    metrics.record(item)
+                if not buffer:
+                    deadline = time.monotonic() + flush_after
+                buffer.append(item)
+                size += len(item)
+                if (max_chunk_chars is not None and size >= max_chunk_chars) or time.monotonic() >= deadline:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+        if metrics is not None:
+            metrics.finish()
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if stop is not None:
+            stop.set()
+        else:
+            deltas.close()
+
+def litellm_completion(prompt: str, model: str, max_tokens: int = 100, *, use_cache: bool = True,
+                       coalesce: bool = False, hedge: Optional[Hedger] = None) -> str:
+    """Get single completion using LiteLLM API.
+
+    When a response cache is configured (see set_response_cache) the result
+    is served from and stored in it unless use_cache is false. With coalesce,
+    concurrent identical requests share one API call (see get_single_flight).
+    With a Hedger, a slow request is raced against a backup (see Hedger).
+    """
+    _validate_request(prompt, model, max_tokens)
+    model = normalize_model_name(model)
+    content = _complete_content(_user_messages(prompt), model, max_tokens, use_cache, coalesce, hedge)
+    return wrap_response(content)
+
+def litellm_chat_completion(messages: List[Dict[str, str]], model: str, max_tokens: int = 100, *,
+                            use_cache: bool = True, coalesce: bool = False,
+                            hedge: Optional[Hedger] = None) -> str:
+    """Get a completion for a multi-turn conversation.
+
+    Args:
+        messages: Chat messages, each a dict with "role" and "content"
+        model: Model to use
+        max_tokens: Maximum tokens to generate
+        use_cache: Whether the response cache may be used
+        coalesce: Whether to share the API call with identical requests in flight
+        hedge: Hedger racing a backup request against a slow one
+
+    Returns:
+        str: The completion wrapped like litellm_completion's result
+    """
+    _validate_messages(messages)
+    _validate_request("chat", model, max_tokens)
+    model = normalize_model_name(model)
+    content = _complete_content(messages, model, max_tokens, use_cache, coalesce, hedge)
+    return wrap_response(content)
+
+def unwrap_response(response: str) -> str:
+    """Strip the <response> wrapping added by the completion functions and unescape the content."""
+    if response.startswith("<response>") and response.endswith("</response>"):
+        response = response[len("<response>"):-len("</response>")]
+    return response.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+def _native_async(model: str) -> bool:
+    """Whether litellm.acompletion can serve model without skipping a configured layer."""
+    return type(_backend) is LiteLLMBackend and _rate_limiter is None and get_router(model) is None
+
+async def litellm_acompletion(prompt: str, model: str, max_tokens: int = 100, *, use_cache: bool = True,
+                              coalesce: bool = False, hedge: Optional[Hedger] = None) -> str:
+    """Get single completion using the asynchronous LiteLLM API.
+
+    Validation, caching, errors and the returned ``<response>`` wrapping are
+    the same as for :func:`litellm_completion`. When a backend other than
+    litellm, a rate limiter or a router for model is configured, or with
+    coalesce or a Hedger, the call goes through the same stack as
+    litellm_completion on a thread of the event loop's default executor.
+    """
+    _validate_request(prompt, model, max_tokens)
+    model = normalize_model_name(model)
+    messages = _user_messages(prompt)
+    if coalesce or hedge is not None or not _native_async(model):
+        content = await asyncio.get_running_loop().run_in_executor(
+            None, _complete_content, messages, model, max_tokens, use_cache, coalesce, hedge)
+        return wrap_response(content)
+
+    key = _cache_key(model, messages, max_tokens, use_cache)
+    content = _response_cache.get(key) if key is not None else None
+    if content is None:
+        with _llm_errors(model):
+            response = await _litellm().acompletion(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=DEFAULT_TEMPERATURE
+            )
+            content = response.choices[0].message.content
+        _check_content(content, model)
+        if key is not None:
+            _response_cache.set(key, content)
+    return wrap_response(content)
+
+def _completion_or_error(prompt: str, model: str, max_tokens: int, use_cache: bool = True) -> Union[str, Exception]:
+    try:
+        return litellm_completion(prompt, model, max_tokens, use_cache=use_cache)
+    except Exception as e:  # reported per item, never fails the batch
+        return e
+
+def litellm_batch_completion(prompts: Sequence[str], model: str, max_tokens: int = 100,
+                             concurrency: int = DEFAULT_CONCURRENCY, *,
+                             use_cache: bool = True) -> List[Union[str, Exception]]:
+    """Run many completions on a bounded thread pool.
+
+    Args:
+        prompts: Prompts to complete
+        model: Model used for every prompt
+        max_tokens: Maximum tokens per completion
+        concurrency: Maximum number of requests in flight at once
+        use_cache: Whether the response cache may be used
+
+    Returns:
+        List[Union[str, Exception]]: One entry per prompt, in input order. Each
+        entry is either the completion as returned by litellm_completion or the
+        exception that call raised.
+
+    Raises:
+        ValueError: If model, max_tokens or concurrency are invalid
+    """
+    _validate_request("batch", model, max_tokens)
+    _validate_concurrency(concurrency)
+    prompts = list(prompts)
+    if not prompts:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(prompts))) as executor:
+        return list(executor.map(lambda p: _completion_or_error(p, model, max_tokens, use_cache), prompts))
+
+async def litellm_abatch_completion(prompts: Sequence[str], model: str, max_tokens: int = 100,
+                                    concurrency: int = DEFAULT_CONCURRENCY, *,
+                                    use_cache: bool = True) -> List[Union[str, Exception]]:
+    """Asynchronous counterpart of :func:`litellm_batch_completion`.
 
+    At most ``concurrency`` calls to :func:`litellm_acompletion` are awaited at
+    once, so they use the configured backend, router and rate limiter like
+    the synchronous batch. Results keep input order and failures are
+    returned per item.
+    """
+    _validate_request("batch", model, max_tokens)
+    _validate_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
 
+    async def _bounded(prompt: str) -> str:
+        async with semaphore:
+            return await litellm_acompletion(prompt, model, max_tokens, use_cache=use_cache)
 
+    return list(await asyncio.gather(*(_bounded(p) for p in prompts), return_exceptions=True))
@@ -2,12 +2,40 @@ from typing import Any, Dict, Optional
 import xml.etree.ElementTree as ET
 from .reflection import python_reflection_test
 from .agent import Agent, AgentAssert, ConcreteAgent
+from .memory import MemoryStore
+from .conversation import Conversation
 from .config import DEFAULT_MODEL, global_settings
 from .envs import Env1, Env2
+from .early_stop import EarlyStopReport, run_with_early_stopping, generate_with_early_stopping
 from .interface import UserInterface, ConsoleInterface
 from .isolation import IsolatedEnvironment, run_container
-from .llm_utils import litellm_completion, litellm_streaming
-from .tools import Tool, ShellCodeExecutor
+from .container_pool import ContainerPool
+from .shell_session import ShellSession
+from .capture import CapturedOutput
+from .llm_utils import (
+    litellm_completion,
+    litellm_streaming,
+    litellm_streaming_raw,
+    litellm_acompletion,
+    litellm_batch_completion,
+    litellm_abatch_completion,
+    litellm_chat_completion,
+    set_response_cache,
+    set_rate_limiter,
+    set_backend
+)
+from .llm_cache import ResponseCache
+from .rate_limit import RateLimiter
+from .single_flight import SingleFlight
+from .hedging import Hedger
+from .llm_backend import RecordingBackend, ReplayBackend
+from .stream_metrics import StreamMetrics
+from .server import AgentServer, AgentClient
+from .router import ModelRouter, register_router
+from .xml_stream import StreamingXMLParser, iter_xml_fields
+from .tools import Tool, ShellCodeExecutor, MemoizedTool
+from .tool_cache import CachePolicy, ToolResultCache
+from .command_policy import CommandPolicy
 from .utils import normalize_model_name
 
 
@@ -127,10 +155,17 @@ def _validate_global_settings(settings: Dict[str, float]) -> None:
 
 
 __all__ = [
-    "parse_xml", "Tool", "ShellCodeExecutor", "python_reflection_test",
-    "litellm_completion", "litellm_streaming", "DEFAULT_MODEL", "global_settings",
-    "IsolatedEnvironment", "run_container", "ConsoleInterface", "UserInterface",
-    "Agent", "AgentAssert", "ConcreteAgent", "Env1", "Env2", "normalize_model_name"
+    "parse_xml", "Tool", "ShellCodeExecutor", "CommandPolicy", "MemoizedTool", "CachePolicy",
+    "ToolResultCache", "python_reflection_test",
+    "litellm_completion", "litellm_streaming", "litellm_streaming_raw", "StreamMetrics", "litellm_acompletion",
+    "litellm_batch_completion", "litellm_abatch_completion", "litellm_chat_completion", "set_response_cache",
+    "set_rate_limiter", "RateLimiter", "SingleFlight", "Hedger", "ModelRouter",
+    "register_router", "set_backend", "RecordingBackend", "ReplayBackend", "ResponseCache",
+    "StreamingXMLParser", "iter_xml_fields", "DEFAULT_MODEL", "global_settings",
+    "IsolatedEnvironment", "run_container", "ContainerPool", "ShellSession", "CapturedOutput", "ConsoleInterface", "UserInterface",
+    "Agent", "AgentAssert", "ConcreteAgent", "AgentServer", "AgentClient", "MemoryStore", "Conversation",
+    "Env1", "Env2", "EarlyStopReport", "run_with_early_stopping", "generate_with_early_stopping",
+    "normalize_model_name"
 ]
 
 
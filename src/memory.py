@@ -0,0 +1,156 @@
+"""Segmented, size-bounded store behind Agent.memory."""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+__all__ = ["MemoryStore", "EVICTION_POLICIES"]
+
+EVICTION_POLICIES = ("oldest", "least-referenced")
+
+
+class MemoryStore:
+    """Agent memory kept as ordered segments.
+
+    Updates follow the search/replace protocol of the agent's XML responses:
+    an empty search appends ``replace`` as a new segment, an empty replace
+    deletes what was found, anything else replaces the first occurrence of
+    ``search`` in the rendered memory, exactly like ``str.replace(search,
+    replace, 1)`` on it. A segment emptied by an update stays as an empty
+    line; a match spanning several segments merges them into one.
+
+    Next to the cached rendered string the store keeps an offset index, the
+    start of every segment in it. An update runs one ``str.find`` over the
+    rendered string, maps the match to the segments it covers by binary
+    search in O(log n) and rewrites only those. Finding an arbitrary
+    substring has no sublinear index short of a suffix structure, so the
+    search itself stays linear in the memory size, at C speed; the rendered
+    string it scans is the one the next prompt needs anyway.
+
+    With ``max_chars`` set, segments are evicted once the rendered memory
+    grows past it, either oldest first or least referenced (fewest search
+    hits) first. The string for prompts is cached and rebuilt only after a
+    change.
+    """
+
+    separator = "\n"
+
+    def __init__(self, max_chars: Optional[int] = None, eviction: str = "oldest"):
+        if max_chars is not None and (not isinstance(max_chars, int) or max_chars <= 0):
+            raise ValueError("max_chars must be a positive integer or None")
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"eviction must be one of {EVICTION_POLICIES}")
+        self.max_chars = max_chars
+        self.eviction = eviction
+        self.evictions = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove every segment."""
+        self._segments: Dict[int, str] = {}
+        self._references: Dict[int, int] = {}
+        self._next_id = 0
+        self._chars = 0
+        self._rendered: Optional[str] = ""
+        self._offsets: Optional[Tuple[List[int], List[int]]] = None
+
+    def update(self, search: str, replace: str) -> bool:
+        """Apply one search/replace memory update.
+
+        Args:
+            search: Text to find; empty to append
+            replace: Replacement text; empty to delete
+
+        Returns:
+            bool: False if search was not found, True otherwise
+        """
+        if not isinstance(search, str) or not isinstance(replace, str):
+            raise ValueError("search and replace must be strings")
+        if not search:
+            if replace:
+                self._evict(keep=self._add(replace))
+            return True
+
+        rendered = self.render()
+        start = rendered.find(search)
+        if start == -1:
+            return False
+        ids, starts = self._index()
+        end = start + len(search)
+        first = bisect_right(starts, start) - 1
+        last = bisect_right(starts, end - 1) - 1
+        if end > starts[last] + len(self._segments[ids[last]]):  # the match ends with a separator
+            last += 1
+        text = rendered[starts[first]:start] + replace + rendered[end:starts[last] + len(self._segments[ids[last]])]
+
+        segment_id = ids[first]
+        self._references[segment_id] += 1
+        for merged in ids[first + 1:last + 1]:
+            self._references[segment_id] += self._references[merged]
+            self._remove(merged)
+        self._set(segment_id, text)
+        self._evict(keep=segment_id)
+        return True
+
+    def render(self) -> str:
+        """Return the memory as one string, rebuilding it only after changes."""
+        if self._rendered is None:
+            self._rendered = self.separator.join(self._segments.values())
+        return self._rendered
+
+    @property
+    def segments(self) -> List[str]:
+        return list(self._segments.values())
+
+    def __len__(self) -> int:
+        return self._chars
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def __repr__(self) -> str:
+        return f"MemoryStore(segments={len(self._segments)}, chars={self._chars}, max_chars={self.max_chars})"
+
+    def _index(self) -> Tuple[List[int], List[int]]:
+        """Return the segment ids in order and where each starts in the rendered memory."""
+        if self._offsets is None:
+            ids = list(self._segments)
+            starts = []
+            position = 0
+            for text in self._segments.values():
+                starts.append(position)
+                position += len(text) + len(self.separator)
+            self._offsets = (ids, starts)
+        return self._offsets
+
+    def _add(self, text: str) -> int:
+        segment_id = self._next_id
+        self._next_id += 1
+        self._segments[segment_id] = text
+        self._references[segment_id] = 0
+        self._chars += len(text) + (len(self.separator) if len(self._segments) > 1 else 0)
+        self._rendered = self._offsets = None
+        return segment_id
+
+    def _set(self, segment_id: int, text: str) -> None:
+        old = self._segments[segment_id]
+        self._segments[segment_id] = text
+        self._chars += len(text) - len(old)
+        self._rendered = self._offsets = None
+
+    def _remove(self, segment_id: int) -> None:
+        text = self._segments.pop(segment_id)
+        del self._references[segment_id]
+        self._chars -= len(text) + (len(self.separator) if self._segments else 0)
+        self._rendered = self._offsets = None
+
+    def _evict(self, keep: Optional[int] = None) -> None:
+        if self.max_chars is None:
+            return
+        while self._chars > self.max_chars and len(self._segments) > 1:
+            candidates = (i for i in self._segments if i != keep)
+            if self.eviction == "oldest":
+                victim = next(candidates)
+            else:
+                victim = min(candidates, key=lambda i: (self._references[i], i))
+            self._remove(victim)
+            self.evictions += 1
@@ -0,0 +1,293 @@
+"""Client-side rate limiting, adaptive concurrency and retries for LLM calls."""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+__all__ = ["TokenBucket", "AdaptiveConcurrencyLimiter", "RateLimiter", "Permit",
+           "is_transient_error", "is_overload_error"]
+
+T = TypeVar("T")
+
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+OVERLOAD_STATUS_CODES = frozenset({408, 429, 503})
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a provider error is worth retrying (429, 5xx, timeouts)."""
+    return isinstance(error, TimeoutError) or getattr(error, "status_code", None) in TRANSIENT_STATUS_CODES
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Whether a provider error signals overload (429, 503, timeouts)."""
+    return isinstance(error, TimeoutError) or getattr(error, "status_code", None) in OVERLOAD_STATUS_CODES
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``.
+
+    reserve() debits the bucket immediately, possibly into debt, and returns
+    how long the caller has to wait before its reservation is covered. That
+    keeps waiting callers in arrival order without a queue.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if not isinstance(rate_per_minute, (int, float)) or rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be a positive number")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take amount from the bucket and return the seconds to wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def __repr__(self) -> str:
+        return f"TokenBucket(rate_per_minute={self.rate * 60:g}, capacity={self.capacity:g})"
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight requests.
+
+    Each success raises the limit by ``increase / limit`` (about +increase per
+    round trip of a full window); each overload signal such as a 429 or a
+    timeout multiplies it by ``decrease_factor``.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 64,
+                 increase: float = 1.0, decrease_factor: float = 0.5):
+        if not 0 < minimum <= initial <= maximum:
+            raise ValueError("limits must satisfy 0 < minimum <= initial <= maximum")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+
+    def release(self, overloaded: bool = False, completed: bool = True) -> None:
+        """Free a slot; a request that did not complete leaves the limit as it is."""
+        with self._condition:
+            self._in_flight -= 1
+            if overloaded:
+                self._limit = max(self.minimum, self._limit * self.decrease_factor)
+            elif completed:
+                self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+            self._condition.notify_all()
+
+    def __repr__(self) -> str:
+        return f"AdaptiveConcurrencyLimiter(limit={self.limit}, in_flight={self._in_flight})"
+
+
+class Permit:
+    """Admission of one request, recording how long it queued."""
+
+    __slots__ = ("model", "queue_wait", "retries")
+
+    def __init__(self, model: str):
+        self.model = model
+        self.queue_wait = 0.0
+        self.retries = 0
+
+    def __repr__(self) -> str:
+        return f"Permit(model={self.model!r}, queue_wait={self.queue_wait:.3f}, retries={self.retries})"
+
+
+class _ModelLimits:
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float],
+                 concurrency: AdaptiveConcurrencyLimiter, clock: Callable[[], float]):
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.concurrency = concurrency
+
+
+class RateLimiter:
+    """Per-model request/token budgets, adaptive concurrency and jittered retries.
+
+    Args:
+        requests_per_minute: Request budget per model, or None for no limit
+        tokens_per_minute: Token budget per model, or None for no limit
+        model_limits: Per-model overrides of the two budgets, e.g.
+            ``{"deepseek/deepseek-chat": {"requests_per_minute": 60}}``
+        max_retries: Retries of a call failing with a retryable error
+        base_delay: First backoff delay in seconds, doubled per retry
+        max_delay: Upper bound of a single backoff delay
+        initial_concurrency: Starting in-flight limit per model
+        max_concurrency: Ceiling of the in-flight limit per model
+        is_retryable: Whether an error should be retried
+        is_overload: Whether an error means the provider is overloaded, which
+            shrinks the concurrency limit
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 model_limits: Optional[Dict[str, Dict[str, float]]] = None, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 30.0, initial_concurrency: int = 4,
+                 max_concurrency: int = 64, is_retryable: Callable[[BaseException], bool] = is_transient_error,
+                 is_overload: Callable[[BaseException], bool] = is_overload_error,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        if not isinstance(max_retries, int) or max_retries < 0:
+            raise ValueError("max_retries must be a non-negative integer")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = dict(model_limits or {})
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.is_retryable = is_retryable
+        self.is_overload = is_overload
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._models: Dict[str, _ModelLimits] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {"calls": 0, "retries": 0, "overloads": 0, "queue_wait": 0.0}
+
+    def concurrency(self, model: str) -> AdaptiveConcurrencyLimiter:
+        return self._limits(model).concurrency
+
+    @contextmanager
+    def admit(self, model: str, tokens: int = 0, permit: Optional[Permit] = None) -> Iterator[Permit]:
+        """Wait for budget and a concurrency slot, then hold the slot.
+
+        Errors raised inside the block are reported to the AIMD limit; a
+        stream closed early by its consumer (GeneratorExit) is neither a
+        success nor a failure. The time spent waiting is added to
+        ``permit.queue_wait``.
+        """
+        permit = permit or Permit(model)
+        self._wait(permit, tokens)
+        overloaded = False
+        completed = True
+        try:
+            yield permit
+        except GeneratorExit:
+            completed = False
+            raise
+        except BaseException as e:
+            overloaded = self._overloaded(e)
+            raise
+        finally:
+            self._limits(model).concurrency.release(overloaded, completed)
+
+    def call(self, model: str, tokens: int, func: Callable[[], T], permit: Optional[Permit] = None) -> T:
+        """Run func under the limits of model, retrying retryable errors.
+
+        Args:
+            model: Model the request goes to
+            tokens: Estimated tokens of the request
+            func: The request itself
+            permit: Permit whose queue_wait and retries are updated in place
+
+        Returns:
+            The result of func
+        """
+        permit = permit or Permit(model)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.admit(model, tokens, permit):
+                    return func()
+            except Exception as e:
+                if attempt == self.max_retries or not self.is_retryable(e):
+                    raise
+                self._backoff(permit, attempt)
+        raise AssertionError("unreachable")
+
+    def stream(self, model: str, tokens: int, open_stream: Callable[[], Iterable[T]],
+               permit: Optional[Permit] = None) -> Iterator[T]:
+        """Iterate a stream under the limits of model, holding its slot until the end.
+
+        Errors before the first item are retried like in call(); once items
+        have been yielded the error is raised, since they cannot be taken back.
+        """
+        permit = permit or Permit(model)
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                with self.admit(model, tokens, permit):
+                    for item in open_stream():
+                        started = True
+                        yield item
+                return
+            except Exception as e:
+                if started or attempt == self.max_retries or not self.is_retryable(e):
+                    raise
+                self._backoff(permit, attempt)
+
+    def __repr__(self) -> str:
+        return (f"RateLimiter(requests_per_minute={self.requests_per_minute}, "
+                f"tokens_per_minute={self.tokens_per_minute}, max_retries={self.max_retries})")
+
+    def _limits(self, model: str) -> _ModelLimits:
+        with self._lock:
+            limits = self._models.get(model)
+            if limits is None:
+                overrides = self.model_limits.get(model, {})
+                limits = _ModelLimits(
+                    overrides.get("requests_per_minute", self.requests_per_minute),
+                    overrides.get("tokens_per_minute", self.tokens_per_minute),
+                    AdaptiveConcurrencyLimiter(self.initial_concurrency, maximum=self.max_concurrency),
+                    self._clock
+                )
+                self._models[model] = limits
+            return limits
+
+    def _wait(self, permit: Permit, tokens: int) -> None:
+        limits = self._limits(permit.model)
+        start = self._clock()
+        delay = 0.0
+        if limits.requests is not None:
+            delay = max(delay, limits.requests.reserve(1))
+        if limits.tokens is not None and tokens > 0:
+            delay = max(delay, limits.tokens.reserve(tokens))
+        if delay > 0:
+            self._sleep(delay)
+        limits.concurrency.acquire()
+        waited = max(delay, self._clock() - start)
+        permit.queue_wait += waited
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["queue_wait"] += waited
+
+    def _backoff(self, permit: Permit, attempt: int) -> None:
+        """Sleep a full-jitter exponential delay before the next attempt."""
+        permit.retries += 1
+        with self._lock:
+            self.stats["retries"] += 1
+        self._sleep(self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def _overloaded(self, error: BaseException) -> bool:
+        overloaded = isinstance(error, Exception) and self.is_overload(error)
+        if overloaded:
+            with self._lock:
+                self.stats["overloads"] += 1
+        return overloaded
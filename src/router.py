@@ -0,0 +1,259 @@
+"""Latency-, error- and cost-aware routing of a model alias to concrete models."""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, TypeVar, Union
+
+from .rate_limit import is_transient_error
+from .utils import normalize_model_name
+
+__all__ = ["ModelRouter", "RouteDecision", "register_router", "unregister_router", "get_router", "ROUTER_PREFIX"]
+
+ROUTER_PREFIX = "router/"
+
+T = TypeVar("T")
+
+_routers: Dict[str, "ModelRouter"] = {}
+_routers_lock = threading.Lock()
+
+
+class _Backend:
+    """Live statistics and circuit state of one concrete model."""
+
+    __slots__ = ("model", "cost", "latency", "error_rate", "failures", "open_until", "probing", "requests")
+
+    def __init__(self, model: str, cost: float):
+        self.model = model
+        self.cost = cost
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.open_until: Optional[float] = None
+        self.probing = False
+        self.requests = 0
+
+
+class RouteDecision:
+    """Why a request to an alias went where it did.
+
+    ``candidates`` lists every backend in the order they were ranked, with
+    the inputs of its score; ``attempts`` the models actually called, the
+    last one being the model that answered (unless ``error`` is set).
+    """
+
+    __slots__ = ("alias", "candidates", "attempts", "error")
+
+    def __init__(self, alias: str, candidates: List[Dict[str, object]]):
+        self.alias = alias
+        self.candidates = candidates
+        self.attempts: List[str] = []
+        self.error: Optional[str] = None
+
+    @property
+    def model(self) -> Optional[str]:
+        return self.attempts[-1] if self.attempts and self.error is None else None
+
+    def __repr__(self) -> str:
+        return f"RouteDecision(alias={self.alias!r}, model={self.model!r}, attempts={self.attempts})"
+
+
+class ModelRouter:
+    """Resolve the alias ``router/<name>`` to one of several models per request.
+
+    Backends are ranked by
+    ``latency_weight * latency + error_weight * error_rate + cost_weight * cost``
+    where latency and error rate are exponentially weighted moving averages
+    of past requests and cost is the configured price per million tokens.
+    Backends without latency samples rank as if instant, so each gets tried.
+    A request that fails with a transient error (see is_transient_error)
+    is retried on the next backend; any other error is raised at once
+    without counting against the backend. After ``failure_threshold``
+    consecutive failures a backend's circuit opens and it is skipped for
+    ``cooldown`` seconds, after which one request may probe it again.
+
+    Args:
+        name: Alias name; requests use the model ``router/<name>``
+        backends: Models to route to, or a mapping of model to cost per
+            million tokens
+        alpha: Weight of the newest sample in the moving averages
+        latency_weight: Score per second of latency
+        error_weight: Score of an error rate of 1
+        cost_weight: Score per unit of cost
+        failure_threshold: Consecutive failures that open a circuit
+        cooldown: Seconds a circuit stays open
+        history: Number of recent decisions kept in ``decisions``
+    """
+
+    def __init__(self, name: str, backends: Union[Iterable[str], Mapping[str, float]], alpha: float = 0.2,
+                 latency_weight: float = 1.0, error_weight: float = 10.0, cost_weight: float = 0.1,
+                 failure_threshold: int = 5, cooldown: float = 30.0, history: int = 100,
+                 clock: Callable[[], float] = time.monotonic):
+        if not isinstance(name, str) or not name.strip() or "/" in name:
+            raise ValueError("name must be a non-empty string without '/'")
+        costs = dict(backends) if isinstance(backends, Mapping) else {model: 0.0 for model in backends}
+        if not costs:
+            raise ValueError("backends must not be empty")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if not isinstance(failure_threshold, int) or failure_threshold <= 0:
+            raise ValueError("failure_threshold must be a positive integer")
+
+        self.name = name.strip().lower()
+        self.alias = ROUTER_PREFIX + self.name
+        self.alpha = alpha
+        self.latency_weight = latency_weight
+        self.error_weight = error_weight
+        self.cost_weight = cost_weight
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._backends: Dict[str, _Backend] = {}
+        for model, cost in costs.items():
+            model = normalize_model_name(model)
+            if model.startswith(ROUTER_PREFIX):
+                raise ValueError("a router cannot route to another router")
+            self._backends[model] = _Backend(model, cost)
+        self.decisions: Deque[RouteDecision] = deque(maxlen=history)
+
+    @property
+    def models(self) -> List[str]:
+        return list(self._backends)
+
+    def rank(self) -> RouteDecision:
+        """Score every backend and return them best first, without calling any."""
+        now = self._clock()
+        candidates = []
+        with self._lock:
+            for backend in self._backends.values():
+                circuit = "closed"
+                if backend.open_until is not None:
+                    circuit = "open" if now < backend.open_until or backend.probing else "half-open"
+                latency = backend.latency or 0.0
+                candidates.append({
+                    "model": backend.model,
+                    "latency": backend.latency,
+                    "error_rate": backend.error_rate,
+                    "cost": backend.cost,
+                    "circuit": circuit,
+                    "score": (self.latency_weight * latency + self.error_weight * backend.error_rate
+                              + self.cost_weight * backend.cost),
+                })
+        candidates.sort(key=lambda c: (c["circuit"] == "open", c["score"]))
+        return RouteDecision(self.alias, candidates)
+
+    def call(self, request: Callable[[str], T]) -> T:
+        """Call request(model) on the best backend, failing over to the next ones."""
+        decision = self.rank()
+        self.decisions.append(decision)
+        last_error: Optional[Exception] = None
+        for candidate in decision.candidates:
+            if candidate["circuit"] == "open":
+                continue
+            model = candidate["model"]
+            probe = candidate["circuit"] == "half-open"
+            if probe and not self._claim_probe(model):
+                continue
+            decision.attempts.append(model)
+            start = self._clock()
+            try:
+                result = request(model)
+            except Exception as e:
+                if is_transient_error(e) or (e.__cause__ is not None and is_transient_error(e.__cause__)):
+                    self.record(model, self._clock() - start, error=True)
+                    last_error = e
+                    continue
+                # A bad request fails on every backend alike and says nothing about this one.
+                self._end_probe(model, probe)
+                decision.error = str(e)
+                raise
+            except BaseException:
+                self._end_probe(model, probe)
+                raise
+            self.record(model, self._clock() - start)
+            return result
+
+        decision.error = str(last_error) if last_error is not None else "all circuits are open"
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"No backend available for {self.alias}: all circuits are open")
+
+    def stream(self, open_stream: Callable[[str], Iterator[T]]) -> Iterator[T]:
+        """Iterate open_stream(model) on the best backend.
+
+        Failover happens until the first chunk; after that errors are raised.
+        Latency is measured to the first chunk.
+        """
+        def first_chunk(model: str):
+            iterator = iter(open_stream(model))
+            for chunk in iterator:
+                return [chunk], iterator
+            return [], iterator
+
+        head, iterator = self.call(first_chunk)
+        try:
+            yield from head
+            yield from iterator
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def _claim_probe(self, model: str) -> bool:
+        """Let the caller probe a half-open circuit unless another request already does."""
+        with self._lock:
+            backend = self._backends[model]
+            if backend.probing or backend.open_until is None or self._clock() < backend.open_until:
+                return backend.open_until is None
+            backend.probing = True
+            return True
+
+    def _end_probe(self, model: str, probe: bool) -> None:
+        """Let another request probe a half-open circuit after a probe that proved nothing."""
+        if probe:
+            with self._lock:
+                self._backends[model].probing = False
+
+    def record(self, model: str, latency: float, error: bool = False) -> None:
+        """Feed the outcome of one request to model into its moving averages and circuit."""
+        with self._lock:
+            backend = self._backends[model]
+            backend.requests += 1
+            backend.probing = False
+            backend.error_rate += self.alpha * ((1.0 if error else 0.0) - backend.error_rate)
+            if error:
+                backend.failures += 1
+                if backend.failures >= self.failure_threshold:
+                    backend.open_until = self._clock() + self.cooldown
+                return
+            backend.latency = latency if backend.latency is None else (
+                backend.latency + self.alpha * (latency - backend.latency))
+            backend.failures = 0
+            backend.open_until = None
+
+    def __repr__(self) -> str:
+        return f"ModelRouter(alias={self.alias!r}, models={self.models})"
+
+
+def register_router(router: ModelRouter) -> str:
+    """Make router answer requests for its alias and return the alias."""
+    if not isinstance(router, ModelRouter):
+        raise TypeError("router must be a ModelRouter")
+    with _routers_lock:
+        _routers[router.alias] = router
+    return router.alias
+
+
+def unregister_router(name: str) -> None:
+    """Remove the router of an alias or name, if any."""
+    alias = name if name.startswith(ROUTER_PREFIX) else ROUTER_PREFIX + name
+    with _routers_lock:
+        _routers.pop(alias.lower(), None)
+
+
+def get_router(model: str) -> Optional[ModelRouter]:
+    """Return the router registered for a (normalized) model name, if any."""
+    if not model.startswith(ROUTER_PREFIX):
+        return None
+    return _routers.get(model)
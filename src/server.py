@@ -0,0 +1,335 @@
+"""Asyncio server hosting many agent sessions over line-delimited JSON."""
+
+import asyncio
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from .agent import Agent
+
+__all__ = ["AgentServer", "AgentClient"]
+
+MAX_LINE_BYTES = 1 << 20
+MAX_QUEUED_CHUNKS = 32
+
+_DONE = object()
+
+
+class _Session:
+    __slots__ = ("agent", "semaphore", "pending")
+
+    def __init__(self, agent: Agent, concurrency: int):
+        self.agent = agent
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = 0
+
+
+class AgentServer:
+    """Serve agents to many clients from one event loop.
+
+    Each line a client sends is a JSON request
+    ``{"id": ..., "session": "name", "input": "text", "stream": false}``.
+    A connection can open any number of sessions, up to
+    ``max_sessions_per_connection``; each session gets its own agent from
+    ``agent_factory`` and lives until the connection closes. Replies are JSON
+    lines carrying the request id: ``{"type": "chunk", "text": ...}`` for
+    every streamed delta (when ``stream`` is true and the agent can stream),
+    then ``{"type": "done", "text": <full reply>}``, or
+    ``{"type": "error", "error": ...}``.
+
+    Connections cost no thread: agents, which block on LLM calls, run on a
+    shared pool of ``max_workers`` threads. At most ``session_concurrency``
+    requests of a session run at once and ``session_queue`` more may wait;
+    beyond that, or when ``max_pending`` requests are waiting or running
+    server-wide, requests are refused right away with an ``overloaded``
+    error instead of queueing without bound. A request whose client goes
+    away keeps counting until its worker job ends; a stream stops at its
+    next chunk.
+    """
+
+    def __init__(self, agent_factory: Callable[[], Agent], max_workers: int = 32, session_concurrency: int = 1,
+                 session_queue: int = 8, max_pending: int = 1024, max_sessions_per_connection: int = 64):
+        limits = {"max_workers": max_workers, "session_concurrency": session_concurrency,
+                  "max_pending": max_pending, "max_sessions_per_connection": max_sessions_per_connection}
+        for name, value in limits.items():
+            if not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{name} must be a positive integer")
+        if not isinstance(session_queue, int) or session_queue < 0:
+            raise ValueError("session_queue must be a non-negative integer")
+        self.agent_factory = agent_factory
+        self.session_concurrency = session_concurrency
+        self.session_queue = session_queue
+        self.max_pending = max_pending
+        self.max_sessions_per_connection = max_sessions_per_connection
+        self.stats: Dict[str, int] = {"connections": 0, "sessions": 0, "requests": 0, "shed": 0, "errors": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+        self._pending = 0
+        self._servers = []
+
+    @property
+    def pending(self) -> int:
+        """Requests waiting or running, server-wide."""
+        return self._pending
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Listen on TCP and return the bound address."""
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_LINE_BYTES)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> str:
+        """Listen on a Unix socket at path."""
+        server = await asyncio.start_unix_server(self._handle_connection, path, limit=MAX_LINE_BYTES)
+        self._servers.append(server)
+        return path
+
+    async def serve_forever(self) -> None:
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        self._executor.shutdown(wait=False)
+
+    def __repr__(self) -> str:
+        return f"AgentServer(connections={self.stats['connections']}, pending={self._pending})"
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        sessions: Dict[str, _Session] = {}
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(message: Dict[str, Any]) -> None:
+            async with write_lock:
+                writer.write(json.dumps(message).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):  # line over the limit or reset
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._handle_request(line, sessions, send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.stats["connections"] -= 1
+            self.stats["sessions"] -= len(sessions)
+            writer.close()
+
+    async def _handle_request(self, line: bytes, sessions: Dict[str, _Session], send) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            text = request.get("input")
+            name = request.get("session", "default")
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("input must be a non-empty string")
+            if not isinstance(name, str):
+                raise ValueError("session must be a string")
+        except ValueError as e:
+            self.stats["errors"] += 1
+            await self._send_error(send, request_id, f"Bad request: {e}")
+            return
+
+        if self._pending >= self.max_pending:
+            await self._shed(send, request_id, "server busy")
+            return
+        session = sessions.get(name)
+        if session is None:
+            if len(sessions) >= self.max_sessions_per_connection:
+                await self._shed(send, request_id, "too many sessions")
+                return
+            session = sessions[name] = _Session(self.agent_factory(), self.session_concurrency)
+            self.stats["sessions"] += 1
+        if session.pending >= self.session_concurrency + self.session_queue:
+            await self._shed(send, request_id, "session busy")
+            return
+
+        self.stats["requests"] += 1
+        self._pending += 1
+        session.pending += 1
+        jobs: List[asyncio.Future] = []
+        cancelled = threading.Event()
+        try:
+            async with session.semaphore:
+                if request.get("stream") and hasattr(session.agent, "stream"):
+                    parts = []
+                    async for chunk in self._stream(session.agent, text, jobs, cancelled):
+                        parts.append(chunk)
+                        await send({"id": request_id, "type": "chunk", "text": chunk})
+                    reply = "".join(parts)
+                else:
+                    job = asyncio.get_running_loop().run_in_executor(self._executor, session.agent, text)
+                    jobs.append(job)
+                    reply = await asyncio.shield(job)
+            await send({"id": request_id, "type": "done", "text": reply})
+        except ConnectionError:  # the client is gone; nobody to report to
+            return
+        except Exception as e:  # reported to the client, never kills the connection
+            self.stats["errors"] += 1
+            await self._send_error(send, request_id, str(e))
+        finally:
+            cancelled.set()
+            running = [job for job in jobs if not job.done()]
+            if running:
+                running[0].add_done_callback(lambda job: self._release(session))
+            else:
+                self._release(session)
+
+    def _release(self, session: _Session) -> None:
+        self._pending -= 1
+        session.pending -= 1
+
+    async def _shed(self, send, request_id: Any, reason: str) -> None:
+        self.stats["shed"] += 1
+        await self._send_error(send, request_id, f"overloaded: {reason}")
+
+    @staticmethod
+    async def _send_error(send, request_id: Any, error: str) -> None:
+        try:
+            await send({"id": request_id, "type": "error", "error": error})
+        except ConnectionError:  # the client is gone; nobody to report to
+            pass
+
+    async def _stream(self, agent: Agent, text: str, jobs: List[asyncio.Future],
+                      cancelled: threading.Event) -> AsyncIterator[str]:
+        """Iterate agent.stream(text) on a worker thread, handing chunks to the loop.
+
+        The worker job is appended to jobs. At most MAX_QUEUED_CHUNKS chunks
+        wait to be sent; beyond that the worker blocks, so a slow client
+        slows its agent down instead of growing the queue. Once cancelled is
+        set, the agent's stream is closed instead of handing over its next
+        chunk.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_CHUNKS)
+
+        def put(item: Any) -> bool:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    future.result(timeout=0.1)
+                    return True
+                except FutureTimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return False
+
+        def produce() -> None:
+            outcome: Any = _DONE
+            chunks = None
+            try:
+                chunks = agent.stream(text)
+                for chunk in chunks:
+                    if cancelled.is_set() or not put(chunk):
+                        return
+            except Exception as e:  # handed over to the loop
+                outcome = e
+            except BaseException as e:  # e.g. GeneratorExit; must not leave the loop waiting
+                outcome = RuntimeError(f"Agent stream stopped: {e!r}")
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+                if not cancelled.is_set():
+                    put(outcome)
+
+        jobs.append(loop.run_in_executor(self._executor, produce))
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class AgentClient:
+    """Asyncio client for AgentServer, multiplexing requests over one connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._replies: Dict[int, asyncio.Queue] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int) -> "AgentClient":
+        return cls(*await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> "AgentClient":
+        return cls(*await asyncio.open_unix_connection(path, limit=MAX_LINE_BYTES))
+
+    async def ask(self, text: str, session: str = "default") -> str:
+        """Send one input and return the agent's full reply."""
+        reply = ""
+        async for message in self._request(text, session, stream=False):
+            reply = message["text"]
+        return reply
+
+    async def stream(self, text: str, session: str = "default") -> AsyncIterator[str]:
+        """Send one input and yield the reply's chunks as they arrive."""
+        async for message in self._request(text, session, stream=True):
+            if message["type"] == "chunk":
+                yield message["text"]
+
+    async def close(self) -> None:
+        self._receiver.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _request(self, text: str, session: str, stream: bool) -> AsyncIterator[Dict[str, Any]]:
+        request_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._replies[request_id] = queue
+        try:
+            message = {"id": request_id, "session": session, "input": text, "stream": stream}
+            self._writer.write(json.dumps(message).encode() + b"\n")
+            await self._writer.drain()
+            while True:
+                reply = await queue.get()
+                if reply is None:
+                    raise ConnectionError("Connection closed by server")
+                if reply["type"] == "error":
+                    raise RuntimeError(reply["error"])
+                yield reply
+                if reply["type"] == "done":
+                    return
+        finally:
+            del self._replies[request_id]
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                queue = self._replies.get(message.get("id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        finally:
+            for queue in self._replies.values():
+                queue.put_nowait(None)
@@ -0,0 +1,193 @@
+"""Long-lived shell process that runs many commands without forking a new shell."""
+
+import os
+import selectors
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+__all__ = ["ShellSession"]
+
+_READ_SIZE = 65536
+
+
+class ShellSession:
+    """Runs commands one after another in a single persistent shell.
+
+    Each command is written to the shell's stdin followed by ``printf``
+    markers on stdout and stderr that carry a per-command random sentinel
+    and the command's exit status. Output is read with a selector until both
+    markers arrive. A command that outlives its timeout gets the whole shell
+    process group killed; the next command starts a fresh shell. Shell state
+    such as the working directory and exported variables persists between
+    commands of the same session.
+    """
+
+    def __init__(self, shell: str = "/bin/sh"):
+        if not isinstance(shell, str) or not shell.strip():
+            raise ValueError("shell must be a non-empty string")
+        self.shell = shell
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self.spawn_count = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def execute(self, command: str, timeout: int) -> str:
+        """Run a command in the session.
+
+        Args:
+            command: The shell command to run
+            timeout: Maximum execution time in seconds
+
+        Returns:
+            str: The command's stdout
+
+        Raises:
+            ValueError: If inputs are invalid
+            TimeoutError: If the command times out; the session is restarted
+            RuntimeError: If the command exits with a non-zero status
+        """
+        status, stdout, stderr = self.run(command, timeout)
+        if status != 0:
+            error_msg = stderr.strip() if stderr.strip() else "Unknown error"
+            raise RuntimeError(f"Command failed: {error_msg}")
+        return stdout
+
+    def run(self, command: str, timeout: int, stdout_path: Optional[str] = None,
+            stderr_path: Optional[str] = None) -> Tuple[int, str, str]:
+        """Run a command and return its exit status and output without raising on failure.
+
+        Args:
+            command: The shell command to run
+            timeout: Maximum execution time in seconds
+            stdout_path: If set, the command's stdout is redirected to this file
+            stderr_path: If set, the command's stderr is redirected to this file
+
+        Returns:
+            Tuple[int, str, str]: Exit status, stdout and stderr (empty when redirected)
+
+        Raises:
+            ValueError: If inputs are invalid
+            TimeoutError: If the command times out; the session is restarted
+        """
+        if not isinstance(command, str) or not command.strip():
+            raise ValueError("command must be a non-empty string")
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError("timeout must be a positive number")
+
+        redirects = " </dev/null"
+        if stdout_path is not None:
+            redirects += f" >{shlex.quote(stdout_path)}"
+        if stderr_path is not None:
+            redirects += f" 2>{shlex.quote(stderr_path)}"
+
+        with self._lock:
+            if not self.alive:
+                self._spawn()
+            sentinel = uuid.uuid4().hex
+            script = (f"{{ {command}\n}}{redirects}\n"
+                      f"printf '\\n{sentinel}:%s\\n' \"$?\"\n"
+                      f"printf '\\n{sentinel}\\n' >&2\n")
+            try:
+                self._process.stdin.write(script.encode("utf-8"))
+                self._process.stdin.flush()
+            except OSError:
+                pass  # shell already gone; reported by _collect as an exit
+            return self._collect(sentinel, time.monotonic() + timeout, timeout)
+
+    def close(self) -> None:
+        """Terminate the shell process, if running."""
+        with self._lock:
+            self._kill()
+
+    def __enter__(self) -> "ShellSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self):
+        if self._process is not None and self._process.poll() is None:
+            self._kill()
+
+    def __repr__(self) -> str:
+        return f"ShellSession(shell={self.shell!r}, alive={self.alive})"
+
+    def _spawn(self) -> None:
+        self._process = subprocess.Popen(
+            [self.shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+        self.spawn_count += 1
+
+    def _kill(self) -> None:
+        if self._process is None:
+            return
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        for stream in (self._process.stdin, self._process.stdout, self._process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self._process.wait()
+        self._process = None
+
+    def _collect(self, sentinel: str, deadline: float, timeout: float):
+        """Read both streams until the command's markers arrive."""
+        markers = {
+            "stdout": f"\n{sentinel}:".encode("ascii"),
+            "stderr": f"\n{sentinel}\n".encode("ascii"),
+        }
+        buffers: Dict[str, bytearray] = {"stdout": bytearray(), "stderr": bytearray()}
+        found: Dict[str, int] = {}
+        status = None
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._process.stdout, selectors.EVENT_READ, "stdout")
+            selector.register(self._process.stderr, selectors.EVENT_READ, "stderr")
+            while status is None or "stderr" not in found:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._kill()
+                    raise TimeoutError(f"Command timed out after {timeout} seconds")
+                for key, _ in selector.select(remaining):
+                    name = key.data
+                    data = os.read(key.fd, _READ_SIZE)
+                    if not data:
+                        return self._exited(buffers)
+                    buffer = buffers[name]
+                    search_from = max(0, len(buffer) - len(markers[name]))
+                    buffer += data
+                    if name not in found:
+                        index = buffer.find(markers[name], search_from)
+                        if index >= 0:
+                            found[name] = index
+                    if name == "stdout" and name in found:
+                        tail = buffer[found[name] + len(markers[name]):]
+                        if tail.endswith(b"\n"):
+                            status = int(tail.strip() or b"0")
+
+        stdout = bytes(buffers["stdout"][:found["stdout"]]).decode("utf-8", errors="replace")
+        stderr = bytes(buffers["stderr"][:found["stderr"]]).decode("utf-8", errors="replace")
+        return status, stdout, stderr
+
+    def _exited(self, buffers: Dict[str, bytearray]):
+        """Handle the shell exiting mid-command, e.g. after ``exit``."""
+        status = self._process.wait()
+        self._kill()
+        stdout = bytes(buffers["stdout"]).decode("utf-8", errors="replace")
+        stderr = bytes(buffers["stderr"]).decode("utf-8", errors="replace")
+        return status, stdout, stderr
@@ -0,0 +1,144 @@
+"""Coalescing of identical requests that are in flight at the same time."""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Hashable, Iterator, List, Optional, TypeVar
+
+__all__ = ["SingleFlight"]
+
+T = TypeVar("T")
+
+
+class _StreamFlight(Generic[T]):
+    """One upstream stream shared by every consumer of a key.
+
+    Chunks are buffered as they arrive. A consumer that has caught up with the
+    buffer pulls the next chunk from upstream itself, so the stream keeps
+    going as long as anyone is reading, whoever started it.
+    """
+
+    def __init__(self, source: Iterator[T], on_finish: Callable[[], None], on_leave: Callable[[], None]):
+        self.source = source
+        self.chunks: List[T] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.consumers = 0
+        self._lock = threading.Lock()
+        self._on_finish = on_finish
+        self._on_leave = on_leave
+
+    def iterate(self) -> Iterator[T]:
+        position = 0
+        try:
+            while True:
+                if position < len(self.chunks):
+                    yield self.chunks[position]
+                    position += 1
+                    continue
+                with self._lock:
+                    if position < len(self.chunks):
+                        continue
+                    if self.error is not None:
+                        raise self.error
+                    if self.done:
+                        return
+                    try:
+                        self.chunks.append(next(self.source))
+                    except StopIteration:
+                        self.done = True
+                        self._on_finish()
+                        return
+                    except BaseException as e:
+                        self.error = e
+                        self._on_finish()
+                        raise
+        finally:
+            self._on_leave()
+
+    def abandon(self) -> None:
+        """Close the upstream stream once its last consumer has left early."""
+        self.error = RuntimeError("Stream was abandoned by all consumers")
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+
+
+class SingleFlight:
+    """Share one upstream call between concurrent callers with the same key.
+
+    The first caller of a key runs the call; callers arriving while it is in
+    flight wait for and receive the same result or exception. Once the call
+    finishes the key is forgotten, so later callers start a new call. Streams
+    are shared the same way, and a caller joining late first receives every
+    chunk produced so far, then follows the live stream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._streams: Dict[Hashable, _StreamFlight] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Return func(), or the result of the identical call already in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stream(self, key: Hashable, open_stream: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """Iterate open_stream(), or join the identical stream already in flight.
+
+        Nothing happens until iteration starts, so a stream that is never
+        iterated neither opens nor holds a flight open.
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            if flight is None:
+                flight = _StreamFlight(open_stream(), lambda: self._forget(key, flight),
+                                       lambda: self._leave(key, flight))
+                self._streams[key] = flight
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+            flight.consumers += 1
+        yield from flight.iterate()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._streams)
+
+    def __repr__(self) -> str:
+        return f"SingleFlight(in_flight={self.in_flight()}, coalesced={self.stats['coalesced']})"
+
+    def _forget(self, key: Hashable, flight: _StreamFlight) -> None:
+        with self._lock:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+
+    def _leave(self, key: Hashable, flight: _StreamFlight) -> None:
+        with self._lock:
+            flight.consumers -= 1
+            abandoned = flight.consumers == 0 and self._streams.get(key) is flight
+            if abandoned:
+                del self._streams[key]
+        if abandoned:
+            flight.abandon()
@@ -0,0 +1,63 @@
+"""Per-chunk timing of streamed completions."""
+
+import time
+from typing import Callable, List, Optional
+
+__all__ = ["StreamMetrics"]
+
+
+class StreamMetrics:
+    """Timings of one stream: first-token latency and the gaps between chunks.
+
+    Pass an instance to a streaming call; it is reset when the stream starts
+    and updated as chunks are yielded.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self.chunks = 0
+        self.chars = 0
+        self.first_token_latency: Optional[float] = None
+        self.gaps: List[float] = []
+        self._start = self._clock()
+        self._last = self._start
+        self._end: Optional[float] = None
+
+    def record(self, chunk: str) -> None:
+        """Count a chunk arriving now."""
+        now = self._clock()
+        if self.first_token_latency is None:
+            self.first_token_latency = now - self._start
+        else:
+            self.gaps.append(now - self._last)
+        self._last = now
+        self.chunks += 1
+        self.chars += len(chunk)
+
+    def finish(self) -> None:
+        self._end = self._clock()
+
+    @property
+    def duration(self) -> float:
+        return (self._end if self._end is not None else self._clock()) - self._start
+
+    @property
+    def mean_gap(self) -> float:
+        return sum(self.gaps) / len(self.gaps) if self.gaps else 0.0
+
+    @property
+    def max_gap(self) -> float:
+        return max(self.gaps, default=0.0)
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Chunk rate after the first chunk, i.e. the generation speed."""
+        generating = self._last - self._start - (self.first_token_latency or 0.0)
+        return len(self.gaps) / generating if generating > 0 else 0.0
+
+    def __repr__(self) -> str:
+        first = f"{self.first_token_latency:.3f}" if self.first_token_latency is not None else None
+        return f"StreamMetrics(chunks={self.chunks}, first_token_latency={first}, mean_gap={self.mean_gap:.4f})"
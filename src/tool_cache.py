@@ -0,0 +1,118 @@
+"""Memoization of idempotent tool results."""
+
+import os
+import shlex
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+__all__ = ["CachePolicy", "ToolResultCache"]
+
+
+def _normalize(command: str) -> Hashable:
+    """Split command into the arguments it runs with, keeping quoted whitespace.
+
+    A command shlex cannot split is keyed on its raw text.
+    """
+    try:
+        return tuple(shlex.split(command))
+    except ValueError:
+        return command
+
+
+class CachePolicy:
+    """How long the result of a command may be reused.
+
+    Args:
+        ttl: Seconds a result stays valid, or None to keep it for the life of
+            the cache
+        per_cwd: Whether results depend on the current working directory
+    """
+
+    __slots__ = ("ttl", "per_cwd")
+
+    def __init__(self, ttl: Optional[float] = None, per_cwd: bool = False):
+        if ttl is not None and (not isinstance(ttl, (int, float)) or ttl <= 0):
+            raise ValueError("ttl must be a positive number or None")
+        self.ttl = ttl
+        self.per_cwd = per_cwd
+
+    def __repr__(self) -> str:
+        return f"CachePolicy(ttl={self.ttl}, per_cwd={self.per_cwd})"
+
+
+class ToolResultCache:
+    """Bounded LRU of command results with per-entry expiry and hit statistics."""
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        if not isinstance(max_entries, int) or max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer")
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, Hashable], Tuple[Optional[float], str]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "uncached": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(command: str, policy: CachePolicy) -> Tuple[Hashable, Hashable]:
+        """Key a command by its arguments and, if needed, the working directory."""
+        return _normalize(command), os.getcwd() if policy.per_cwd else None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get_or_run(self, command: str, policy: Optional[CachePolicy], run: Callable[[str], str]) -> str:
+        """Return the cached result for command, or run it and cache the output.
+
+        Commands without a policy are always run. Failures are never cached.
+        """
+        if policy is None:
+            with self._lock:
+                self.stats["uncached"] += 1
+            return run(command)
+
+        key = self.make_key(command, policy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > self._clock()):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        result = run(command)
+        expires = None if policy.ttl is None else self._clock() + policy.ttl
+        with self._lock:
+            self._entries[key] = (expires, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return result
+
+    def invalidate(self, command: Optional[str] = None) -> int:
+        """Drop cached results of command (in every directory), or of everything.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if command is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            normalized = _normalize(command)
+            keys = [key for key in self._entries if key[0] == normalized]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ToolResultCache(max_entries={self.max_entries}, entries={len(self)})"
@@ -1,10 +1,30 @@
-from typing import Protocol, Generator
+from typing import Any, Dict, List, Optional, Protocol, Generator, Sequence, Tuple, Union
 from abc import abstractmethod
+import asyncio
+import codecs
+import io
+import os
+import selectors
 import subprocess
 import shlex
 from shutil import which
+from .command_policy import CommandPolicy
+from .constants import DEFAULT_TIMEOUT
+from .tool_cache import CachePolicy, ToolResultCache
 
-__all__ = ["Tool", "ShellCodeExecutor"]
+__all__ = ["Tool", "ShellCodeExecutor", "MemoizedTool"]
+
+STREAM_CHUNK_SIZE: int = 65536
+STDERR_TAIL_SIZE: int = 4096
+
+
+def _output_decoder() -> io.IncrementalNewlineDecoder:
+    """Incremental UTF-8 decoder translating newlines like ``text=True`` does."""
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+
+
+def _decode_output(data: bytes) -> str:
+    return _output_decoder().decode(data, final=True)
 
 class Tool(Protocol):
     """Protocol defining interface for command execution tools."""
@@ -55,17 +75,49 @@ class Tool(Protocol):
         """
         raise NotImplementedError
 
+    def cache_policy(self, command: str) -> Optional[CachePolicy]:
+        """Say whether results of a command may be memoized by MemoizedTool.
+
+        Tools opt in by overriding this. The default never caches.
+
+        Args:
+            command: The command about to run
+
+        Returns:
+            Optional[CachePolicy]: How long the result may be reused, or None
+        """
+        return None
+
 class ShellCodeExecutor(Tool):
     """Safely executes whitelisted shell commands with strict validation."""
     
-    blacklisted_commands = {'rm', 'cat', 'mv', 'cp', 'sudo', 'sh', 'bash', 'wget', 'curl', 'ssh'}
-    whitelisted_commands = {'ls', 'date', 'pwd', 'echo', 'whoami', 'uname', 'hostname'}
+    blacklisted_commands = frozenset({'rm', 'cat', 'mv', 'cp', 'sudo', 'sh', 'bash', 'wget', 'curl', 'ssh'})
+    whitelisted_commands = frozenset({'ls', 'date', 'pwd', 'echo', 'whoami', 'uname', 'hostname'})
     max_command_length = 100
+    cache_policies: Dict[str, Optional[CachePolicy]] = {
+        'date': None,
+        'ls': CachePolicy(ttl=5.0, per_cwd=True),
+        'pwd': CachePolicy(per_cwd=True),
+        'echo': CachePolicy(),
+        'whoami': CachePolicy(),
+        'uname': CachePolicy(),
+        'hostname': CachePolicy(),
+    }
     
-    def __init__(self):
-        """Initialize the shell code executor."""
+    def __init__(self, policy: Optional[CommandPolicy] = None):
+        """Initialize the shell code executor.
+
+        Args:
+            policy: Validation policy to use instead of one compiled from the
+                class-level whitelist, blacklist and length limit
+        """
         self._available = which('sh') is not None
-        
+        self._policy = policy
+        if policy is not None:
+            self.whitelisted_commands = policy.whitelist
+            self.blacklisted_commands = policy.blacklist
+            self.max_command_length = policy.max_length
+
     def __call__(self, command: str) -> str:
         """Execute a command by delegating to run().
         
@@ -83,7 +135,7 @@ class ShellCodeExecutor(Tool):
         Returns:
             str: String representation
         """
-        return f"ShellCodeExecutor(whitelist={self.whitelisted_commands})"
+        return f"ShellCodeExecutor(whitelist={set(self.whitelisted_commands)})"
         
     @property
     def is_available(self) -> bool:
@@ -94,6 +146,50 @@ class ShellCodeExecutor(Tool):
         """
         return self._available
 
+    @property
+    def policy(self) -> CommandPolicy:
+        """Compiled validation policy.
+
+        Recompiled whenever whitelisted_commands, blacklisted_commands or
+        max_command_length change on the executor or its class. The
+        default sets are frozensets, so they can only change by
+        reassignment, which an identity check detects in O(1). A mutable
+        set assigned instead is compared by contents on every use, which
+        follows in-place edits at the cost of validation speed.
+        """
+        policy = self._policy
+        whitelist, blacklist = self.whitelisted_commands, self.blacklisted_commands
+        if (policy is None
+                or (whitelist is not policy.whitelist and (type(whitelist) is frozenset or whitelist != policy.whitelist))
+                or (blacklist is not policy.blacklist and (type(blacklist) is frozenset or blacklist != policy.blacklist))
+                or self.max_command_length != policy.max_length):
+            policy = self._policy = self._compile(policy)
+        return policy
+
+    def invalidate_policy(self) -> None:
+        """Recompile the policy from the current attributes right away."""
+        self._policy = self._compile(self._policy)
+
+    def _compile(self, previous: Optional[CommandPolicy]) -> CommandPolicy:
+        return CommandPolicy(
+            whitelist=self.whitelisted_commands,
+            blacklist=self.blacklisted_commands,
+            max_length=self.max_command_length,
+            **self._carried_policy_settings(previous)
+        )
+
+    def _carried_policy_settings(self, previous: Optional[CommandPolicy]) -> Dict[str, Any]:
+        """Settings of an explicit policy that survive recompilation."""
+        if previous is None:
+            return {}
+        rules = {cmd: rule for cmd, rule in previous.argument_rules.items() if cmd in self.whitelisted_commands}
+        return {"forbidden_chars": previous.forbidden_chars, "argument_rules": rules}
+
+    def cache_policy(self, command: str) -> Optional[CachePolicy]:
+        """Look up the cache policy of a command by its name in cache_policies."""
+        parts = command.split(None, 1) if isinstance(command, str) else None
+        return self.cache_policies.get(parts[0]) if parts else None
+
     def _validate_command(self, command: str) -> None:
         """Validate command before execution.
         
@@ -104,28 +200,12 @@ class ShellCodeExecutor(Tool):
             ValueError: If command is invalid
             PermissionError: If command is blacklisted
         """
-        if not isinstance(command, str) or not command.strip():
-            raise ValueError("Command must be a non-empty string")
-        if any(char in command for char in ['\n', '\r', '\0', ';', '|', '&', '`', '$', '(', ')', '>', '<']):
-            raise ValueError(f"Command contains invalid characters: {command}")
-        if len(command) > self.max_command_length:
-            raise ValueError(f"Command exceeds maximum length of {self.max_command_length} characters")
-            
-        parts = command.strip().split()
-        if not parts:
-            raise ValueError("Empty command")
-            
-        cmd = parts[0]
-        if cmd in self.blacklisted_commands:
-            raise PermissionError(f"Command {cmd} is blacklisted")
-        if cmd not in self.whitelisted_commands:
-            raise ValueError(f"Command {cmd} is not whitelisted")
-            
-        # Additional validation for command arguments
-        if len(parts) > 1:
-            for arg in parts[1:]:
-                if any(char in arg for char in ['\n', '\r', '\0', ';', '|', '&', '`', '$', '(', ')', '>', '<']):
-                    raise ValueError(f"Invalid character in argument: {arg}")
+        policy = self._policy
+        if (policy is None or self.whitelisted_commands is not policy.whitelist
+                or self.blacklisted_commands is not policy.blacklist
+                or self.max_command_length != policy.max_length):
+            policy = self.policy
+        policy.validate(command)
 
     def run(self, command: str) -> str:
         """Execute a shell command with strict validation.
@@ -149,7 +229,7 @@ class ShellCodeExecutor(Tool):
                 capture_output=True,
                 text=True,
                 check=True,
-                timeout=10
+                timeout=DEFAULT_TIMEOUT
             )
             return result.stdout
         except subprocess.TimeoutExpired as e:
@@ -160,26 +240,221 @@ class ShellCodeExecutor(Tool):
             raise RuntimeError(f"Error executing command: {e}") from e
 
     def stream(self, command: str) -> Generator[str, None, None]:
-        """Stream command output."""
+        """Stream command output line by line, split at newlines only.
+
+        Built on stream_tagged(), so stderr is drained concurrently and cannot
+        block the command. Its last few kilobytes are kept for the error
+        message if the command fails. Lines longer than STREAM_CHUNK_SIZE are
+        yielded in pieces.
+        """
+        self._validate_command(command)
+        pending = ""
+        stderr_tail = ""
+        try:
+            for name, text in self.stream_tagged(command):
+                if name == "stderr":
+                    stderr_tail = (stderr_tail + text)[-STDERR_TAIL_SIZE:]
+                    continue
+                pending += text
+                lines = pending.split("\n")
+                pending = lines.pop()
+                lines = [line + "\n" for line in lines]
+                if len(pending) > STREAM_CHUNK_SIZE:
+                    lines.append(pending)
+                    pending = ""
+                yield from lines
+            if pending:
+                yield pending
+        except RuntimeError as e:
+            detail = f": {stderr_tail.strip()}" if stderr_tail.strip() else ""
+            raise RuntimeError(f"{e}{detail}") from e
+
+    def stream_tagged(self, command: str,
+                      chunk_size: int = STREAM_CHUNK_SIZE) -> Generator[Tuple[str, str], None, None]:
+        """Stream stdout and stderr together as tagged chunks.
+
+        Both pipes are multiplexed with a selector, so neither can fill up
+        and deadlock the child. Reading only happens while the consumer pulls
+        chunks: a slow consumer blocks the child on a full pipe instead of
+        growing a buffer here. Closing the generator early kills the child.
+
+        Args:
+            command: The command to execute
+            chunk_size: Maximum bytes read from a pipe at once
+
+        Yields:
+            Tuple[str, str]: ("stdout" or "stderr", decoded text with
+            newlines translated to \\n, as run() returns them)
+
+        Raises:
+            ValueError: If command is invalid
+            PermissionError: If command is blacklisted
+            RuntimeError: If the command cannot start or exits non-zero
+        """
         self._validate_command(command)
         try:
             process = subprocess.Popen(
                 shlex.split(command),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                bufsize=0
             )
-            
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    yield output
-                    
-            process.stdout.close()
+        except Exception as e:
+            raise RuntimeError(f"Error executing command: {e}") from e
+
+        try:
+            with selectors.DefaultSelector() as selector:
+                for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+                    decoder = _output_decoder()
+                    selector.register(pipe, selectors.EVENT_READ, (name, decoder))
+                while selector.get_map():
+                    for key, _ in selector.select():
+                        name, decoder = key.data
+                        data = os.read(key.fd, chunk_size)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                        text = decoder.decode(data, final=not data)
+                        if text:
+                            yield name, text
             return_code = process.wait()
             if return_code != 0:
                 raise RuntimeError(f"Command failed with code {return_code}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    async def arun(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        """Asyncio-native counterpart of run().
+
+        Args:
+            command: The command to execute
+            timeout: Maximum execution time in seconds
+
+        Returns:
+            str: The command output
+
+        Raises:
+            ValueError: If command is invalid
+            PermissionError: If command is blacklisted
+            TimeoutError: If command times out
+            RuntimeError: If command fails
+        """
+        self._validate_command(command)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *shlex.split(command),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
         except Exception as e:
             raise RuntimeError(f"Error executing command: {e}") from e
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException as e:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            if isinstance(e, asyncio.TimeoutError):
+                raise TimeoutError("Command timed out") from e
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"Command failed: {_decode_output(stderr)}")
+        return _decode_output(stdout)
+
+    async def arun_many(self, commands: Sequence[str], max_parallel: int = 4,
+                        timeout: float = DEFAULT_TIMEOUT,
+                        deadline: Optional[float] = None) -> List[Union[str, Exception]]:
+        """Run several commands concurrently.
+
+        Every command is validated before anything runs; invalid ones are
+        reported in place and never executed.
+
+        Args:
+            commands: Commands to execute
+            max_parallel: Maximum number of commands running at once
+            timeout: Per-command timeout in seconds
+            deadline: Overall limit in seconds; unfinished commands are killed
+
+        Returns:
+            List[Union[str, Exception]]: Output or raised exception per command, in input order
+        """
+        if not isinstance(max_parallel, int) or max_parallel <= 0:
+            raise ValueError("max_parallel must be a positive integer")
+        if deadline is not None and deadline <= 0:
+            raise ValueError("deadline must be a positive number")
+
+        results: List[Union[str, Exception, None]] = [None] * len(commands)
+        for index, command in enumerate(commands):
+            try:
+                self._validate_command(command)
+            except (ValueError, PermissionError) as e:
+                results[index] = e
+
+        semaphore = asyncio.Semaphore(max_parallel)
+
+        async def _bounded(command: str) -> str:
+            async with semaphore:
+                return await self.arun(command, timeout)
+
+        tasks = {asyncio.ensure_future(_bounded(command)): index
+                 for index, command in enumerate(commands) if results[index] is None}
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            for task in done:
+                results[tasks[task]] = task.exception() or task.result()
+            for task in pending:
+                results[tasks[task]] = TimeoutError("Deadline exceeded")
+        return results
+
+    def run_many(self, commands: Sequence[str], max_parallel: int = 4,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 deadline: Optional[float] = None) -> List[Union[str, Exception]]:
+        """Synchronous wrapper around arun_many().
+
+        Must not be called from a running event loop; await arun_many() there.
+        """
+        return asyncio.run(self.arun_many(commands, max_parallel, timeout, deadline))
+
+
+class MemoizedTool(Tool):
+    """Wraps a tool and reuses results of commands its cache_policy() allows.
+
+    Validation and execution still happen in the wrapped tool on every miss,
+    and failed commands are not cached. stream() is passed through unchanged.
+    """
+
+    def __init__(self, tool: Tool, cache: Optional[ToolResultCache] = None):
+        self.tool = tool
+        self.cache = cache if cache is not None else ToolResultCache()
+
+    def run(self, command: str) -> str:
+        """Run a command, serving it from the cache when allowed."""
+        return self.cache.get_or_run(command, self.tool.cache_policy(command), self.tool.run)
+
+    def __call__(self, command: str) -> str:
+        return self.run(command)
+
+    def stream(self, command: str) -> Generator[str, None, None]:
+        return self.tool.stream(command)
+
+    def cache_policy(self, command: str) -> Optional[CachePolicy]:
+        return self.tool.cache_policy(command)
+
+    def invalidate(self, command: Optional[str] = None) -> int:
+        """Drop cached results; see ToolResultCache.invalidate()."""
+        return self.cache.invalidate(command)
+
+    @property
+    def is_available(self) -> bool:
+        return self.tool.is_available
+
+    def __repr__(self) -> str:
+        return f"MemoizedTool({self.tool!r})"
@@ -0,0 +1,116 @@
+"""Incremental parsing of XML responses as they are streamed."""
+
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator, List, Sequence, Tuple
+from xml.sax.saxutils import unescape
+
+__all__ = ["StreamingXMLParser", "iter_xml_fields", "DEFAULT_FIELDS"]
+
+DEFAULT_FIELDS: Tuple[str, ...] = ("thinking", "message", "memory/search", "memory/replace")
+
+_CHUNK_PREFIX = "<response>"
+_CHUNK_SUFFIX = "</response>"
+
+
+class StreamingXMLParser:
+    """Pull parser that reports response fields as soon as they close.
+
+    Chunks are pushed with :meth:`feed` and completed fields are pulled with
+    :meth:`read_events` as ``(path, text)`` tuples, where ``path`` is the
+    element path below the document root, e.g. ``"message"`` or
+    ``"memory/replace"``.
+
+    By default chunks are expected in the form produced by
+    ``litellm_streaming``: each one is an escaped delta wrapped in its own
+    ``<response>`` element, which is removed before parsing.
+    """
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, wrapped: bool = True):
+        if not fields or not all(isinstance(f, str) and f for f in fields):
+            raise ValueError("fields must be a non-empty sequence of element paths")
+        self.fields = frozenset(fields)
+        self.wrapped = wrapped
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._path: List[str] = []
+        self._started = False
+        self._done = False
+
+    def feed(self, chunk: str) -> None:
+        """Feed the next streamed chunk.
+
+        Raises:
+            ValueError: If the chunk is not a string or the XML is malformed
+        """
+        if not isinstance(chunk, str):
+            raise ValueError("chunk must be a string")
+        if self._done:
+            return
+        if self.wrapped:
+            chunk = self._unwrap(chunk)
+        if not self._started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return
+            self._started = True
+        try:
+            self._parser.feed(chunk)
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML: {e}") from e
+
+    def read_events(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(path, text)`` for every requested field closed so far."""
+        try:
+            for event, element in self._parser.read_events():
+                if event == "start":
+                    self._path.append(element.tag)
+                    continue
+                path = "/".join(self._path[1:])
+                self._path.pop()
+                if not self._path:
+                    self._done = True
+                if path in self.fields:
+                    yield path, element.text or ""
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML: {e}") from e
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Finish parsing and return any remaining events.
+
+        Raises:
+            ValueError: If the document was never completed
+        """
+        events = list(self.read_events())
+        if not self._done:
+            raise ValueError("Incomplete XML document")
+        return events
+
+    @staticmethod
+    def _unwrap(chunk: str) -> str:
+        if chunk.startswith(_CHUNK_PREFIX) and chunk.endswith(_CHUNK_SUFFIX):
+            chunk = chunk[len(_CHUNK_PREFIX):-len(_CHUNK_SUFFIX)]
+        return unescape(chunk)
+
+    def __repr__(self) -> str:
+        return f"StreamingXMLParser(fields={sorted(self.fields)}, wrapped={self.wrapped})"
+
+
+def iter_xml_fields(chunks: Iterable[str], fields: Sequence[str] = DEFAULT_FIELDS,
+                    wrapped: bool = True) -> Iterator[Tuple[str, str]]:
+    """Parse a chunk stream and yield each field as soon as it is complete.
+
+    Args:
+        chunks: Streamed chunks, e.g. from litellm_streaming
+        fields: Element paths below the root to report
+        wrapped: Whether each chunk carries its own ``<response>`` wrapping
+
+    Yields:
+        Tuple[str, str]: Field path and its text
+
+    Raises:
+        ValueError: If the streamed XML is malformed or incomplete
+    """
+    parser = StreamingXMLParser(fields, wrapped)
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.read_events()
+    yield from parser.close()
@@ -0,0 +1,43 @@
+import os
+import re
+from types import SimpleNamespace
+
+import pytest
+
+# Keep litellm from fetching its model cost map over the network on import.
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+
+def make_response(content):
+    """Build an object shaped like a non-streaming litellm response."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_chunk(content):
+    """Build an object shaped like a streaming litellm chunk."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeCompletion:
+    """Stand-in for litellm.completion that echoes the last user message."""
+
+    def __init__(self):
+        self.calls = []
+
+    def reply(self, messages):
+        return f"echo: {messages[-1]['content']}"
+
+    def __call__(self, model, messages, max_tokens, temperature, stream=False, **kwargs):
+        self.calls.append({"model": model, "messages": messages, "max_tokens": max_tokens, "stream": stream})
+        content = self.reply(messages)
+        if stream:
+            return iter([make_chunk(part) for part in re.findall(r"\S+\s*", content)])
+        return make_response(content)
+
+
+@pytest.fixture
+def fake_completion(monkeypatch):
+    import litellm
+    fake = FakeCompletion()
+    monkeypatch.setattr(litellm, "completion", fake)
+    return fake
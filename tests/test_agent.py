@@ -1,3 +1,4 @@
+import re
 import pytest
 from src.agent import *
 
@@ -19,3 +20,67 @@ def test_agent_creation():
 def test_agent_assert():
     assert_agent = AgentAssert()
     assert isinstance(assert_agent, AgentAssert)
+
+
+def test_concrete_agent_stream_fields(fake_completion):
+    fake_completion.reply = lambda messages: "<response><message>hello</message></response>"
+    agent = ConcreteAgent(model="flash")
+    assert list(agent.stream_fields("hi")) == [("message", "hello")]
+
+
+def judge_reply(drop=()):
+    """Fake judge answering True for statements containing "true", skipping dropped ones."""
+    def reply(messages):
+        statements = re.findall(r'<statement index="(\d+)">(.*?)</statement>', messages[-1]["content"])
+        items = "".join(f'<item index="{i}"><bool>{"true" in text}</bool></item>'
+                        for i, text in statements if text not in drop)
+        return f"<response>{items}</response>"
+    return reply
+
+
+def test_agent_assert_judge_batch_packs_statements(fake_completion):
+    fake_completion.reply = judge_reply()
+    statements = [f"statement {i} is {'true' if i % 3 else 'false'}" for i in range(25)]
+    verdicts = AgentAssert().judge_batch(statements, max_items=10)
+    assert verdicts == [i % 3 != 0 for i in range(25)]
+    assert len(fake_completion.calls) == 3
+    assert fake_completion.calls[0]["max_tokens"] >= 10 * AgentAssert.answer_tokens
+
+
+def test_agent_assert_judge_batch_retries_only_unparsed_items(fake_completion):
+    reply = judge_reply()
+    dropped = judge_reply(drop={"b is true"})
+    fake_completion.reply = lambda messages: (dropped if len(fake_completion.calls) == 1 else reply)(messages)
+    assert AgentAssert().judge_batch(["a is true", "b is true", "c is false"]) == [True, True, False]
+    assert len(fake_completion.calls) == 2
+    assert "a is true" not in fake_completion.calls[1]["messages"][-1]["content"]
+
+    fake_completion.reply = judge_reply(drop={"b is true"})
+    with pytest.raises(RuntimeError, match=r"\[1\]"):
+        AgentAssert().judge_batch(["a is true", "b is true"], max_retries=1)
+
+
+def test_agent_assert_judge_batch_retries_only_transient_errors(fake_completion):
+    class Unavailable(Exception):
+        status_code = 503
+
+    def flaky(messages):
+        if len(fake_completion.calls) == 1:
+            raise Unavailable("try later")
+        return judge_reply()(messages)
+
+    fake_completion.reply = flaky
+    assert AgentAssert().judge_batch(["a is true"]) == [True]
+    assert len(fake_completion.calls) == 2
+
+    fake_completion.calls.clear()
+    fake_completion.reply = lambda messages: (_ for _ in ()).throw(Unavailable("down"))
+    with pytest.raises(RuntimeError, match="No verdict") as error:
+        AgentAssert().judge_batch(["a is true"], max_retries=1)
+    assert isinstance(error.value.__cause__.__cause__, Unavailable)
+
+    fake_completion.calls.clear()
+    fake_completion.reply = lambda messages: (_ for _ in ()).throw(PermissionError("bad key"))
+    with pytest.raises(RuntimeError, match="bad key"):
+        AgentAssert().judge_batch(["a is true"])
+    assert len(fake_completion.calls) == 1
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+from src.command_policy import CommandPolicy
+from src.tools import ShellCodeExecutor
+
+FORBIDDEN = ['\n', '\r', '\0', ';', '|', '&', '`', '$', '(', ')', '>', '<']
+
+
+def legacy_validate(command, executor=ShellCodeExecutor):
+    """The checks ShellCodeExecutor._validate_command made before the policy engine."""
+    if not isinstance(command, str) or not command.strip():
+        raise ValueError("Command must be a non-empty string")
+    if any(char in command for char in FORBIDDEN):
+        raise ValueError(f"Command contains invalid characters: {command}")
+    if len(command) > executor.max_command_length:
+        raise ValueError(f"Command exceeds maximum length of {executor.max_command_length} characters")
+    parts = command.strip().split()
+    cmd = parts[0]
+    if cmd in executor.blacklisted_commands:
+        raise PermissionError(f"Command {cmd} is blacklisted")
+    if cmd not in executor.whitelisted_commands:
+        raise ValueError(f"Command {cmd} is not whitelisted")
+
+
+def _outcome(validate, command):
+    try:
+        validate(command)
+    except (ValueError, PermissionError) as e:
+        return type(e), str(e)
+    return None
+
+
+def test_matches_legacy_decisions_and_errors():
+    rng = random.Random(0)
+    words = sorted(ShellCodeExecutor.whitelisted_commands | ShellCodeExecutor.blacklisted_commands) + ["vim", "-la", "x" * 60]
+    samples = [None, 3, "", "   ", "\t\n", " ls", "ls -l", "ls " + "a" * 100]
+    for _ in range(5000):
+        tokens = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.2:
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(FORBIDDEN))
+        samples.append(rng.choice([" ", "  ", "\t"]).join(tokens))
+    executor = ShellCodeExecutor()
+    for command in samples:
+        assert _outcome(executor._validate_command, command) == _outcome(legacy_validate, command), command
+
+
+def test_config_argument_rules_and_executor_override(tmp_path):
+    policy = CommandPolicy.from_config({
+        "whitelist": ["ls", "echo"],
+        "blacklist": ["rm"],
+        "argument_rules": {"ls": {"pattern": r"-[la]+|[\w./]+", "max_args": 2}},
+    })
+    assert policy.is_allowed("ls -la /tmp")
+    assert not policy.is_allowed("ls -R")
+    assert not policy.is_allowed("ls a b c")
+    with pytest.raises(PermissionError):
+        policy.validate("rm x")
+    with pytest.raises(ValueError):
+        CommandPolicy.from_config({"whitelist": ["ls"], "argument_rules": {"cat": {}}})
+
+    executor = ShellCodeExecutor(policy=policy)
+    assert executor.whitelisted_commands == {"ls", "echo"}
+    with pytest.raises(ValueError):
+        executor.run("ls -R")
+    executor.whitelisted_commands = {"ls", "date"}
+    assert executor.policy.is_allowed("date") and not executor.policy.is_allowed("ls -R")
+
+
+def test_policy_follows_in_place_changes(monkeypatch):
+    monkeypatch.setattr(ShellCodeExecutor, "whitelisted_commands", set(ShellCodeExecutor.whitelisted_commands))
+    monkeypatch.setattr(ShellCodeExecutor, "blacklisted_commands", set(ShellCodeExecutor.blacklisted_commands))
+    executor = ShellCodeExecutor()
+    executor.run("ls")
+    ShellCodeExecutor.blacklisted_commands.add("ls")
+    with pytest.raises(PermissionError):
+        executor.run("ls")
+    assert _outcome(executor._validate_command, "ls") == _outcome(legacy_validate, "ls")
+    ShellCodeExecutor.whitelisted_commands.discard("pwd")
+    assert _outcome(executor._validate_command, "pwd") == _outcome(legacy_validate, "pwd")
+    executor.run("date")
+    ShellCodeExecutor.whitelisted_commands.discard("date")
+    ShellCodeExecutor.whitelisted_commands.add("pwd")
+    for command in ("pwd", "date"):
+        assert _outcome(executor._validate_command, command) == _outcome(legacy_validate, command)
@@ -0,0 +1,87 @@
+import os
+import stat
+import threading
+
+import pytest
+from src.container_pool import ContainerPool
+from src.isolation import run_container
+
+# Minimal stand-in for the docker CLI: containers are files in $STATE and
+# every invocation is appended to $STATE/log.
+FAKE_DOCKER = """#!/bin/sh
+STATE="$(dirname "$0")/state"
+mkdir -p "$STATE"
+echo "$1" >> "$STATE/log"
+case "$1" in
+  run)
+    shift
+    if [ "$1" = "-d" ]; then
+      id="c$(ls "$STATE" | wc -l | tr -d ' ')"
+      touch "$STATE/$id"
+      echo "$id"
+      exit 0
+    fi
+    shift 2
+    [ "$1" = "sh" ] && exec sh -c "$3"
+    ;;
+  exec)
+    [ -f "$STATE/$2" ] || { echo "No such container: $2" >&2; exit 1; }
+    exec sh -c "$5"
+    ;;
+  rm)
+    rm -f "$STATE/$3"
+    ;;
+esac
+"""
+
+
+@pytest.fixture
+def docker(tmp_path):
+    path = tmp_path / "docker"
+    path.write_text(FAKE_DOCKER)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def _log(docker):
+    with open(os.path.join(os.path.dirname(docker), "state", "log")) as f:
+        return f.read().split()
+
+
+def test_run_container_uses_injected_binary(docker):
+    assert run_container("alpine", "echo cold", docker=docker) == "cold\n"
+
+
+def test_pool_reuses_and_recycles_containers(docker):
+    with ContainerPool(size=1, max_uses=3, docker=docker) as pool:
+        outputs = [pool.run("alpine", f"echo {i}") for i in range(4)]
+        assert outputs == [f"{i}\n" for i in range(4)]
+        assert pool.stats["started"] == 2
+        assert pool.stats["recycled"] == 1
+        assert _log(docker).count("exec") == 4
+
+        with pytest.raises(RuntimeError):
+            pool.run("alpine", "exit 3")
+        assert pool.idle_count("alpine") == 0
+        assert pool.stats["recycled"] == 2
+
+
+def test_pool_falls_back_when_exhausted(docker):
+    pool = ContainerPool(size=1, docker=docker)
+    barrier = threading.Barrier(2)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(pool.run("alpine", "sleep 0.3; echo ok"))
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+    assert results == ["ok\n", "ok\n"]
+    assert pool.stats["fallbacks"] == 1
+    with pytest.raises(RuntimeError):
+        pool.run("alpine", "echo closed")
@@ -0,0 +1,66 @@
+import pytest
+from src.agent import ConcreteAgent
+from src.conversation import Conversation, estimate_tokens
+
+
+def test_tokens_are_counted_once_and_history_trimmed():
+    counted = []
+
+    def counter(text):
+        counted.append(text)
+        return len(text)
+
+    history = Conversation(max_tokens=30, token_counter=counter)
+    for i in range(10):
+        history.append("user", f"message {i}")
+    assert counted == [f"message {i}" for i in range(10)]
+    assert history.total_tokens <= 30
+    assert [m["content"] for m in history.messages()] == ["message 8", "message 9"]
+    assert history.dropped == 8
+    history.clear()
+    assert history.dropped == 0 and history.total_tokens == 0 and history.messages() == []
+
+
+def test_dropped_turns_are_summarized():
+    def summarizer(previous, dropped):
+        return " ".join(filter(None, [previous] + [m["content"] for m in dropped]))[-20:]
+
+    history = Conversation(max_tokens=40, summarizer=summarizer, summary_tokens=10)
+    for word in ("alpha", "beta", "gamma", "delta", "epsilon", "zeta"):
+        history.append("user", word * 4)
+    messages = history.messages()
+    assert messages[0]["role"] == "system" and "Summary" in messages[0]["content"]
+    assert messages[-1]["content"] == "zeta" * 4
+    with pytest.raises(ValueError):
+        Conversation(max_tokens=10, summary_tokens=10)
+
+
+def test_agent_sends_history(fake_completion):
+    agent = ConcreteAgent(model="flash", history=Conversation(max_tokens=1000))
+    assert agent("hi") == "<response>echo: hi</response>"
+    agent("again")
+    sent = fake_completion.calls[-1]["messages"]
+    assert [m["role"] for m in sent] == ["user", "assistant", "user"]
+    assert sent[1]["content"] == "echo: hi"
+    assert len(agent.history) == 4
+
+
+def test_summary_is_cut_to_its_budget():
+    history = Conversation(max_tokens=40, summarizer=lambda previous, dropped: "x" * 400, summary_tokens=20)
+    for word in ("alpha", "beta", "gamma", "delta", "epsilon", "zeta"):
+        history.append("user", word * 4)
+    assert 0 < history._summary_count <= 20
+    assert history.total_tokens <= 40
+    summary = history.messages()[0]["content"][len(Conversation.summary_prefix):]
+    assert summary == "x" * len(summary) and estimate_tokens(summary) + 4 <= 20
+
+
+def test_failed_turn_is_rolled_back(fake_completion):
+    agent = ConcreteAgent(model="flash", history=Conversation(max_tokens=1000))
+    agent("hi")
+    fake_completion.reply = lambda messages: 1 / 0
+    with pytest.raises(Exception):
+        agent("boom")
+    assert [m["content"] for m in agent.history.messages()] == ["hi", "echo: hi"]
+    with pytest.raises(IndexError):
+        Conversation().pop()
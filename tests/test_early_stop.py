@@ -0,0 +1,45 @@
+from conftest import make_chunk
+from src.early_stop import generate_with_early_stopping, run_with_early_stopping
+from src.envs import Env1, Env2
+
+
+def test_run_stops_and_closes_the_stream():
+    closed = []
+
+    def chunks():
+        try:
+            yield from ["a", "b", "aa", "a", "a", "a"]
+        finally:
+            closed.append(True)
+
+    env = Env1(char_count_penalty_start=3)
+    report = run_with_early_stopping(chunks(), env.incremental(), max_tokens=10)
+    assert report.text == "abaaa" and report.reward == env(report.text) == 1
+    assert report.stopped and closed == [True]
+    assert report.generated_tokens == 4 and report.tokens_saved == 6
+
+    report = run_with_early_stopping(iter(["ab", "c"]), Env2(max_char_count=5).incremental(), max_tokens=10)
+    assert not report.stopped and report.reason is None and report.tokens_saved == 0
+
+
+def test_generate_closes_the_upstream_response(monkeypatch):
+    import litellm
+    pulled, closed = [], []
+
+    def completion(model, messages, max_tokens, temperature, stream=False, **kwargs):
+        def chunks():
+            try:
+                for _ in range(max_tokens):
+                    pulled.append(1)
+                    yield make_chunk("aa ")
+            finally:
+                closed.append(True)
+        return chunks()
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    env = Env1(char_count_penalty_start=5)
+    report = generate_with_early_stopping("say a", "flash", env.incremental(), max_tokens=50)
+    assert report.stopped and report.text == "aa aa aa "
+    assert report.reward == env(report.text) == 1
+    assert len(pulled) == 3 and closed == [True]
+    assert report.tokens_saved == 47
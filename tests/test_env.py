@@ -19,3 +19,49 @@ def test_env_1_defaults():
     env_1 = Env1()
     assert env_1.target_char == "a"
     assert env_1.char_count_penalty_start == 23
+
+
+def test_score_batch_matches_scalar():
+    pytest.importorskip("numpy")
+    samples = ["aaa", "", "aé a", None, "a" * 30, "bjkldfjdfdjj", "ééé", 7]
+    for env in (Env1(), Env1(target_char="é", char_count_penalty_start=1), Env2(max_char_count=5)):
+        assert env.score_batch(samples).tolist() == [env(s) for s in samples]
+
+
+def test_score_batch_handles_lone_surrogates():
+    pytest.importorskip("numpy")
+    samples = ["a\ud800a", "\udfff", "aa"]
+    for env in (Env1(), Env1(target_char="\ud800", char_count_penalty_start=0), Env2(max_char_count=2)):
+        assert env.score_batch(samples).tolist() == [env(s) for s in samples]
+
+
+def test_incremental_rewards_match_full_text():
+    chunks = ["ab", "", "aé a", "bbb", "a" * 5, "xyz", "a" * 20]
+    for env, evaluator in ((Env1(char_count_penalty_start=3), Env1(char_count_penalty_start=3).incremental(False)),
+                           (Env1(), Env1().incremental(False)),
+                           (Env2(max_char_count=7), Env2(max_char_count=7).incremental())):
+        text = ""
+        for chunk in chunks:
+            evaluator.update(chunk)
+            text += chunk
+            assert evaluator.reward == env(text)
+        assert evaluator.chars == len(text) and evaluator.chunks == len(chunks)
+
+
+def test_incremental_rewards_stop():
+    evaluator = Env1(char_count_penalty_start=3).incremental()
+    assert [evaluator.update(chunk) for chunk in ["a", "ba", "a", "a"]] == [False, False, False, True]
+    assert evaluator.stopped and evaluator.best_reward == 3 and evaluator.reward == 1
+
+    evaluator = Env1(char_count_penalty_start=3).incremental(stop_on_penalty=False, patience=2)
+    assert [evaluator.update(chunk) for chunk in ["aaa", "a", "a", "a"]] == [False, False, True, True]
+    evaluator.reset()
+    assert not evaluator.stopped and evaluator.reward == 0 and evaluator.chunks == 0
+
+    evaluator = Env2(max_char_count=4).incremental()
+    assert [evaluator.update(chunk) for chunk in ["ab", "cd", "e"]] == [False, False, True]
+    assert evaluator.reward == 1
+    with pytest.raises(ValueError):
+        Env2().incremental(patience=0)
+    with pytest.raises(TypeError):
+        IncrementalReward()
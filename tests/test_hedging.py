@@ -0,0 +1,204 @@
+import re
+import threading
+import time
+
+import pytest
+from conftest import make_chunk, make_response
+from src.hedging import Hedger
+from src.llm_cache import ResponseCache
+from src.llm_utils import litellm_completion, litellm_streaming, litellm_streaming_raw, set_response_cache
+
+
+class SlowBackend:
+    """Fake litellm.completion whose latency per model is scripted."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.calls = []
+        self.closed = []
+
+    def __call__(self, model, messages, max_tokens, temperature, stream=False, **kwargs):
+        self.calls.append(model)
+        delay = self.latencies[model].pop(0) if isinstance(self.latencies[model], list) else self.latencies[model]
+        content = f"{model}: {messages[-1]['content']}"
+        if not stream:
+            time.sleep(delay)
+            return make_response(content)
+        return self._stream(model, content, delay)
+
+    def _stream(self, model, content, delay):
+        try:
+            time.sleep(delay)
+            for part in re.findall(r"\S+\s*", content):
+                yield make_chunk(part)
+        finally:
+            self.closed.append(model)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    import litellm
+    backend = SlowBackend({"openrouter/slow": 0.5, "openrouter/fast": 0.0})
+    monkeypatch.setattr(litellm, "completion", backend)
+    return backend
+
+
+def test_fast_primary_is_not_hedged(backend):
+    hedger = Hedger(fallback_model="openrouter/fast", initial_delay=0.2)
+    assert litellm_completion("hi", "openrouter/fast", hedge=hedger) == "<response>openrouter/fast: hi</response>"
+    assert backend.calls == ["openrouter/fast"]
+    assert hedger.last_outcome.winner == "primary"
+    assert not hedger.last_outcome.hedged
+
+
+def test_slow_primary_loses_to_fallback(backend):
+    hedger = Hedger(fallback_model="openrouter/fast", initial_delay=0.05)
+    start = time.monotonic()
+    assert litellm_completion("hi", "openrouter/slow", hedge=hedger) == "<response>openrouter/fast: hi</response>"
+    assert time.monotonic() - start < 0.4
+    assert hedger.last_outcome.winner == "backup"
+    assert hedger.last_outcome.model == "openrouter/fast"
+    assert hedger.stats == {"requests": 1, "hedged": 1, "primary_wins": 0, "backup_wins": 1}
+
+
+def test_hedge_to_same_model_cuts_the_tail(backend):
+    backend.latencies["openrouter/tail"] = [0.5, 0.0]
+    hedger = Hedger(initial_delay=0.05)
+    assert litellm_completion("hi", "openrouter/tail", hedge=hedger) == "<response>openrouter/tail: hi</response>"
+    assert backend.calls == ["openrouter/tail", "openrouter/tail"]
+    assert hedger.last_outcome.winner == "backup"
+
+
+def test_streaming_races_on_first_chunk_and_closes_loser(backend):
+    hedger = Hedger(fallback_model="openrouter/fast", initial_delay=0.05)
+    chunks = list(litellm_streaming("a b", "openrouter/slow", hedge=hedger))
+    assert "".join(chunks) == "<response>openrouter/fast: </response><response>a </response><response>b</response>"
+    for _ in range(100):
+        if "openrouter/slow" in backend.closed:
+            break
+        time.sleep(0.01)
+    assert "openrouter/slow" in backend.closed
+
+
+def test_silent_loser_is_closed_when_the_winner_starts():
+    class Silent:
+        """A stream that produces nothing until it is closed."""
+
+        def __init__(self):
+            self.closed = threading.Event()
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            self.closed.wait(5)
+            raise StopIteration
+
+        def close(self):
+            self.closed.set()
+
+    silent = Silent()
+
+    def open_stream(model):
+        if model == "openrouter/silent":
+            return silent
+        time.sleep(0.1)
+        return iter(["a", "b"])
+
+    hedger = Hedger(fallback_model="openrouter/fast", initial_delay=0.02)
+    chunks = hedger.stream("openrouter/silent", open_stream)
+    assert next(chunks) == "a"
+    assert silent.closed.is_set()
+    assert list(chunks) == ["b"] and hedger.last_outcome.winner == "backup"
+
+
+def test_silent_generator_loser_stops_when_the_winner_starts(monkeypatch):
+    import litellm
+    closed = threading.Event()
+
+    def completion(model, messages, max_tokens, temperature, stream=False, **kwargs):
+        def chunks():
+            try:
+                if model == "openrouter/fast":
+                    time.sleep(0.1)
+                    yield make_chunk("fast")
+                    return
+                for _ in range(500):  # keep-alive chunks without content
+                    time.sleep(0.01)
+                    yield make_chunk(None)
+                yield make_chunk("silent")
+            finally:
+                if model != "openrouter/fast":
+                    closed.set()
+        return chunks()
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    hedger = Hedger(fallback_model="openrouter/fast", initial_delay=0.02)
+    start = time.monotonic()
+    assert list(litellm_streaming_raw("hi", "openrouter/silent", hedge=hedger)) == ["fast"]
+    assert closed.wait(1) and time.monotonic() - start < 1
+    assert hedger.last_outcome.winner == "backup"
+
+
+def test_cancelled_same_model_loser_is_not_cached(monkeypatch, tmp_path):
+    import litellm
+    calls = []
+
+    def completion(model, messages, max_tokens, temperature, stream=False, **kwargs):
+        calls.append(model)
+        slow = len(calls) == 1
+
+        def chunks():
+            if slow:
+                for _ in range(50):  # keep-alive chunks until the loser notices the lost race
+                    time.sleep(0.01)
+                    yield make_chunk(None)
+            yield make_chunk("hello ")
+            yield make_chunk("world")
+        return chunks()
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    set_response_cache(ResponseCache(directory=str(tmp_path)))
+    try:
+        hedger = Hedger(fallback_model=None, initial_delay=0.05)
+        expected = ["<response>hello </response>", "<response>world</response>"]
+        assert list(litellm_streaming("hi", "openrouter/tail", hedge=hedger)) == expected
+        time.sleep(0.6)  # let the loser notice its lost race and end
+        assert list(litellm_streaming("hi", "openrouter/tail", hedge=hedger)) == expected
+    finally:
+        set_response_cache(None)
+    assert calls == ["openrouter/tail", "openrouter/tail"]
+
+
+def test_delay_follows_observed_percentile():
+    hedger = Hedger(percentile=90, min_samples=10, initial_delay=5.0)
+    assert hedger.delay("m") == 5.0
+    for latency in range(1, 11):
+        hedger.record("m", latency / 10)
+    assert hedger.delay("m") == pytest.approx(0.9)
+    p95 = Hedger(percentile=95, min_samples=20)
+    for latency in range(1, 21):
+        p95.record("m", float(latency))
+    assert p95.delay("m") == 19.0
+    capped = Hedger(min_samples=1, max_delay=0.2)
+    capped.record("m", 1.0)
+    assert capped.delay("m") == 0.2
+
+
+def test_failed_primary_triggers_backup_immediately():
+    hedger = Hedger(initial_delay=10.0)
+    attempts = []
+
+    def request(model):
+        attempts.append(threading.current_thread().name)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    start = time.monotonic()
+    assert hedger.complete("m", request) == "ok"
+    assert time.monotonic() - start < 1.0
+    assert hedger.last_outcome.winner == "backup"
+
+    with pytest.raises(RuntimeError, match="first"):
+        hedger.complete("m", lambda model: (_ for _ in ()).throw(RuntimeError("first")))
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys
+import src
+from src import Env1, Env2, ShellCodeExecutor, parse_xml, Agent
+print(json.dumps({"litellm": "litellm" in sys.modules}))
+"""
+
+
+def _probe(script=_PROBE):
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_import_does_not_load_litellm():
+    assert _probe()["litellm"] is False
+
+
+_CALL_PROBE = """
+import json, sys
+import src
+before = "litellm" in sys.modules
+
+class Echo:
+    def complete(self, model, messages, max_tokens, temperature):
+        return "echo"
+
+    def stream(self, model, messages, max_tokens, temperature):
+        yield "echo"
+
+src.set_backend(Echo())
+reply = src.litellm_completion("hi", "flash")
+print(json.dumps({"before": before, "after": "litellm" in sys.modules, "reply": reply}))
+"""
+
+
+def test_first_llm_call_loads_litellm():
+    assert _probe(_CALL_PROBE) == {"before": False, "after": True, "reply": "<response>echo</response>"}
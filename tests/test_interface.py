@@ -1,11 +1,58 @@
+import io
+import time
+
 import pytest
+from src.agent import ConcreteAgent
 from src.interface import *
-
-
+from src.interface import _CoalescingWriter
 from src.reflection import python_reflection_test
 
+
 def test_reflection():
     reflection_test_var = python_reflection_test()
     assert isinstance(reflection_test_var, str)
     assert "Functions:" in reflection_test_var
     assert "Classes:" in reflection_test_var
+
+
+class Ticks:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_console_streams_with_coalesced_writes(fake_completion, monkeypatch):
+    fake_completion.reply = lambda messages: " ".join(["word"] * 20) + " <done>"
+    out = io.StringIO()
+    writes = []
+    out.write = lambda text, write=out.write: (writes.append(text), write(text))[1]
+    console = ConsoleInterface(streaming=True, flush_interval=0.05, output=out, clock=Ticks(0.01))
+    inputs = iter(["hi", "exit"])
+    monkeypatch.setattr(console, "get_input", lambda prompt: next(inputs))
+    console.interact_with_agent(ConcreteAgent(model="flash"))
+
+    text = out.getvalue()
+    assert text.startswith("Agent: " + "word " * 20 + "<done>\n")
+    assert "tokens/s]" in text
+    stats = console.last_stream_stats
+    assert stats["tokens"] == 21
+    assert stats["time_to_first_token"] > 0
+    assert stats["tokens_per_second"] > 0
+    assert stats["writes"] < stats["tokens"] / 2
+    assert len(writes) == stats["writes"] + 1
+
+
+def test_buffered_text_is_written_after_a_pause():
+    out = io.StringIO()
+    writer = _CoalescingWriter(out, 0.05, time.monotonic)
+    writer.write("hello")
+    assert out.getvalue() == ""
+    time.sleep(0.2)
+    assert out.getvalue() == "hello" and writer.writes == 1
+    writer.write(" world")
+    writer.flush()
+    assert out.getvalue() == "hello world"
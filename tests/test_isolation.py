@@ -0,0 +1,59 @@
+import pytest
+from src.isolation import IsolatedEnvironment
+
+
+@pytest.fixture(params=[False, True], ids=["spawn", "session"])
+def env(request):
+    env = IsolatedEnvironment(timeout=2, session=request.param)
+    yield env
+    env.close()
+
+
+def test_execute_output_and_errors(env):
+    assert env.execute("echo hi") == "hi\n"
+    assert env.execute("printf abc") == "abc"
+    with pytest.raises(RuntimeError, match="boom"):
+        env.execute("echo boom >&2; false")
+
+
+def test_session_keeps_state_and_recovers():
+    env = IsolatedEnvironment(timeout=1, session=True)
+    env.execute("cd /tmp && X=1")
+    assert env.execute("pwd; echo $X") == "/tmp\n1\n"
+    with pytest.raises(TimeoutError):
+        env.execute("sleep 5")
+    assert env.execute("pwd") != "/tmp\n"
+    with pytest.raises(RuntimeError):
+        env.execute("exit 3")
+    assert env.execute("echo back") == "back\n"
+    assert env.session.spawn_count == 3
+    env.close()
+
+
+BIG = "head -c 3000000 /dev/zero | tr '\\0' x; printf END"
+
+
+@pytest.mark.parametrize("session", [False, True], ids=["spawn", "session"])
+def test_bounded_capture_spills_and_truncates(session):
+    env = IsolatedEnvironment(session=session, max_output_bytes=1024)
+    with env.execute("echo small") as small:
+        assert small.data == b"small\n" and not small.spilled
+    with env.execute(BIG) as spilled:
+        assert spilled.spilled and spilled.total_bytes == 3000003
+        assert spilled.data[-3:] == b"END"
+    with pytest.raises(RuntimeError, match="bad"):
+        env.execute("echo bad >&2; exit 1")
+    env.close()
+
+    env = IsolatedEnvironment(session=session, max_output_bytes=100, overflow="truncate")
+    with env.execute(BIG) as truncated:
+        assert truncated.truncated and truncated.omitted_bytes == 3000003 - 100
+        assert truncated.text().startswith("x" * 50) and truncated.text().endswith("END")
+    env.close()
+
+
+def test_bounded_capture_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        IsolatedEnvironment(max_output_bytes=0)
+    with pytest.raises(ValueError):
+        IsolatedEnvironment(overflow="drop")
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+
+import pytest
+from src.agent import ConcreteAgent
+from src.hedging import Hedger
+from src.llm_backend import RecordingBackend, ReplayBackend
+from src.llm_cache import ResponseCache
+from src.llm_utils import (get_backend, litellm_abatch_completion, litellm_acompletion, litellm_completion,
+                           litellm_streaming, set_backend)
+
+
+class Ticks:
+    """Clock advancing by 0.5s per reading."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.5
+        return self.now
+
+
+@pytest.fixture
+def cassette(tmp_path, fake_completion):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = RecordingBackend(path, clock=Ticks())
+    set_backend(recorder)
+    try:
+        assert litellm_completion("hi", "flash") == "<response>echo: hi</response>"
+        assert list(litellm_streaming("a <b>", "flash")) == [
+            "<response>echo: </response>", "<response>a </response>", "<response>&lt;b&gt;</response>"]
+    finally:
+        set_backend(None)
+    assert recorder.recorded == 2
+    return path
+
+
+def test_cassette_records_content_chunks_and_timings(cassette):
+    with open(cassette, encoding="utf-8") as f:
+        completion, stream = [json.loads(line) for line in f]
+    assert completion["content"] == "echo: hi"
+    assert completion["latency"] == 0.5
+    assert stream["chunks"] == ["echo: ", "a ", "<b>"]
+    assert stream["delays"] == [0.5, 0.5, 0.5]
+
+
+def test_replay_serves_recordings_without_the_provider(cassette, fake_completion):
+    calls = len(fake_completion.calls)
+    set_backend(ReplayBackend(cassette))
+    try:
+        assert ConcreteAgent(model="flash")("hi") == "<response>echo: hi</response>"
+        assert "".join(litellm_streaming("a <b>", "flash")) == (
+            "<response>echo: </response><response>a </response><response>&lt;b&gt;</response>")
+        with pytest.raises(RuntimeError, match="No recorded response"):
+            litellm_completion("never asked", "flash")
+    finally:
+        set_backend(None)
+    assert len(fake_completion.calls) == calls
+
+
+def test_async_calls_use_the_backend(cassette, fake_completion, monkeypatch):
+    import litellm
+
+    async def acompletion(**kwargs):
+        raise AssertionError("the replay backend must serve async calls")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    calls = len(fake_completion.calls)
+    set_backend(ReplayBackend(cassette))
+    try:
+        assert asyncio.run(litellm_acompletion("hi", "flash")) == "<response>echo: hi</response>"
+        results = asyncio.run(litellm_abatch_completion(["hi", "never asked"], "flash"))
+    finally:
+        set_backend(None)
+    assert results[0] == "<response>echo: hi</response>"
+    assert isinstance(results[1], RuntimeError) and "No recorded response" in str(results[1])
+    assert len(fake_completion.calls) == calls
+
+
+def test_replay_at_recorded_speed(cassette):
+    sleeps = []
+    replay = ReplayBackend(cassette, speed=2.0, sleep=sleeps.append)
+    set_backend(replay)
+    try:
+        litellm_completion("hi", "flash")
+        list(litellm_streaming("a <b>", "flash"))
+    finally:
+        set_backend(None)
+    assert sleeps == [0.25, 0.25, 0.25, 0.25]
+    assert replay.served == 2
+
+
+def test_set_backend_validates():
+    with pytest.raises(TypeError):
+        set_backend(object())
+    set_backend(None)
+    assert type(get_backend()).__name__ == "LiteLLMBackend"
+
+
+def test_cancelled_hedge_attempt_is_not_recorded(tmp_path):
+    source = tmp_path / "source.jsonl"
+    entry = {"key": ResponseCache.make_key("m", [{"role": "user", "content": "hi"}], 10, 0.7, True),
+             "model": "m", "chunks": ["a", "b"]}
+    source.write_text(json.dumps({**entry, "delays": [0.3, 0.0]}) + "\n"
+                      + json.dumps({**entry, "delays": [0.0, 0.0]}) + "\n")
+    recorder = RecordingBackend(str(tmp_path / "cassette.jsonl"), ReplayBackend(str(source), speed=1.0))
+    hedger = Hedger(initial_delay=0.05)
+    messages = [{"role": "user", "content": "hi"}]
+    assert list(hedger.stream("m", lambda name: recorder.stream(name, messages, 10, 0.7))) == ["a", "b"]
+    time.sleep(0.5)  # the slow primary wakes up, sees it lost and must not be recorded
+    assert hedger.last_outcome.winner == "backup"
+    assert recorder.recorded == 1
@@ -0,0 +1,59 @@
+import pytest
+from src.llm_cache import ResponseCache
+from src.llm_utils import litellm_completion, litellm_streaming, set_response_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path), max_memory_entries=2)
+    set_response_cache(cache)
+    yield cache
+    set_response_cache(None)
+
+
+def test_memory_lru_and_disk_tier(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path), max_memory_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    assert cache.get("a") == "A"
+    assert cache.stats["disk_hits"] == 1
+    assert cache.get("a") == "A"
+    assert cache.stats["memory_hits"] == 1
+    assert cache.get("missing") is None
+    assert cache.stats["misses"] == 1
+
+    reopened = ResponseCache(directory=str(tmp_path))
+    assert reopened.get("c") == "C"
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(directory=str(tmp_path), ttl=10, max_disk_bytes=120, clock=clock)
+    cache.set("old", "x" * 40)
+    cache.set("new", "y" * 40)
+    assert len(list(tmp_path.iterdir())) == 1
+    clock.now += 11
+    assert cache.get("new") is None
+
+
+def test_completion_is_cached_and_bypassable(fake_completion, cache):
+    first = litellm_completion("hi", "flash")
+    assert litellm_completion("hi", "flash") == first
+    assert len(fake_completion.calls) == 1
+    litellm_completion("hi", "flash", use_cache=False)
+    assert len(fake_completion.calls) == 2
+    assert cache.hit_rate == 0.5
+
+
+def test_streaming_replays_cached_chunks(fake_completion, cache):
+    first = list(litellm_streaming("hello there", "flash"))
+    assert list(litellm_streaming("hello there", "flash")) == first
+    assert len(fake_completion.calls) == 1
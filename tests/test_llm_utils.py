@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+from conftest import make_chunk
+from src.llm_utils import *
+
+
+def test_completion_wraps_and_escapes(fake_completion):
+    assert litellm_completion("a<b", "flash") == "<response>echo: a&lt;b</response>"
+    assert fake_completion.calls[0]["model"] == "openrouter/google/gemini-2.0-flash-001"
+
+
+def test_batch_completion_keeps_order_and_reports_errors(fake_completion):
+    prompts = [f"p{i}" for i in range(20)] + [""]
+    results = litellm_batch_completion(prompts, "flash", concurrency=4)
+    assert results[:20] == [f"<response>echo: p{i}</response>" for i in range(20)]
+    assert isinstance(results[20], ValueError)
+
+
+def test_batch_completion_rejects_bad_concurrency():
+    with pytest.raises(ValueError):
+        litellm_batch_completion(["hi"], "flash", concurrency=0)
+
+
+def test_abatch_completion(monkeypatch, tmp_path):
+    import litellm
+    from conftest import make_response
+    from src.llm_cache import ResponseCache
+    calls = []
+
+    async def fake_acompletion(model, messages, max_tokens, temperature, **kwargs):
+        calls.append(messages[0]["content"])
+        if messages[0]["content"] == "boom":
+            raise RuntimeError("boom")
+        await asyncio.sleep(0)
+        return make_response(None if messages[0]["content"] == "empty" else messages[0]["content"])
+
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+    results = asyncio.run(litellm_abatch_completion(["a", "boom", "c", "empty"], "flash", concurrency=2))
+    assert results[0] == "<response>a</response>"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "<response>c</response>"
+    assert isinstance(results[3], RuntimeError) and "No content" in str(results[3])
+
+    set_response_cache(ResponseCache(directory=str(tmp_path)))
+    try:
+        asyncio.run(litellm_abatch_completion(["a"], "flash"))
+        asyncio.run(litellm_abatch_completion(["a"], "flash"))
+        asyncio.run(litellm_abatch_completion(["a"], "flash", use_cache=False))
+    finally:
+        set_response_cache(None)
+    assert calls.count("a") == 3
+
+
+def test_streaming_raw_yields_plain_deltas_with_metrics(fake_completion):
+    from src.llm_utils import litellm_streaming_raw, wrap_response
+    from src.stream_metrics import StreamMetrics
+
+    fake_completion.reply = lambda messages: "a <b> & c"
+    metrics = StreamMetrics()
+    chunks = list(litellm_streaming_raw("hi", "flash", metrics=metrics))
+    assert chunks == ["a ", "<b> ", "& ", "c"]
+    assert wrap_response("".join(chunks)) == litellm_completion("hi", "flash")
+    assert metrics.chunks == 4 and metrics.chars == 9
+    assert metrics.first_token_latency is not None and len(metrics.gaps) == 3
+
+
+def test_streaming_raw_coalesces_by_size_and_delay(fake_completion):
+    from src.llm_utils import litellm_streaming_raw
+
+    fake_completion.reply = lambda messages: "one two three four five"
+    assert list(litellm_streaming_raw("hi", "flash", max_chunk_chars=8)) == ["one two ", "three four ", "five"]
+
+    assert list(litellm_streaming_raw("hi", "flash", flush_after=10)) == ["one two three four five"]
+    with pytest.raises(ValueError):
+        list(litellm_streaming_raw("hi", "flash", max_chunk_chars=0))
+    with pytest.raises(ValueError):
+        list(litellm_streaming_raw("hi", "flash", flush_after=0))
+
+
+def test_streaming_raw_flushes_buffer_when_upstream_stalls(monkeypatch):
+    import litellm
+    from src.llm_utils import litellm_streaming_raw
+
+    def completion(model, messages, max_tokens, temperature, stream=False, **kwargs):
+        yield make_chunk("a ")
+        yield make_chunk("b ")
+        time.sleep(0.5)
+        yield make_chunk("c")
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    start = time.monotonic()
+    chunks = litellm_streaming_raw("hi", "flash", max_chunk_chars=100, flush_after=0.05)
+    assert next(chunks) == "a b "
+    assert time.monotonic() - start < 0.4
+    assert list(chunks) == ["c"]
@@ -0,0 +1,88 @@
+import pytest
+from src.agent import ConcreteAgent
+from src.memory import MemoryStore
+
+
+def test_search_replace_protocol():
+    store = MemoryStore()
+    store.update("", "The user wrote just hi.")
+    store.update("", "Name: Ada")
+    assert store.render() == "The user wrote just hi.\nName: Ada"
+    assert store.update("Name: Ada", "Name: Ada Lovelace")
+    assert store.update("just hi", "hello")
+    assert store.render() == "The user wrote hello.\nName: Ada Lovelace"
+    assert store.update("hello.\nName", "hi.\nFull name")
+    assert store.render() == "The user wrote hi.\nFull name: Ada Lovelace"
+    assert not store.update("missing", "x")
+    assert store.update("The user wrote hi.", "")
+    assert store.render() == "\nFull name: Ada Lovelace"
+    assert len(store) == len(store.render())
+
+
+def test_replaces_first_occurrence_before_an_exact_segment():
+    store = MemoryStore()
+    for text in ("likes tea and cake", "tea"):
+        store.update("", text)
+    assert store.update("tea", "coffee")
+    assert store.render() == "likes coffee and cake\ntea"
+
+
+def test_first_match_may_span_segments():
+    store = MemoryStore()
+    for text in ("ab", "cd", "b\ncx"):
+        store.update("", text)
+    assert store.update("b\nc", "Z")
+    assert store.render() == "aZd\nb\ncx"
+    assert store.segments == ["aZd", "b\ncx"]
+
+
+@pytest.mark.parametrize("search, rendered", [("B", "A\n\nC"), ("A\nB", "\nC"), ("B\nC", "A\n")])
+def test_deleting_whole_segments_matches_str_replace(search, rendered):
+    store = MemoryStore()
+    for text in ("A", "B", "C"):
+        store.update("", text)
+    assert store.update(search, "")
+    assert store.render() == rendered == "A\nB\nC".replace(search, "", 1)
+    assert len(store) == len(rendered)
+
+
+def test_spanning_update_keeps_blank_lines_and_other_references():
+    store = MemoryStore(max_chars=30, eviction="least-referenced")
+    for text in ("keep", "one", "two\n\nthree"):
+        store.update("", text)
+    assert store.update("keep", "kept")
+    assert store.update("kept", "kept")
+    assert store.update("one\ntwo", "1\n2")
+    assert store.render() == "kept\n1\n2\n\nthree"
+    store.update("", "a long new segment")
+    assert store.render() == "kept\na long new segment"
+
+
+def test_render_is_cached_until_changed():
+    store = MemoryStore()
+    store.update("", "a")
+    first = store.render()
+    assert store.render() is first
+    store.update("a", "b")
+    assert store.render() == "b"
+
+
+@pytest.mark.parametrize("eviction, survivor", [("oldest", "two"), ("least-referenced", "one")])
+def test_size_cap_eviction(eviction, survivor):
+    store = MemoryStore(max_chars=8, eviction=eviction)
+    store.update("", "one")
+    store.update("", "two")
+    store.update("one", "one")
+    store.update("", "333")
+    assert store.render() == f"{survivor}\n333"
+    assert store.evictions == 1
+    assert len(store) <= 8
+
+
+def test_agent_memory_uses_store():
+    agent = ConcreteAgent()
+    assert agent.memory == ""
+    agent._update_memory("", "The user wrote just hi.")
+    assert agent.memory == "The user wrote just hi."
+    agent.memory = "reset"
+    assert agent.memory_store.segments == ["reset"]
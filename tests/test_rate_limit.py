@@ -0,0 +1,149 @@
+import random
+import threading
+
+import litellm
+import pytest
+from src.llm_utils import last_permit, litellm_completion, litellm_streaming, set_rate_limiter
+from src.rate_limit import AdaptiveConcurrencyLimiter, RateLimiter, TokenBucket
+
+
+class FakeTime:
+    """Clock whose sleep() advances it instead of blocking."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time():
+    return FakeTime()
+
+
+@pytest.fixture
+def limiter(fake_time):
+    limiter = RateLimiter(requests_per_minute=60, clock=fake_time.clock, sleep=fake_time.sleep,
+                          rng=random.Random(0))
+    set_rate_limiter(limiter)
+    yield limiter
+    set_rate_limiter(None)
+
+
+def rate_limited(fake, failures):
+    """Make fake raise a 429 for its first `failures` calls."""
+    original = fake.reply
+
+    def reply(messages):
+        if len(fake.calls) <= failures:
+            raise litellm.RateLimitError("slow down", "openrouter", fake.calls[-1]["model"])
+        return original(messages)
+
+    fake.reply = reply
+
+
+def test_token_bucket_spaces_requests(fake_time):
+    bucket = TokenBucket(60, capacity=2, clock=fake_time.clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+    fake_time.now += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_aimd_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, maximum=10)
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == 4
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 7
+    for _ in range(200):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 10
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial=0)
+
+
+def test_concurrency_limit_blocks_until_release():
+    limiter = AdaptiveConcurrencyLimiter(initial=1, maximum=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    limiter.release()
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_retries_rate_limited_completion(fake_completion, limiter, fake_time):
+    rate_limited(fake_completion, 2)
+    assert litellm_completion("hi", "openrouter/some-model") == "<response>echo: hi</response>"
+    assert len(fake_completion.calls) == 3
+    assert last_permit().retries == 2
+    assert limiter.stats["overloads"] == 2
+    assert limiter.concurrency("openrouter/some-model").limit == 2  # 4 -> 2 -> 1, then +1 on success
+    assert len(fake_time.sleeps) == 2
+    assert 0 <= fake_time.sleeps[1] <= 1.0
+
+
+def test_gives_up_after_max_retries(fake_completion, limiter):
+    rate_limited(fake_completion, 10)
+    with pytest.raises(RuntimeError, match="slow down"):
+        litellm_completion("hi", "openrouter/some-model")
+    assert len(fake_completion.calls) == limiter.max_retries + 1
+
+
+def test_non_retryable_errors_are_not_retried(fake_completion, limiter):
+    def reply(messages):
+        raise ValueError("boom")
+
+    fake_completion.reply = reply
+    with pytest.raises(RuntimeError, match="boom"):
+        litellm_completion("hi", "openrouter/some-model")
+    assert len(fake_completion.calls) == 1
+
+
+def test_request_budget_reports_queue_wait(fake_completion, fake_time):
+    set_rate_limiter(RateLimiter(requests_per_minute=1, model_limits={"openrouter/fast": {"requests_per_minute": 600}},
+                                 clock=fake_time.clock, sleep=fake_time.sleep))
+    try:
+        litellm_completion("a", "openrouter/slow")
+        assert last_permit().queue_wait == 0.0
+        litellm_completion("b", "openrouter/slow")
+        assert last_permit().queue_wait == pytest.approx(60.0)
+        litellm_completion("c", "openrouter/fast")
+        assert last_permit().queue_wait == 0.0
+    finally:
+        set_rate_limiter(None)
+
+
+def test_streaming_retries_before_first_chunk(fake_completion, limiter):
+    rate_limited(fake_completion, 1)
+    chunks = list(litellm_streaming("one two", "openrouter/some-model"))
+    assert "".join(chunks) == "<response>echo: </response><response>one </response><response>two</response>"
+    assert last_permit().retries == 1
+    assert limiter.concurrency("openrouter/some-model").in_flight == 0
+
+
+def test_set_rate_limiter_rejects_other_types():
+    with pytest.raises(TypeError):
+        set_rate_limiter(object())
+
+
+def test_closing_a_stream_early_leaves_the_limit_alone(limiter):
+    stream = limiter.stream("m", 0, lambda: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    stream.close()
+    concurrency = limiter.concurrency("m")
+    assert (concurrency.in_flight, concurrency._limit) == (0, limiter.initial_concurrency)
+    assert list(limiter.stream("m", 0, lambda: iter(["a"]))) == ["a"]
+    assert concurrency._limit > limiter.initial_concurrency
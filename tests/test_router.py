@@ -0,0 +1,168 @@
+import threading
+
+import pytest
+from src.agent import ConcreteAgent
+from src.llm_utils import litellm_completion, litellm_streaming
+from src.router import ModelRouter, get_router, register_router, unregister_router
+
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def router():
+    router = ModelRouter("chat", {"openrouter/cheap": 0.1, "deepseek": 1.0}, clock=FakeClock())
+    register_router(router)
+    yield router
+    unregister_router("chat")
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+def failing(fake, model):
+    original = fake.reply
+
+    def reply(messages):
+        if fake.calls[-1]["model"] == model:
+            raise Unavailable(f"{model} is down")
+        return original(messages)
+
+    fake.reply = reply
+
+
+def test_alias_survives_normalization_and_resolves(fake_completion, router):
+    agent = ConcreteAgent(model="router/chat")
+    assert agent.model == "router/chat"
+    assert agent("hi") == "<response>echo: hi</response>"
+    assert fake_completion.calls[-1]["model"] == "openrouter/cheap"
+    decision = router.decisions[-1]
+    assert decision.model == "openrouter/cheap"
+    assert [c["model"] for c in decision.candidates] == ["openrouter/cheap", "deepseek/deepseek-chat"]
+
+
+def test_ranking_uses_latency_errors_and_cost():
+    router = ModelRouter("r", {"openrouter/a": 0.0, "openrouter/b": 5.0}, clock=FakeClock())
+    assert router.rank().candidates[0]["model"] == "openrouter/a"
+    router.record("openrouter/a", 2.0)
+    router.record("openrouter/b", 0.1)
+    assert router.rank().candidates[0]["model"] == "openrouter/b"
+    router.record("openrouter/b", 0.1, error=True)
+    ranked = router.rank().candidates
+    assert ranked[0]["model"] == "openrouter/a"
+    assert ranked[1]["error_rate"] == pytest.approx(0.2)
+
+
+def test_errors_steer_traffic_away(fake_completion, router):
+    failing(fake_completion, "openrouter/cheap")
+    litellm_completion("hi", "router/chat")
+    assert router.decisions[-1].attempts == ["openrouter/cheap", "deepseek/deepseek-chat"]
+    litellm_completion("hi again", "router/chat")
+    assert router.decisions[-1].attempts == ["deepseek/deepseek-chat"]
+
+
+def test_failover_and_circuit_breaking(fake_completion):
+    clock = FakeClock()
+    router = ModelRouter("chat", {"openrouter/cheap": 0.1, "deepseek": 1.0}, error_weight=0.0, clock=clock)
+    register_router(router)
+    failing(fake_completion, "openrouter/cheap")
+    for _ in range(router.failure_threshold):
+        assert litellm_completion("hi", "router/chat", use_cache=False) == "<response>echo: hi</response>"
+        assert router.decisions[-1].attempts == ["openrouter/cheap", "deepseek/deepseek-chat"]
+    calls = len(fake_completion.calls)
+    litellm_completion("hi", "router/chat")
+    assert len(fake_completion.calls) == calls + 1
+    assert router.rank().candidates[-1]["circuit"] == "open"
+
+    clock.now += router.cooldown
+    assert router.rank().candidates[0]["circuit"] == "half-open"
+    fake_completion.reply = lambda messages: "back"
+    assert litellm_completion("hi", "router/chat") == "<response>back</response>"
+    assert router.decisions[-1].attempts == ["openrouter/cheap"]
+    assert {c["circuit"] for c in router.rank().candidates} == {"closed"}
+    unregister_router("router/chat")
+
+
+def test_half_open_circuit_admits_one_probe():
+    clock = FakeClock()
+    router = ModelRouter("probe", {"openrouter/a": 0.0, "openrouter/b": 5.0}, error_weight=0.0, clock=clock)
+    for _ in range(router.failure_threshold):
+        router.record("openrouter/a", 0.1, error=True)
+    clock.now += router.cooldown
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def request(model):
+        calls.append(model)
+        if model == "openrouter/a":
+            started.set()
+            release.wait(5)
+        return model
+
+    probe = threading.Thread(target=router.call, args=(request,))
+    probe.start()
+    assert started.wait(5)
+    assert [router.call(request) for _ in range(3)] == ["openrouter/b"] * 3
+    release.set()
+    probe.join(5)
+    assert calls.count("openrouter/a") == 1
+    assert router.call(request) == "openrouter/a"
+
+
+def test_all_backends_failing_raises(fake_completion, router):
+    fake_completion.reply = lambda messages: (_ for _ in ()).throw(Unavailable("down"))
+    with pytest.raises(RuntimeError, match="down"):
+        litellm_completion("hi", "router/chat")
+    assert router.decisions[-1].error is not None
+
+
+def test_caller_errors_do_not_fail_over_or_count(fake_completion, router):
+    fake_completion.reply = lambda messages: (_ for _ in ()).throw(ValueError("malformed"))
+    with pytest.raises(RuntimeError, match="malformed"):
+        litellm_completion("hi", "router/chat")
+    assert router.decisions[-1].attempts == ["openrouter/cheap"]
+    assert all(c["error_rate"] == 0.0 for c in router.rank().candidates)
+
+
+def test_closing_a_routed_stream_closes_the_backend_stream():
+    router = ModelRouter("s", ["openrouter/a"], clock=FakeClock())
+    opened, closed = [], []
+
+    def chunks_of(model):
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed.append(model)
+
+    def open_stream(model):
+        opened.append(chunks_of(model))  # held here, so only an explicit close ends it
+        return opened[-1]
+
+    chunks = router.stream(open_stream)
+    assert next(chunks) == "a"
+    chunks.close()
+    assert closed == ["openrouter/a"]
+
+
+def test_streaming_fails_over_before_first_chunk(fake_completion, router):
+    failing(fake_completion, "openrouter/cheap")
+    chunks = list(litellm_streaming("a b", "router/chat"))
+    assert "".join(chunks) == "<response>echo: </response><response>a </response><response>b</response>"
+    assert router.decisions[-1].model == "deepseek/deepseek-chat"
+
+
+def test_registry():
+    with pytest.raises(ValueError):
+        ModelRouter("a/b", ["flash"])
+    with pytest.raises(ValueError):
+        ModelRouter("loop", ["router/chat"])
+    with pytest.raises(TypeError):
+        register_router("chat")
+    assert get_router("router/nothing") is None
+    assert get_router("flash") is None
@@ -0,0 +1,255 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from src.agent import ConcreteAgent
+from src.server import AgentClient, AgentServer
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_sessions_over_tcp(fake_completion):
+    async def scenario():
+        server = AgentServer(lambda: ConcreteAgent(model="flash"))
+        host, port = await server.start_tcp()
+        client = await AgentClient.connect_tcp(host, port)
+        try:
+            replies = await asyncio.gather(*(client.ask(f"q{i}", session=f"s{i % 3}") for i in range(9)))
+            assert replies == [f"<response>echo: q{i}</response>" for i in range(9)]
+            assert server.stats["sessions"] == 3
+            chunks = [chunk async for chunk in client.stream("a b", session="s0")]
+            assert chunks == ["echo: ", "a ", "b"]
+        finally:
+            await client.close()
+            await server.close()
+
+    run(scenario())
+
+
+def test_many_idle_connections_over_unix_socket(fake_completion, tmp_path):
+    async def scenario():
+        server = AgentServer(lambda: ConcreteAgent(model="flash"), max_workers=4)
+        path = await server.start_unix(str(tmp_path / "agent.sock"))
+        threads = threading.active_count()
+        clients = [await AgentClient.connect_unix(path) for _ in range(300)]
+        try:
+            await asyncio.sleep(0.05)
+            assert server.stats["connections"] == 300
+            assert threading.active_count() <= threads + 4
+            assert await clients[-1].ask("hi") == "<response>echo: hi</response>"
+        finally:
+            for client in clients:
+                await client.close()
+            await server.close()
+
+    run(scenario())
+
+
+def test_busy_sessions_shed_load(fake_completion):
+    release = threading.Event()
+    original = fake_completion.reply
+    fake_completion.reply = lambda messages: (release.wait(5), original(messages))[1]
+
+    async def scenario():
+        server = AgentServer(lambda: ConcreteAgent(model="flash"), session_concurrency=1, session_queue=1)
+        host, port = await server.start_tcp()
+        client = await AgentClient.connect_tcp(host, port)
+        try:
+            asks = [asyncio.create_task(client.ask(f"q{i}")) for i in range(4)]
+            await asyncio.sleep(0.1)
+            release.set()
+            results = await asyncio.gather(*asks, return_exceptions=True)
+            shed = [r for r in results if isinstance(r, RuntimeError)]
+            assert len(shed) == 2 and all("overloaded" in str(r) for r in shed)
+            assert [r for r in results if isinstance(r, str)] == ["<response>echo: q0</response>",
+                                                                  "<response>echo: q1</response>"]
+            assert server.stats["shed"] == 2
+            with pytest.raises(RuntimeError, match="Bad request"):
+                await client.ask("   ")
+            assert await client.ask("still alive") == "<response>echo: still alive</response>"
+        finally:
+            await client.close()
+            await server.close()
+
+    run(scenario())
+
+
+def test_disconnected_clients_keep_their_work_counted(fake_completion):
+    release = threading.Event()
+    original = fake_completion.reply
+    fake_completion.reply = lambda messages: (release.wait(5), original(messages))[1]
+
+    async def scenario():
+        server = AgentServer(lambda: ConcreteAgent(model="flash"), max_workers=1, max_pending=2)
+        host, port = await server.start_tcp()
+        try:
+            for i in range(5):
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(b'{"id": %d, "input": "q"}\n' % i)
+                await writer.drain()
+                await asyncio.sleep(0.05)
+                writer.close()
+                await asyncio.sleep(0.05)
+            assert server.pending == 2 and server.stats["shed"] == 3
+            assert server._executor._work_queue.qsize() <= 1
+            release.set()
+            for _ in range(100):
+                if server.pending == 0:
+                    break
+                await asyncio.sleep(0.02)
+            assert server.pending == 0
+        finally:
+            release.set()
+            await server.close()
+
+    run(scenario())
+
+
+def test_abandoned_stream_closes_the_agent_stream():
+    closed = threading.Event()
+
+    class EndlessAgent:
+        def __call__(self, text):
+            return text
+
+        def stream(self, text):
+            try:
+                while True:
+                    yield "more "
+                    time.sleep(0.01)
+            finally:
+                closed.set()
+
+    async def scenario():
+        server = AgentServer(EndlessAgent)
+        host, port = await server.start_tcp()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b'{"id": 1, "input": "q", "stream": true}\n')
+            await writer.drain()
+            await reader.readline()
+            writer.close()
+            for _ in range(100):
+                if closed.is_set() and server.pending == 0:
+                    break
+                await asyncio.sleep(0.02)
+            assert closed.is_set() and server.pending == 0
+        finally:
+            await server.close()
+
+    run(scenario())
+
+
+def test_slow_reader_applies_backpressure():
+    produced = []
+
+    class FloodAgent:
+        def __call__(self, text):
+            return text
+
+        def stream(self, text):
+            for _ in range(100_000):
+                produced.append(1)
+                yield "x" * 65536
+
+    async def scenario():
+        server = AgentServer(FloodAgent)
+        host, port = await server.start_tcp()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b'{"id": 1, "input": "q", "stream": true}\n')
+            await writer.drain()
+            await asyncio.sleep(0.5)
+            assert len(produced) < 1000
+            writer.close()
+            for _ in range(100):
+                if server.pending == 0:
+                    break
+                await asyncio.sleep(0.05)
+            assert server.pending == 0
+        finally:
+            await server.close()
+
+    run(scenario())
+
+
+def test_flooded_server_sheds_before_building_agents():
+    release = threading.Event()
+    built = []
+
+    class BlockingAgent:
+        def __init__(self):
+            built.append(self)
+
+        def __call__(self, text):
+            release.wait(5)
+            return text
+
+    async def scenario():
+        server = AgentServer(BlockingAgent, max_pending=1)
+        host, port = await server.start_tcp()
+        client = await AgentClient.connect_tcp(host, port)
+        try:
+            first = asyncio.create_task(client.ask("q", session="s0"))
+            await asyncio.sleep(0.05)
+            for i in range(1, 4):
+                with pytest.raises(RuntimeError, match="server busy"):
+                    await client.ask("q", session=f"s{i}")
+            assert len(built) == 1 and server.stats["sessions"] == 1
+            release.set()
+            assert await first == "q"
+        finally:
+            release.set()
+            await client.close()
+            await server.close()
+
+    run(scenario())
+
+
+def test_error_for_a_vanished_client_is_dropped():
+    class FailingAgent:
+        def __call__(self, text):
+            raise RuntimeError("boom")
+
+    async def send(message):
+        raise ConnectionError("client gone")
+
+    async def scenario():
+        server = AgentServer(FailingAgent)
+        try:
+            await server._handle_request(b'{"id": 1, "input": "q"}', {}, send)
+            await server._handle_request(b'{"id": 2}', {}, send)
+        finally:
+            await server.close()
+        assert server.pending == 0 and server.stats["errors"] == 2
+
+    run(scenario())
+
+
+def test_stream_ending_in_a_base_exception_releases_the_session():
+    class AbortingAgent:
+        def __call__(self, text):
+            return text
+
+        def stream(self, text):
+            yield "partial "
+            raise KeyboardInterrupt
+
+    async def scenario():
+        server = AgentServer(AbortingAgent)
+        host, port = await server.start_tcp()
+        client = await AgentClient.connect_tcp(host, port)
+        try:
+            with pytest.raises(RuntimeError, match="KeyboardInterrupt"):
+                async for _ in client.stream("q"):
+                    pass
+            assert server.pending == 0
+            assert await client.ask("still served") == "still served"
+        finally:
+            await client.close()
+            await server.close()
+
+    run(scenario())
@@ -0,0 +1,130 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.llm_utils import get_single_flight, litellm_completion, litellm_streaming
+from src.single_flight import SingleFlight
+
+
+def blocking(fake, release):
+    """Make fake wait for release before answering, so calls overlap."""
+    original = fake.reply
+
+    def reply(messages):
+        release.wait(5)
+        return original(messages)
+
+    fake.reply = reply
+
+
+def wait_until(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_concurrent_identical_completions_share_one_call(fake_completion):
+    release = threading.Event()
+    blocking(fake_completion, release)
+    flight = get_single_flight()
+    coalesced = flight.stats["coalesced"]
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(litellm_completion, "same", "openrouter/m", coalesce=True) for _ in range(4)]
+        wait_until(lambda: flight.stats["coalesced"] - coalesced == 3)
+        release.set()
+        results = [future.result() for future in futures]
+    assert results == ["<response>echo: same</response>"] * 4
+    assert len(fake_completion.calls) == 1
+    assert flight.in_flight() == 0
+
+    litellm_completion("same", "openrouter/m", coalesce=True)
+    assert len(fake_completion.calls) == 2
+
+
+def test_coalescing_is_opt_in(fake_completion):
+    release = threading.Event()
+    blocking(fake_completion, release)
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(litellm_completion, "same", "openrouter/m") for _ in range(2)]
+        wait_until(lambda: len(fake_completion.calls) == 2)
+        release.set()
+        assert [future.result() for future in futures] == ["<response>echo: same</response>"] * 2
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "k", fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, "k", lambda: "never")
+        wait_until(lambda: flight.stats["coalesced"] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+def test_late_stream_joiner_gets_buffered_then_live_chunks(fake_completion):
+    first = litellm_streaming("a b c", "openrouter/m", coalesce=True)
+    assert next(first) == "<response>echo: </response>"
+    assert next(first) == "<response>a </response>"
+    late = litellm_streaming("a b c", "openrouter/m", coalesce=True)
+    assert list(late) == ["<response>echo: </response>", "<response>a </response>",
+                          "<response>b </response>", "<response>c</response>"]
+    assert list(first) == ["<response>b </response>", "<response>c</response>"]
+    assert len(fake_completion.calls) == 1
+    assert get_single_flight().in_flight() == 0
+
+
+def test_stream_survives_first_consumer_leaving(fake_completion):
+    first = litellm_streaming("a b", "openrouter/m", coalesce=True)
+    next(first)
+    late = litellm_streaming("a b", "openrouter/m", coalesce=True)
+    assert next(late) == "<response>echo: </response>"
+    first.close()
+    assert "".join(late) == "<response>a </response><response>b</response>"
+    assert len(fake_completion.calls) == 1
+
+
+def test_abandoned_stream_is_closed():
+    closed = []
+
+    def source():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    flight = SingleFlight()
+    stream = flight.stream("k", source)
+    assert next(stream) == 1
+    stream.close()
+    assert closed == [True]
+    assert flight.in_flight() == 0
+    assert list(flight.stream("k", source)) == [1, 2]
+
+
+def test_stream_that_is_never_iterated_holds_nothing_open():
+    opened = []
+
+    def source():
+        opened.append(True)
+        yield 1
+
+    flight = SingleFlight()
+    stream = flight.stream("k", source)
+    assert flight.in_flight() == 0
+    stream.close()
+    assert opened == []
+    assert flight.in_flight() == 0
+    assert list(flight.stream("k", source)) == [1]
@@ -0,0 +1,75 @@
+import pytest
+from src.tool_cache import CachePolicy, ToolResultCache
+from src.tools import MemoizedTool, ShellCodeExecutor
+
+
+class CountingExecutor(ShellCodeExecutor):
+    def __init__(self):
+        super().__init__()
+        self.runs = []
+
+    def run(self, command):
+        self.runs.append(command)
+        return super().run(command)
+
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_command_policies(tmp_path, monkeypatch):
+    executor = CountingExecutor()
+    clock = FakeClock()
+    tool = MemoizedTool(executor, ToolResultCache(clock=clock))
+    for _ in range(3):
+        tool("uname")
+        tool("date")
+        tool("ls")
+    assert executor.runs.count("uname") == 1
+    assert executor.runs.count("date") == 3
+    assert executor.runs.count("ls") == 1
+
+    monkeypatch.chdir(tmp_path)
+    tool("ls")
+    clock.now += 10
+    tool("ls")
+    assert executor.runs.count("ls") == 3
+    assert tool("uname") == executor.run("uname")
+    assert tool.cache.stats["uncached"] == 3
+
+
+def test_invalidation_bounds_and_errors():
+    executor = CountingExecutor()
+    tool = MemoizedTool(executor, ToolResultCache(max_entries=2))
+    for command in ("echo a", "echo b", "echo c"):
+        tool(command)
+    assert len(tool.cache) == 2 and tool.cache.stats["evictions"] == 1
+    assert tool.invalidate("echo  c") == 1
+    tool("echo c")
+    tool("echo c")
+    assert executor.runs.count("echo c") == 2
+    with pytest.raises(PermissionError):
+        tool("rm x")
+    with pytest.raises(PermissionError):
+        tool("rm x")
+    assert tool.invalidate() == 2
+    assert 0 < tool.cache.hit_rate < 1
+
+
+def test_quoted_whitespace_is_part_of_the_key():
+    executor = CountingExecutor()
+    tool = MemoizedTool(executor, ToolResultCache())
+    assert tool('echo "a    b"') == "a    b\n"
+    assert tool('echo "a b"') == "a b\n"
+    assert tool("echo  'a b'") == "a b\n"
+    assert len(executor.runs) == 2 and tool.cache.stats["hits"] == 1
+
+
+def test_tools_opt_in_through_protocol():
+    assert ShellCodeExecutor().cache_policy("date") is None
+    assert ShellCodeExecutor().cache_policy("ls -l").per_cwd
+    with pytest.raises(ValueError):
+        CachePolicy(ttl=0)
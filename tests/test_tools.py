@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from src.tools import ShellCodeExecutor
+
+
+def test_run_many_keeps_order_and_reports_errors():
+    executor = ShellCodeExecutor()
+    results = executor.run_many(["echo one", "rm -rf /", "echo two", "ls /nonexistent-dir", "echo a;b"])
+    assert results[0] == "one\n"
+    assert isinstance(results[1], PermissionError)
+    assert results[2] == "two\n"
+    assert isinstance(results[3], RuntimeError)
+    assert isinstance(results[4], ValueError)
+
+
+def test_arun_runs_concurrently(monkeypatch):
+    executor = ShellCodeExecutor()
+    monkeypatch.setattr(executor, "whitelisted_commands", {"sleep"})
+    start = time.perf_counter()
+    results = asyncio.run(executor.arun_many(["sleep 0.3"] * 4, max_parallel=4))
+    assert results == [""] * 4
+    assert time.perf_counter() - start < 1.0
+
+
+def test_run_many_deadline_and_timeout(monkeypatch):
+    executor = ShellCodeExecutor()
+    monkeypatch.setattr(executor, "whitelisted_commands", {"sleep", "echo"})
+    results = executor.run_many(["sleep 5", "echo fast"], timeout=0.2)
+    assert isinstance(results[0], TimeoutError)
+    assert results[1] == "fast\n"
+    results = executor.run_many(["sleep 5", "sleep 5"], deadline=0.2)
+    assert all(isinstance(r, TimeoutError) for r in results)
+
+
+MIXED_OUTPUT = """#!{python}
+import os, sys, time
+if sys.argv[1] == "flood":
+    out, err = b"o" * 65535 + b"\\n", b"e" * 65535 + b"\\n"
+    for _ in range(800):
+        os.write(1, out)
+        os.write(2, err)
+elif sys.argv[1] == "separators":
+    os.write(1, b"a\\x0bb\\x1cc\\r")
+    time.sleep(0.05)
+    os.write(1, b"d\\ne\\r\\n")
+else:
+    print(os.getpid(), flush=True)
+    time.sleep(30)
+"""
+
+
+@pytest.fixture
+def mixed_output(tmp_path, monkeypatch):
+    import sys
+    script = tmp_path / "mixed"
+    script.write_text(MIXED_OUTPUT.format(python=sys.executable))
+    script.chmod(0o755)
+    executor = ShellCodeExecutor()
+    monkeypatch.setattr(executor, "whitelisted_commands", {str(script)})
+    return executor, str(script)
+
+
+def test_stream_tagged_drains_100mb_of_mixed_output(mixed_output):
+    executor, script = mixed_output
+    totals = {"stdout": 0, "stderr": 0}
+    for name, text in executor.stream_tagged(f"{script} flood"):
+        totals[name] += len(text)
+    assert totals == {"stdout": 800 * 65536, "stderr": 800 * 65536}
+
+
+def test_stream_yields_lines_and_kills_child_on_close(mixed_output):
+    import os
+    executor, script = mixed_output
+    assert list(ShellCodeExecutor().stream("echo a b")) == ["a b\n"]
+    assert list(executor.stream(f"{script} separators")) == ["a\x0bb\x1cc\n", "d\n", "e\n"]
+    assert "".join(executor.stream(f"{script} separators")) == executor.run(f"{script} separators")
+    assert asyncio.run(executor.arun(f"{script} separators")) == executor.run(f"{script} separators")
+
+    stream = executor.stream(f"{script} sleep")
+    pid = int(next(stream))
+    stream.close()
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
@@ -0,0 +1,42 @@
+import pytest
+from src.llm_utils import _escape_xml
+from src.xml_stream import StreamingXMLParser, iter_xml_fields
+
+DOC = ('<response><thinking>test abc def</thinking><message>Hi! 1 &lt; 2</message>'
+       '<memory><search></search><replace>The user wrote just hi.</replace></memory></response>')
+
+
+def _wrapped_chunks(text, size=3):
+    return [f"<response>{_escape_xml(text[i:i + size])}</response>" for i in range(0, len(text), size)]
+
+
+def test_fields_are_emitted_as_they_close():
+    parser = StreamingXMLParser()
+    events = []
+    for chunk in _wrapped_chunks(DOC):
+        parser.feed(chunk)
+        events.extend(parser.read_events())
+    assert parser.close() == []
+    assert events == [
+        ("thinking", "test abc def"),
+        ("message", "Hi! 1 < 2"),
+        ("memory/search", ""),
+        ("memory/replace", "The user wrote just hi."),
+    ]
+
+
+def test_message_is_available_before_stream_ends():
+    chunks = iter(_wrapped_chunks(DOC))
+    for path, text in iter_xml_fields(chunks):
+        if path == "message":
+            break
+    assert text == "Hi! 1 < 2"
+    assert next(chunks, None) is not None
+
+
+def test_raw_chunks_and_errors():
+    assert list(iter_xml_fields(["  <response><mess", "age>hi</message></response>"], wrapped=False)) == [("message", "hi")]
+    with pytest.raises(ValueError):
+        list(iter_xml_fields(["<response><message>hi</response>"], wrapped=False))
+    with pytest.raises(ValueError):
+        list(iter_xml_fields(["<response><message>hi"], wrapped=False))